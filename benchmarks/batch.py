@@ -0,0 +1,51 @@
+"""Compares batch validation of records, as dictionaries and as columns, with
+the compiled validator of a list of them, with and without NumPy. Run with
+``python benchmarks/batch.py``.
+"""
+from common import Field, best
+
+import flexo.batch
+from flexo.typing import StringType, LongType, FloatType, BooleanType,\
+        ListType, FormationType
+
+import sys
+
+def make_item():
+    return FormationType("item", "An order item", [
+        Field("sku", StringType(minLength=1, maxLength=16)),
+        Field("price", FloatType(minValue=0.0)),
+        Field("quantity", LongType(minValue=1L)),
+        Field("gift", BooleanType(), required=False)])
+
+def main():
+    item = make_item()
+    validate = ListType(item).compile()
+    numpy = flexo.batch.numpy
+    print "%8s %10s %10s %10s %10s %10s" % ("records", "compiled",
+            "batch", "columns", "arrays", "converted")
+    for count in [100, 10000, 1000000]:
+        records = [{"sku": "SKU-%05d" % i, "price": 9.99 + i,
+            "quantity": long(i % 5 + 1)} for i in xrange(count)]
+        columns = dict((name, [r[name] for r in records])\
+                for name in ("sku", "price", "quantity"))
+        number = 5 if count < 1000000 else 1
+
+        row = [best(lambda: validate(records), number),
+                best(lambda: item.validate_batch(records), number),
+                best(lambda: item.validate_columns(columns), number)]
+        if numpy is not None:
+            arrays = as_arrays(columns)
+            row.append(best(lambda: item.validate_columns(arrays), number))
+            row.append(best(lambda: item.validate_columns(as_arrays(
+                columns)), number))
+        print "%8s" % count + "".join(" %10.2f" % (t * 1000) for t in row)
+    print "(milliseconds; converted includes converting lists to arrays)"
+
+def as_arrays(columns):
+    """Returns the columns converted to NumPy arrays."""
+    numpy = flexo.batch.numpy
+    return dict((name, numpy.asarray(values))\
+            for name, values in columns.iteritems())
+
+if __name__ == '__main__':
+    main()
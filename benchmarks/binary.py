@@ -0,0 +1,36 @@
+"""Compares the size and speed of the binary encoding of formations with
+JSON. Run with ``python benchmarks/binary.py [records]``.
+"""
+from common import make_schema, make_records, as_json, best
+
+from flexo.binary import BinaryCodec
+
+import json, sys
+
+def main(count):
+    schema = make_schema()
+    codec = BinaryCodec(schema)
+    records = make_records(count)
+    json_records = as_json(records)
+    decoder = json.JSONDecoder(parse_int=long)
+
+    encoded = codec.encode(records)
+    json_encoded = json.dumps(json_records, separators=(',', ':'))
+
+    rows = [
+        ("size (bytes)", len(encoded), len(json_encoded)),
+        ("encode (ms)", best(lambda: codec.encode(records)) * 1000,
+            best(lambda: json.dumps(json_records,
+                separators=(',', ':'))) * 1000),
+        ("decode + validate (ms)", best(lambda: codec.decode(encoded)) * 1000,
+            best(lambda: decoder.decode(json_encoded)) * 1000)
+    ]
+
+    print "%s records" % count
+    print "%-24s %14s %14s" % ("", "binary", "json")
+    for name, binary, text in rows:
+        print "%-24s %14.1f %14.1f" % (name, binary, text)
+    print "(json decode does not validate or parse datetimes)"
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,54 @@
+"""Definitions shared by the benchmarks. Importing this module first makes
+the :mod:`flexo` package of this checkout importable, so that the benchmarks
+run without installing it.
+"""
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from flexo.typing import StringType, LongType, FloatType, BooleanType,\
+        ListType, MapType, DatetimeType, FormationType
+
+import datetime, timeit
+
+class Field(object):
+    """A field of a formation, validated by its type."""
+    def __init__(self, name, type, required=True):
+        self.name = name
+        self.type = type
+        self.required = required
+        self.validate = type.validate
+
+def make_schema():
+    """Returns the type of a list of orders, each with a few items."""
+    item = FormationType("item", "An order item", [
+        Field("sku", StringType(minLength=1, maxLength=16)),
+        Field("price", FloatType(minValue=0.0)),
+        Field("quantity", LongType(minValue=1L)),
+        Field("gift", BooleanType(), required=False)])
+    return ListType(FormationType("order", "An order", [
+        Field("id", LongType(minValue=0L)),
+        Field("customer", StringType(maxLength=64)),
+        Field("created", DatetimeType()),
+        Field("items", ListType(item)),
+        Field("attributes", MapType(StringType(), StringType()),
+            required=False)]))
+
+def make_records(count):
+    """Returns `count` valid orders."""
+    created = datetime.datetime(2016, 9, 1, 12, 30)
+    return [{"id": long(i), "customer": "customer-%s" % (i % 1000),
+        "created": created + datetime.timedelta(seconds=i),
+        "items": [{"sku": "SKU-%05d" % (i * 7 + j), "price": 9.99 + j,
+            "quantity": long(j + 1)} for j in range(i % 5 + 1)],
+        "attributes": {"channel": "web"}} for i in range(count)]
+
+def as_json(records):
+    """Returns orders with their datetimes formatted as JSON would hold
+    them."""
+    return [dict(r, created=r["created"].isoformat()) for r in records]
+
+def best(function, number=5):
+    """Returns the best time of a few calls of `function`, in seconds."""
+    return min(timeit.repeat(function, number=1, repeat=number))
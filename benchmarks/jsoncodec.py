@@ -0,0 +1,55 @@
+"""Compares the schema-driven JSON decoder and encoder with the json module,
+followed or preceded by the compiled validator. Run with
+``python benchmarks/jsoncodec.py [records]``.
+"""
+from common import make_schema, make_records, as_json, best
+
+from flexo.decoder import SchemaDecoder, parse_datetime
+from flexo.encoder import SchemaEncoder
+
+import json, sys
+
+def main(count):
+    schema = make_schema()
+    records = make_records(count)
+    document = json.dumps(as_json(records), separators=(',', ':'))
+    validate = schema.compile()
+    decoder = SchemaDecoder(schema)
+    json_decoder = json.JSONDecoder(parse_int=long)
+    trusted = SchemaEncoder(schema)
+    validating = SchemaEncoder(schema, validate=True)
+    json_encoder = json.JSONEncoder(separators=(',', ':'),
+            default=lambda value: value.isoformat())
+
+    def decode_then_validate():
+        value = json_decoder.decode(document)
+        for record in value:
+            record["created"] = parse_datetime(record["created"])
+        validate(value)
+        return value
+
+    def validate_then_encode():
+        validate(records)
+        return json_encoder.encode(records)
+
+    assert decoder.decode(document) == decode_then_validate() == records
+    assert json.loads(trusted.encode(records)) ==\
+            json.loads(validate_then_encode())
+
+    rows = [
+        ("decode + validate (ms)", best(lambda: decoder.decode(document)),
+            best(decode_then_validate)),
+        ("encode trusted (ms)", best(lambda: trusted.encode(records)),
+            best(lambda: json_encoder.encode(records))),
+        ("validate + encode (ms)", best(lambda: validating.encode(records)),
+            best(validate_then_encode))
+    ]
+
+    print "%s records, %s items" % (count,
+            sum(len(r["items"]) for r in records))
+    print "%-24s %10s %16s" % ("", "flexo", "json + compiled")
+    for name, flexo, baseline in rows:
+        print "%-24s %10.1f %16.1f" % (name, flexo * 1000, baseline * 1000)
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,228 @@
+"""Benchmarks of validation for every type, and for nested formations of
+several sizes and depths, with valid and invalid payloads. For each case the
+time to validate with `validate` and with a compiled validator is measured,
+along with the peak memory allocated while validating.
+
+Run with ``python benchmarks/suite.py``. Results can be saved with
+``--save FILE`` and compared with those of another version with
+``--compare FILE``, which exits with status 1 if any case became slower by
+more than ``--tolerance`` (10% by default). Use ``--filter TEXT`` to run only
+the cases whose name contains TEXT.
+"""
+from common import Field
+
+import flexo
+from flexo.errors import ValidationError
+from flexo.typing import StringType, LongType, FloatType, BooleanType,\
+        ListType, MapType, DatetimeType, EnumType, FormationType,\
+        PositiveLongType, NonzeroPositiveLongType, PositiveFloatType
+
+import argparse, datetime, json, os, resource, sys, timeit
+
+def generate(schema, size):
+    """Returns a valid value of `schema`, with `size` elements in each list
+    and map."""
+    if isinstance(schema, StringType):
+        return u"x" * max(schema.minLength, min(schema.maxLength or 8, 8))
+    if isinstance(schema, LongType):
+        return schema.minValue if schema.minValue is not None else 0L
+    if isinstance(schema, FloatType):
+        return schema.minValue if schema.minValue is not None else 0.0
+    if isinstance(schema, BooleanType):
+        return True
+    if isinstance(schema, DatetimeType):
+        return datetime.datetime(2016, 9, 1, 12, 30)
+    if isinstance(schema, EnumType):
+        return min(schema.members)
+    if isinstance(schema, ListType):
+        return [generate(schema.elementType, size) for i in xrange(size)]
+    if isinstance(schema, MapType):
+        return dict((u"key%s" % i, generate(schema.valueType, size))\
+                for i in xrange(size))
+    if isinstance(schema, FormationType):
+        return dict((name, generate(field.type, size))\
+                for name, field in schema.fields.iteritems())
+    raise TypeError("cannot generate values of %r" % schema)
+
+def invalidate(schema, value):
+    """Returns a copy of a valid value of `schema` in which the last scalar
+    reached by validation is of the wrong type, so that validating it
+    traverses (nearly) the whole value before failing."""
+    if isinstance(schema, ListType) and value:
+        return value[:-1] + [invalidate(schema.elementType, value[-1])]
+    if isinstance(schema, MapType) and value:
+        key = value.keys()[-1]
+        value = dict(value)
+        value[key] = invalidate(schema.valueType, value[key])
+        return value
+    if isinstance(schema, FormationType):
+        name = value.keys()[-1]
+        value = dict(value)
+        value[name] = invalidate(schema.fields[name].type, value[name])
+        return value
+    return object()
+
+def nested_schema(depth, width):
+    """Returns a formation with `width` scalar fields of each kind and, below
+    `depth`, a list and a map of nested formations."""
+    fields = []
+    for i in range(width):
+        fields.extend([Field("name%s" % i, StringType(1, 64)),
+            Field("count%s" % i, LongType(0L)),
+            Field("ratio%s" % i, FloatType(0.0, 1.0), required=False),
+            Field("active%s" % i, BooleanType())])
+    fields.append(Field("created", DatetimeType()))
+    if depth > 1:
+        child = nested_schema(depth - 1, width)
+        fields.append(Field("children", ListType(child)))
+        fields.append(Field("index", MapType(StringType(), child),
+            required=False))
+    return FormationType("level%s" % depth, "Level %s" % depth, fields)
+
+def cases():
+    """Yields (name, schema, size) for each benchmark case."""
+    scalars = [("string", StringType(1, 64)), ("long", LongType(0L, 10L**9)),
+            ("float", FloatType(0.0)), ("boolean", BooleanType()),
+            ("datetime", DatetimeType()),
+            ("positive_long", PositiveLongType()),
+            ("nonzero_positive_long", NonzeroPositiveLongType()),
+            ("positive_float", PositiveFloatType()),
+            ("enum", EnumType(u"member%s" % i for i in xrange(100)))]
+    for name, schema in scalars:
+        yield "list[%s]" % name, ListType(schema), 10000
+    yield "map[string->long]", MapType(StringType(), LongType()), 10000
+    yield "list[list[long]]", ListType(ListType(LongType())), 100
+    for depth, width, size in [(1, 1, 0), (1, 8, 0), (2, 2, 10), (3, 2, 10),
+            (4, 1, 5)]:
+        yield "formation(depth=%s,width=%s,size=%s)" % (depth, width, size),\
+                nested_schema(depth, width), size
+    yield "list[formation(depth=2)]",\
+            ListType(nested_schema(2, 2)), 100
+
+def best(function, repeat):
+    """Returns the best time per call of `function`, in seconds, calling it
+    enough times per measurement for the measurement to take about 0.1s."""
+    number = 1
+    while True:
+        elapsed = timeit.timeit(function, number=number)
+        if elapsed >= 0.1 or number >= 1000000:
+            break
+        number *= 10
+    return min(timeit.repeat(function, number=number, repeat=repeat)) /\
+            number
+
+def peak_rss():
+    """Returns the peak resident set size of the process in kilobytes."""
+    try:
+        with open("/proc/self/status") as fp:
+            for line in fp:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except IOError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def peak_memory(function):
+    """Returns the increase of the peak resident set size, in kilobytes,
+    caused by calling `function` once in a forked child process. (Python 2
+    has no tracemalloc, so allocations are measured by the kernel.) On Linux
+    the child first resets its peak to its current size, so that the parent's
+    earlier peaks do not hide the increase."""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        try:
+            with open("/proc/self/clear_refs", "w") as fp:
+                fp.write("5")
+        except IOError:
+            pass
+        before = peak_rss()
+        function()
+        os.write(write_fd, str(peak_rss() - before))
+        os._exit(0)
+    os.close(write_fd)
+    result = os.read(read_fd, 64)
+    os.close(read_fd)
+    os.waitpid(pid, 0)
+    return int(result)
+
+def expect_error(validate):
+    def run(value):
+        try:
+            validate(value)
+        except ValidationError:
+            return
+        raise AssertionError("invalid payload was accepted")
+    return run
+
+def run(repeat, pattern=None):
+    results = {}
+    for name, schema, size in cases():
+        if pattern and pattern not in name:
+            continue
+        valid = generate(schema, size)
+        invalid = invalidate(schema, valid)
+        for variant, payload in [("valid", valid), ("invalid", invalid)]:
+            for mode, validate in [("validate", schema.validate),
+                    ("compiled", schema.compile())]:
+                if variant == "invalid":
+                    validate = expect_error(validate)
+                key = "%s %s %s" % (name, variant, mode)
+                results[key] = {
+                    "seconds": best(lambda: validate(payload), repeat),
+                    "peak_kb": peak_memory(lambda: validate(payload))
+                }
+                print "%-58s %10.1fus %8dkB" % (key,
+                        results[key]["seconds"] * 1e6,
+                        results[key]["peak_kb"])
+                sys.stdout.flush()
+    return results
+
+def compare(results, baseline, tolerance):
+    """Prints the change of each case against a baseline, returning the
+    names of the cases slower by more than `tolerance`."""
+    regressions = []
+    print
+    print "change against %s:" % baseline["version"]
+    for key in sorted(results):
+        if key not in baseline["results"]:
+            continue
+        before = baseline["results"][key]["seconds"]
+        change = results[key]["seconds"] / before - 1
+        flag = ""
+        if change > tolerance:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print "%-58s %+9.1f%%%s" % (key, change * 100, flag)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5,
+            help="measurements per case; the best is kept")
+    parser.add_argument("--filter", help="only run cases containing this")
+    parser.add_argument("--save", help="write the results to this file")
+    parser.add_argument("--compare", help="compare with results saved in "\
+            "this file")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+            help="slowdown reported as a regression by --compare")
+    args = parser.parse_args()
+
+    print "flexo %s, python %s" % (flexo.__version__, sys.version.split()[0])
+    results = run(args.repeat, args.filter)
+
+    if args.save:
+        with open(args.save, "w") as fp:
+            json.dump({"version": flexo.__version__, "python":
+                sys.version.split()[0], "results": results}, fp, indent=2,
+                sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as fp:
+            baseline = json.load(fp)
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
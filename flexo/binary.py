@@ -0,0 +1,482 @@
+"""A compact binary encoding of values, derived from their schema. Values
+carry no field names or type tags, since both are implied by the schema:
+
+* :class:`flexo.typing.LongType` - a zigzag varint.
+* :class:`flexo.typing.FloatType` - 8 bytes, little-endian IEEE 754.
+* :class:`flexo.typing.StringType` - a varint byte count followed by UTF-8.
+* :class:`flexo.typing.BooleanType` - 1 byte.
+* :class:`flexo.typing.DatetimeType` - microseconds since the UTC epoch, as a
+  zigzag varint. Naive datetimes are taken to be UTC.
+* :class:`flexo.typing.EnumType` - the member, as a string or a long.
+* :class:`flexo.typing.ListType` and :class:`flexo.typing.MapType` - a varint
+  element count followed by the elements (keys and values alternate).
+* :class:`flexo.typing.FormationType` - a bitmap of which optional fields are
+  present, followed by the present fields in declaration order.
+* :class:`flexo.typing.FormationRef` - the referenced formation.
+
+Values of other types are encoded as length-prefixed JSON. Decoding validates
+every value as it is read.
+"""
+from .errors import ValidationError
+from .typing import BaseType, StringType, LongType, FloatType, BooleanType,\
+        ListType, MapType, DatetimeType, EnumType, FormationType,\
+        FormationRef, _SchemaBuilder, _field_type, _max_count_error,\
+        _type_error
+from .utils import check_keys
+
+import calendar, datetime, json, struct, types
+
+_DOUBLE = struct.Struct('<d')
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+_BYTES = [chr(i) for i in xrange(256)]
+
+def write_varint(value, append):
+    """Appends the unsigned varint encoding of `value` (7 bits per byte, least
+    significant group first)."""
+    if value < 0x80:
+        append(_BYTES[value])
+        return
+    parts = []
+    while value > 0x7f:
+        parts.append(chr((value & 0x7f) | 0x80))
+        value >>= 7
+    parts.append(chr(value))
+    append(''.join(parts))
+
+def read_varint(buf, pos):
+    """Reads an unsigned varint at `pos`, returning the value and the position
+    after it."""
+    result = ord(buf[pos])
+    if result < 0x80:
+        return result, pos + 1
+    result &= 0x7f
+    shift = 7
+    pos += 1
+    while True:
+        byte = ord(buf[pos])
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+def skip_varint(buf, pos):
+    while ord(buf[pos]) >= 0x80:
+        pos += 1
+    return pos + 1
+
+def _zigzag(value):
+    return value << 1 if value >= 0 else ((-value) << 1) - 1
+
+def _unzigzag(value):
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+class BinaryCodec(_SchemaBuilder):
+    """Encodes and decodes values of a given type in the binary format
+    described in :mod:`flexo.binary`.
+
+    :type schema: flexo.typing.BaseType
+    :param schema: The type of the values, usually a
+                   :class:`flexo.typing.FormationType`.
+    """
+    def __init__(self, schema):
+        if not isinstance(schema, BaseType):
+            raise TypeError("schema must be an instance of BaseType")
+
+        super(BinaryCodec, self).__init__()
+        self.schema = schema
+        self._json = json.JSONDecoder(parse_int=long)
+        self._write, self._read, self._skip = self.handlers(schema)
+
+    def encode(self, value):
+        """Validates a value and returns its binary encoding.
+
+        :raises ValidationError: if the value is not valid with respect to
+                                 the schema.
+        """
+        parts = []
+        self._write(value, parts.append)
+        return ''.join(parts)
+
+    def decode(self, data, pos=0):
+        """Decodes and validates the value encoded at position `pos` of
+        `data`, which may be a string or any object supporting indexing,
+        slicing and the buffer interface (such as an `mmap`).
+
+        :raises ValidationError: if the decoded value is not valid.
+        :raises ValueError: if the data is truncated or malformed.
+        """
+        return self.read(data, pos)[0]
+
+    def read(self, data, pos):
+        """Like :meth:`decode`, but returns the value along with the position
+        after it."""
+        return checked_read(self._read, data, pos)
+
+    def skip(self, data, pos):
+        """Returns the position after the value encoded at `pos`, without
+        decoding it."""
+        return checked_read(self._skip, data, pos)
+
+    def handlers(self, schema):
+        """Returns the `(write, read, skip)` functions for values of a type:
+        `write(value, append)` appends the encoding of a value,
+        `read(buf, pos)` decodes and validates the value at `pos` and returns
+        it along with the position after it, and `skip(buf, pos)` returns the
+        position after the value at `pos`."""
+        return self._build(schema)
+
+    def _fallback(self, schema):
+        return self._json_handlers(schema.compile())
+
+    def _json_handlers(self, validate):
+        raw_decode = self._json.raw_decode
+        write_string, read_string, skip_string = _string_handlers(None)
+
+        def write(value, append):
+            validate(value)
+            write_string(json.dumps(value), append)
+
+        def read(buf, pos):
+            text, pos = read_string(buf, pos)
+            value = raw_decode(text)[0]
+            validate(value)
+            return value, pos
+        return write, read, skip_string
+
+    def _long_handlers(self, schema):
+        validate = schema.compile()
+
+        def write(value, append):
+            validate(value)
+            write_varint(_zigzag(value), append)
+
+        def read(buf, pos):
+            value, pos = read_varint(buf, pos)
+            value = long(_unzigzag(value))
+            validate(value)
+            return value, pos
+        return write, read, skip_varint
+
+    def _float_handlers(self, schema):
+        validate = schema.compile()
+        pack = _DOUBLE.pack
+        unpack_from = _DOUBLE.unpack_from
+
+        def write(value, append):
+            validate(value)
+            append(pack(value))
+
+        def read(buf, pos):
+            value = unpack_from(buf, pos)[0]
+            validate(value)
+            return value, pos + 8
+
+        def skip(buf, pos):
+            return pos + 8
+        return write, read, skip
+
+    def _string_handlers(self, schema):
+        return _string_handlers(schema.compile())
+
+    def _enum_handlers(self, schema):
+        if schema.kind == "string":
+            return self._string_handlers(schema)
+        return self._long_handlers(schema)
+
+    def _boolean_handlers(self, schema):
+        validate = schema.compile()
+
+        def write(value, append):
+            validate(value)
+            append('\x01' if value else '\x00')
+
+        def read(buf, pos):
+            byte = buf[pos]
+            if byte not in ('\x00', '\x01'):
+                raise ValueError("malformed boolean at position %s" % pos)
+            return byte == '\x01', pos + 1
+
+        def skip(buf, pos):
+            return pos + 1
+        return write, read, skip
+
+    def _datetime_handlers(self, schema):
+        validate = schema.compile()
+
+        def write(value, append):
+            validate(value)
+            micros = calendar.timegm(value.utctimetuple()) * 1000000 +\
+                    value.microsecond
+            write_varint(_zigzag(micros), append)
+
+        def read(buf, pos):
+            micros, pos = read_varint(buf, pos)
+            return _EPOCH + datetime.timedelta(
+                    microseconds=_unzigzag(micros)), pos
+        return write, read, skip_varint
+
+    def _list_handlers(self, schema):
+        validate = schema.compile()
+        maxLength = schema.maxLength
+        write_element, read_element, skip_element =\
+                self.handlers(schema.elementType)
+
+        def write(value, append):
+            validate_container(validate, value, list, maxLength)
+            write_varint(len(value), append)
+            i = 0
+            try:
+                for i, v in enumerate(value):
+                    write_element(v, append)
+            except ValidationError as e:
+                e.push_path(i)
+                raise
+
+        def read(buf, pos):
+            count, pos = read_varint(buf, pos)
+            if maxLength is not None and count > maxLength:
+                raise _max_count_error(maxLength)
+            values = []
+            try:
+                for i in xrange(count):
+                    value, pos = read_element(buf, pos)
+                    values.append(value)
+            except ValidationError as e:
+                e.push_path(len(values))
+                raise
+            return values, pos
+
+        def skip(buf, pos):
+            count, pos = read_varint(buf, pos)
+            for i in xrange(count):
+                pos = skip_element(buf, pos)
+            return pos
+        return write, read, skip
+
+    def _map_handlers(self, schema):
+        validate = schema.compile()
+        maxLength = schema.maxLength
+        write_key, read_key, skip_key = self.handlers(schema.keyType)
+        write_value, read_value, skip_value = self.handlers(schema.valueType)
+
+        def write(value, append):
+            validate_container(validate, value, dict, maxLength)
+            write_varint(len(value), append)
+            k = None
+            try:
+                for k,v in value.iteritems():
+                    write_key(k, append)
+                    write_value(v, append)
+            except ValidationError as e:
+                e.push_path(k)
+                raise
+
+        def read(buf, pos):
+            count, pos = read_varint(buf, pos)
+            if maxLength is not None and count > maxLength:
+                raise _max_count_error(maxLength)
+            values = {}
+            key = None
+            try:
+                for i in xrange(count):
+                    key, pos = read_key(buf, pos)
+                    values[key], pos = read_value(buf, pos)
+            except ValidationError as e:
+                e.push_path(key)
+                raise
+            return values, pos
+
+        def skip(buf, pos):
+            count, pos = read_varint(buf, pos)
+            for i in xrange(count):
+                pos = skip_value(buf, skip_key(buf, pos))
+            return pos
+        return write, read, skip
+
+    def _formation_handlers(self, schema):
+        layout = FormationLayout(self, schema)
+        read_presence = layout.read_presence
+        fields = layout.fields
+
+        def read(buf, pos):
+            present, pos = read_presence(buf, pos)
+            values = {}
+            name = None
+            try:
+                for name, required, read_field, skip_field in fields:
+                    if required or present & 1:
+                        values[name], pos = read_field(buf, pos)
+                    if not required:
+                        present >>= 1
+            except ValidationError as e:
+                e.push_path(name)
+                raise
+            return values, pos
+        return layout.write, read, layout.skip
+
+    def _ref_handlers(self, schema):
+        def write(value, append):
+            self._resolve(schema)[0](value, append)
+
+        def read(buf, pos):
+            return self._resolve(schema)[1](buf, pos)
+
+        def skip(buf, pos):
+            return self._resolve(schema)[2](buf, pos)
+        return write, read, skip
+
+    _builders = [
+        (FormationType, _formation_handlers),
+        (FormationRef, _ref_handlers),
+        (ListType, _list_handlers),
+        (MapType, _map_handlers),
+        (StringType, _string_handlers),
+        (LongType, _long_handlers),
+        (FloatType, _float_handlers),
+        (BooleanType, _boolean_handlers),
+        (DatetimeType, _datetime_handlers),
+        (EnumType, _enum_handlers)
+    ]
+
+class FormationLayout(object):
+    """The binary layout of a formation: a bitmap of which optional fields
+    are present, followed by the present fields in declaration order.
+
+    :type codec: BinaryCodec
+    :param codec: The codec used to build the handlers of the fields.
+
+    :type schema: flexo.typing.FormationType
+    :param schema: The formation.
+    """
+    def __init__(self, codec, schema):
+        index = schema.fields
+        self.schema = schema
+
+        #: A list of `(name, required, read, skip)` for each field, in
+        #: declaration order.
+        self.fields = []
+        self._writers = {}
+        optional = 0
+        for name in index.names:
+            field = index[name]
+            field_type = _field_type(field)
+            if field_type is not None:
+                write, read, skip = codec.handlers(field_type)
+            else:
+                write, read, skip = codec._json_handlers(field.validate)
+            required = name in index.required
+            self.fields.append((name, required, read, skip))
+            self._writers[name] = (write, None if required else optional)
+            if not required:
+                optional += 1
+
+        #: The number of bytes of the presence bitmap.
+        self.bitmap_size = (optional + 7) // 8
+
+    def read_presence(self, buf, pos):
+        """Reads the presence bitmap at `pos`, returning it as an integer
+        whose bit `i` is set if the `i`-th optional field is present, along
+        with the position after it."""
+        present = 0
+        for i in xrange(self.bitmap_size):
+            present |= ord(buf[pos + i]) << (8 * i)
+        return present, pos + self.bitmap_size
+
+    def write(self, value, append):
+        writers = self._writers
+        if not isinstance(value, types.DictType):
+            raise _type_error(value, "dict")
+        check_keys(self.schema.fields, self.schema.name, value)
+        present = 0
+        for k in value:
+            bit = writers[k][1]
+            if bit is not None:
+                present |= 1 << bit
+
+        append(''.join(chr((present >> (8 * i)) & 0xff)\
+                for i in xrange(self.bitmap_size)))
+        name = None
+        try:
+            for name, required, read, skip in self.fields:
+                if required or name in value:
+                    writers[name][0](value[name], append)
+        except ValidationError as e:
+            e.push_path(name)
+            raise
+
+    def skip(self, buf, pos):
+        present, pos = self.read_presence(buf, pos)
+        for name, required, read, skip in self.fields:
+            if required or present & 1:
+                pos = skip(buf, pos)
+            if not required:
+                present >>= 1
+        return pos
+
+    def offsets(self, buf, pos):
+        """Returns a dictionary of the names of the fields present in the
+        value encoded at `pos` to the position of their encoding, along with
+        the position after the value, without decoding any field."""
+        present, pos = self.read_presence(buf, pos)
+        offsets = {}
+        for name, required, read, skip in self.fields:
+            if required or present & 1:
+                offsets[name] = pos
+                pos = skip(buf, pos)
+            if not required:
+                present >>= 1
+        return offsets, pos
+
+def checked_read(read, data, pos):
+    """Calls `read(data, pos)`, where `read` is a read or skip function of
+    :meth:`BinaryCodec.handlers` or :class:`FormationLayout`, raising
+    ValueError if the data is truncated or malformed.
+    """
+    try:
+        return read(data, pos)
+    except (IndexError, OverflowError, struct.error,
+            UnicodeDecodeError) as e:
+        raise ValueError("malformed data: %s" % e)
+
+def validate_container(validate, value, container_type, maxLength=None):
+    """Raises the error of `validate` unless `value` is a `container_type`
+    with at most `maxLength` elements, so that writers fail with the same
+    errors as validation."""
+    if not isinstance(value, container_type) or\
+            (maxLength is not None and len(value) > maxLength):
+        validate(value)
+
+def _string_handlers(validate):
+    def write(value, append):
+        if validate is not None:
+            validate(value)
+        if isinstance(value, unicode):
+            value = value.encode('utf-8')
+        else:
+            # Strings are decoded as UTF-8 when read, so other bytes would be
+            # written but could not be read back.
+            try:
+                value.decode('utf-8')
+            except UnicodeDecodeError:
+                raise ValidationError("%(value)s is not valid UTF-8", value,
+                        constraint="encoding")
+        write_varint(len(value), append)
+        append(value)
+
+    def read(buf, pos):
+        length, pos = read_varint(buf, pos)
+        end = pos + length
+        if end > len(buf):
+            raise IndexError("string extends past the end of the data")
+        value = buf[pos:end].decode('utf-8')
+        if validate is not None:
+            validate(value)
+        return value, end
+
+    def skip(buf, pos):
+        length, pos = read_varint(buf, pos)
+        return pos + length
+    return write, read, skip
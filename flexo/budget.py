@@ -0,0 +1,103 @@
+"""Limits on the overall size of a value, checked by a cheap pre-pass before
+the value is validated against its type. The pre-pass is iterative, so that
+deeply nested values cannot exhaust the interpreter's recursion limit, and
+stops at the first limit exceeded.
+
+Limits on the length of individual lists and maps are part of their types
+(see the `maxLength` of :class:`flexo.typing.ListType` and
+:class:`flexo.typing.MapType`).
+"""
+from .errors import ValidationError
+from .typing import BaseType
+
+import types
+
+class PayloadBudget(object):
+    """Limits on the nesting depth, number of elements and total string
+    length of a value. Each limit defaults to None (unlimited).
+
+    :type max_depth: int
+    :param max_depth: The maximum nesting depth of lists and dictionaries. A
+                      list of scalars has depth 1.
+
+    :type max_elements: int
+    :param max_elements: The maximum total number of list elements and
+                         dictionary entries.
+
+    :type max_string_length: int
+    :param max_string_length: The maximum total length of strings, including
+                              dictionary keys.
+    """
+    def __init__(self, max_depth=None, max_elements=None,
+            max_string_length=None):
+        self.max_depth = max_depth
+        self.max_elements = max_elements
+        self.max_string_length = max_string_length
+
+    def check(self, value):
+        """Checks that a value is within the budget.
+
+        :param value: The value to check.
+
+        :raises ValidationError: for the first limit exceeded, with the path
+                                 of the value at which it was exceeded.
+        """
+        max_depth = self.max_depth
+        max_elements = self.max_elements
+        max_string_length = self.max_string_length
+        elements = 0
+        string_length = 0
+
+        # Paths are linked (segment, parent) pairs, only unwound on error.
+        stack = [(value, 0, None)]
+        while stack:
+            value, depth, path = stack.pop()
+            value_type = type(value)
+            if value_type is types.ListType or value_type is types.DictType:
+                depth += 1
+                if max_depth is not None and depth > max_depth:
+                    raise _error(path, "nesting exceeds maximum depth "\
+                            "%(limit)s", "maxDepth", max_depth)
+                elements += len(value)
+                if max_elements is not None and elements > max_elements:
+                    raise _error(path, "payload has more than %(limit)s "\
+                            "elements", "maxElements", max_elements)
+                if value_type is types.ListType:
+                    for i, v in enumerate(value):
+                        stack.append((v, depth, (i, path)))
+                else:
+                    for k,v in value.iteritems():
+                        stack.append((k, depth, path))
+                        stack.append((v, depth, (k, path)))
+            elif isinstance(value, types.StringTypes):
+                string_length += len(value)
+                if max_string_length is not None and\
+                        string_length > max_string_length:
+                    raise _error(path, "strings of payload exceed %(limit)s "\
+                            "characters", "maxStringLength",
+                            max_string_length)
+
+    def validator(self, schema):
+        """Returns a function checking a value against this budget and then
+        validating it against `schema`, with the validator compiled by
+        :meth:`flexo.typing.BaseType.compile`.
+
+        :type schema: flexo.typing.BaseType
+        :param schema: The type to validate against.
+        """
+        if not isinstance(schema, BaseType):
+            raise TypeError("schema must be an instance of BaseType")
+        check = self.check
+        compiled = schema.compile()
+
+        def validate(value):
+            check(value)
+            compiled(value)
+        return validate
+
+def _error(path, message, constraint, limit):
+    error = ValidationError(message, constraint=constraint, limit=limit)
+    while path is not None:
+        segment, path = path
+        error.push_path(segment)
+    return error
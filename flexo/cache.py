@@ -0,0 +1,175 @@
+"""A bounded cache of successful validations, for values which are validated
+against the same type over and over. Values are looked up by the identity of
+the type and either the value itself, if it is hashable, or a digest of its
+contents.
+Only successful validations are cached; invalid values are validated (and
+their errors raised) every time.
+"""
+from .typing import BaseType
+
+import collections, datetime, hashlib, types
+
+#: Types of values used in cache keys as they are. Other hashable values
+#: (such as tuples) are digested, since their elements could compare equal
+#: across types (``(1,) == (1.0,)``).
+_HASHABLE_TYPES = frozenset([types.StringType, types.UnicodeType,
+    types.IntType, types.LongType, types.FloatType, types.BooleanType,
+    types.NoneType, datetime.datetime, datetime.date])
+
+class ValidationCache(object):
+    """A least-recently-used cache of values known to be valid for a type.
+    Cache keys include the exact type of the value, so that for instance
+    ``1``, ``1L``, ``1.0`` and ``True`` are distinguished even though they are
+    equal. Instances are not thread-safe.
+
+    :type maxsize: int
+    :param maxsize: The maximum number of entries. The least recently used
+                    entry is evicted when a new one would exceed it.
+
+    :type max_digest_size: int
+    :param max_digest_size: The maximum number of nested values (elements,
+                            keys and values) of a dictionary or list for it to
+                            be digested. Larger values, and values containing
+                            objects of types other than strings, numbers,
+                            booleans, None, datetimes, lists, tuples and
+                            dictionaries, are validated without the cache.
+    """
+    def __init__(self, maxsize=1024, max_digest_size=1000):
+        if maxsize < 1:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.max_digest_size = max_digest_size
+
+        #: The number of validations answered from the cache.
+        self.hits = 0
+
+        #: The number of validations which were not in the cache.
+        self.misses = 0
+
+        #: The number of validations of values which could not be cached.
+        self.skipped = 0
+
+        # Entries map keys to their type, so that the type (whose id is part
+        # of the key) cannot be collected and its id reused while they exist.
+        self._entries = collections.OrderedDict()
+        self._disabled = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def validate(self, schema, value):
+        """Validates a value against a type, unless it is known to be valid.
+
+        :type schema: flexo.typing.BaseType
+        :param schema: The type to validate against.
+
+        :param value: The value to validate.
+
+        :raises ValidationError: if the value is not valid.
+        """
+        self._validate(schema, value, schema.validate)
+
+    def _validate(self, schema, value, validate):
+        if id(schema) in self._disabled:
+            validate(value)
+            return
+        key = self._key(schema, value)
+        if key is None:
+            self.skipped += 1
+            validate(value)
+            return
+
+        entries = self._entries
+        if key in entries:
+            self.hits += 1
+            entries[key] = entries.pop(key)
+            return
+        self.misses += 1
+        validate(value)
+        entries[key] = schema
+        if len(entries) > self.maxsize:
+            entries.popitem(last=False)
+
+    def validator(self, schema):
+        """Returns a function validating values against `schema` through this
+        cache, with the validator compiled by
+        :meth:`flexo.typing.BaseType.compile`.
+
+        :type schema: flexo.typing.BaseType
+        :param schema: The type to validate against.
+        """
+        if not isinstance(schema, BaseType):
+            raise TypeError("schema must be an instance of BaseType")
+        compiled = schema.compile()
+
+        def validate(value):
+            self._validate(schema, value, compiled)
+        return validate
+
+    def disable(self, schema):
+        """Stops caching validations against a type, discarding its entries.
+
+        :type schema: flexo.typing.BaseType
+        :param schema: The type to validate without the cache.
+        """
+        self._disabled[id(schema)] = schema
+        for key in [key for key in self._entries if key[0] == id(schema)]:
+            del self._entries[key]
+
+    def enable(self, schema):
+        """Resumes caching validations against a type disabled with
+        :meth:`disable`."""
+        self._disabled.pop(id(schema), None)
+
+    def clear(self):
+        """Removes all entries and resets the counters."""
+        self._entries.clear()
+        self.hits = self.misses = self.skipped = 0
+
+    def _key(self, schema, value):
+        value_type = type(value)
+        if value_type in _HASHABLE_TYPES:
+            return (id(schema), value_type, value)
+        digest = _digest(value, self.max_digest_size)
+        if digest is None:
+            return None
+        return (id(schema), None, digest)
+
+def _digest(value, limit):
+    """Returns a SHA-1 digest of a canonical encoding of a value, or None if
+    the value has more than `limit` nested values or contains values which
+    cannot be encoded. Dictionaries are encoded independently of their
+    iteration order."""
+    parts = []
+    count = [0]
+
+    def encode(value):
+        count[0] += 1
+        if count[0] > limit:
+            return False
+        value_type = type(value)
+        if value_type in _HASHABLE_TYPES:
+            parts.append('%s:%r;' % (value_type.__name__, value))
+        elif value_type is types.ListType or value_type is types.TupleType:
+            parts.append('%s[' % value_type.__name__)
+            for v in value:
+                if not encode(v):
+                    return False
+            parts.append(']')
+        elif value_type is types.DictType:
+            items = []
+            for k,v in value.iteritems():
+                start = len(parts)
+                if not encode(k) or not encode(v):
+                    return False
+                items.append(''.join(parts[start:]))
+                del parts[start:]
+            items.sort()
+            parts.append('{%s}' % ''.join(items))
+        else:
+            return False
+        return True
+
+    if not encode(value):
+        return None
+    return hashlib.sha1(''.join(parts)).digest()
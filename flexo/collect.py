@@ -0,0 +1,215 @@
+"""Validation which reports every error of a value instead of only the first,
+so that a large invalid payload can be corrected in one round trip. The
+number of errors can be bounded, in which case validation stops as soon as
+the bound is reached.
+
+This is separate from the validators of :mod:`flexo.typing`, which stay
+fail-fast: nothing here is executed unless errors are collected.
+"""
+from .errors import MultipleValidationError, ValidationError
+from .typing import BaseType, ListType, MapType, FormationType, FormationRef,\
+        _SchemaBuilder, _field_type, _type_error
+from .utils import FieldIndex, invalid_field_error, missing_fields_error
+
+import types
+
+class ErrorCollector(_SchemaBuilder):
+    """Collects the errors of values of a type. Each element of a list or
+    map and each field of a formation is validated even if others are
+    invalid; scalars, and containers of the wrong type or length, contribute
+    at most one error each.
+
+    :type schema: flexo.typing.BaseType
+    :param schema: The type to validate against.
+    """
+    def __init__(self, schema):
+        if not isinstance(schema, BaseType):
+            raise TypeError("schema must be an instance of BaseType")
+
+        super(ErrorCollector, self).__init__()
+        self.schema = schema
+        self._collect = self._build(schema)
+
+    def errors(self, value, max_errors=None):
+        """Returns the errors of a value, in the order they were found, with
+        their full paths.
+
+        :param value: The value to validate.
+
+        :type max_errors: int
+        :param max_errors: An optional maximum number of errors, after which
+                           validation stops.
+        """
+        return self._run(value, max_errors).errors
+
+    def validate(self, value, max_errors=None):
+        """Validates a value, raising all its errors at once.
+
+        :param value: The value to validate.
+
+        :type max_errors: int
+        :param max_errors: An optional maximum number of errors, after which
+                           validation stops.
+
+        :raises MultipleValidationError: if the value has any error.
+        """
+        state = self._run(value, max_errors)
+        if state.errors:
+            raise MultipleValidationError(state.errors, state.truncated)
+
+    def _run(self, value, max_errors):
+        state = _State(max_errors)
+        try:
+            self._collect(value, state)
+        except _Full:
+            state.truncated = True
+        return state
+
+    def _fallback(self, schema):
+        return _scalar_collector(schema.compile())
+
+    def _list_collector(self, schema):
+        validate_container = schema.compile()
+        maxLength = schema.maxLength
+        collect_element = self._build(schema.elementType)
+
+        def collect(value, state):
+            if not isinstance(value, types.ListType) or\
+                    (maxLength is not None and len(value) > maxLength):
+                _scalar_collector(validate_container)(value, state)
+                return
+            path = state.path
+            for i, v in enumerate(value):
+                path.append(i)
+                collect_element(v, state)
+                path.pop()
+        return collect
+
+    def _map_collector(self, schema):
+        validate_container = schema.compile()
+        maxLength = schema.maxLength
+        validate_key = schema.keyType.compile()
+        collect_value = self._build(schema.valueType)
+
+        def collect(value, state):
+            if not isinstance(value, types.DictType) or\
+                    (maxLength is not None and len(value) > maxLength):
+                _scalar_collector(validate_container)(value, state)
+                return
+            path = state.path
+            for k,v in value.iteritems():
+                path.append(k)
+                try:
+                    validate_key(k)
+                except ValidationError as e:
+                    state.report(e)
+                collect_value(v, state)
+                path.pop()
+        return collect
+
+    def _formation_collector(self, schema):
+        collectors = {}
+        for name, field in schema.fields.iteritems():
+            field_type = _field_type(field)
+            collectors[name] = _scalar_collector(field.validate)\
+                    if field_type is None else self._build(field_type)
+        return _fields_collector(schema.fields, collectors, schema.name)
+
+    def _ref_collector(self, schema):
+        def collect(value, state):
+            self._resolve(schema)(value, state)
+        return collect
+
+    _builders = [
+        (FormationType, _formation_collector),
+        (FormationRef, _ref_collector),
+        (ListType, _list_collector),
+        (MapType, _map_collector)
+    ]
+
+def field_errors(fields, to_validate, context_message=None, max_errors=None):
+    """Returns every error of a dictionary with respect to the given field
+    definitions, as :func:`flexo.utils.validate_fields` would check them: keys
+    which are not fields, invalid values and missing required fields.
+
+    :param fields: Dictionary of field name to :class:`flexo.model.Field`.
+    :param to_validate: The dictionary to validate against the field
+    definitions.
+    :param context_message: An optional message to prepend to validation
+    errors.
+    :param max_errors: An optional maximum number of errors, after which
+    validation stops.
+    """
+    if not isinstance(fields, FieldIndex):
+        fields = FieldIndex(fields.values())
+    collectors = dict((name, _scalar_collector(field.validate))\
+            for name, field in fields.iteritems())
+    state = _State(max_errors)
+    try:
+        _fields_collector(fields, collectors, context_message)(to_validate,
+                state)
+    except _Full:
+        pass
+    return state.errors
+
+def validate_all(schema, value, max_errors=None):
+    """Validates a value against a type, raising all its errors at once. See
+    :class:`ErrorCollector`.
+
+    :raises MultipleValidationError: if the value has any error.
+    """
+    ErrorCollector(schema).validate(value, max_errors)
+
+class _Full(Exception):
+    """Raised to stop validation when the maximum number of errors has been
+    reached."""
+
+class _State(object):
+    """The errors collected so far and the path of the value being
+    validated."""
+    def __init__(self, max_errors):
+        self.max_errors = max_errors
+        self.errors = []
+        self.path = []
+        self.truncated = False
+
+    def report(self, error):
+        for segment in reversed(self.path):
+            error.push_path(segment)
+        self.errors.append(error)
+        if self.max_errors is not None and\
+                len(self.errors) >= self.max_errors:
+            raise _Full()
+
+def _scalar_collector(validate):
+    def collect(value, state):
+        try:
+            validate(value)
+        except ValidationError as e:
+            state.report(e)
+    return collect
+
+def _fields_collector(index, collectors, name):
+    required = index.required
+    required_count = index.required_count
+
+    def collect(value, state):
+        if not isinstance(value, types.DictType):
+            state.report(_type_error(value, "dict"))
+            return
+        path = state.path
+        matched = 0
+        for k,v in value.iteritems():
+            collect_field = collectors.get(k)
+            path.append(k)
+            if collect_field is None:
+                state.report(invalid_field_error(name, k))
+            else:
+                collect_field(v, state)
+                if k in required:
+                    matched += 1
+            path.pop()
+
+        if matched != required_count:
+            state.report(missing_fields_error(name, index.missing(value)))
+    return collect
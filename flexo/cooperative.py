@@ -0,0 +1,181 @@
+"""Validation which periodically gives control back to its caller, for use
+inside event loops where validating a large value in one go would hold up
+everything else. :func:`validation_steps` returns a generator which
+validates a value step by step and can be driven by any cooperative
+scheduler; :func:`offload` runs large validations on an executor instead.
+
+Both report exactly the errors (and error paths) of the type's own
+`validate`.
+"""
+from .errors import ValidationError
+from .typing import ListType, MapType, FormationType, FormationRef,\
+        _field_type, _overrides_validate, _type_error, _max_length_error
+from .utils import check_keys
+
+import time, types
+
+#: The default number of elements validated between steps.
+STEP = 1000
+
+def validation_steps(schema, value, step=STEP, interval=None):
+    """Returns a generator which validates a value, yielding None after every
+    `step` list elements, map entries and formation fields, or, if
+    `interval` is given, as soon as that many seconds have passed since the
+    previous yield. Exhausting the generator means the value is valid;
+    otherwise it raises the :class:`flexo.errors.ValidationError` that
+    `schema.validate` would raise. For example, in a Tornado coroutine::
+
+        for _ in validation_steps(schema, payload):
+            yield gen.moment
+
+    :type schema: flexo.typing.BaseType
+    :param schema: The type to validate against.
+
+    :param value: The value to validate.
+
+    :type step: int
+    :param step: The number of elements validated between yields.
+
+    :type interval: float
+    :param interval: An optional maximum time, in seconds, between yields.
+    """
+    for _ in _steps(schema, value, _Clock(step, interval)):
+        yield
+
+def validate_cooperatively(schema, value, step=STEP, interval=None,
+        pause=None):
+    """Validates a value with :func:`validation_steps`, calling `pause`
+    (such as a function sleeping a greenlet or yielding a thread) at each
+    step.
+
+    :param pause: A function called without arguments at each step.
+    """
+    for _ in validation_steps(schema, value, step, interval):
+        if pause is not None:
+            pause()
+
+def offload(executor, schema, value, threshold=STEP):
+    """Validates a value on a `concurrent.futures` executor if it is a list
+    or dictionary with at least `threshold` elements, and in the calling
+    thread otherwise. Either way a future is returned, whose result is None if
+    the value is valid and whose exception is the validation error if not
+    (or any other exception raised by validation).
+
+    :param executor: The `concurrent.futures` executor to submit to.
+
+    :type schema: flexo.typing.BaseType
+    :param schema: The type to validate against.
+
+    :param value: The value to validate.
+
+    :type threshold: int
+    :param threshold: The minimum number of elements for the validation to be
+                      offloaded.
+    """
+    if isinstance(value, (types.ListType, types.DictType)) and\
+            len(value) >= threshold:
+        return executor.submit(schema.validate, value)
+
+    from concurrent.futures import Future
+    future = Future()
+    try:
+        schema.validate(value)
+    except Exception as e:
+        future.set_exception(e)
+    else:
+        future.set_result(None)
+    return future
+
+class _Clock(object):
+    """Decides when a validation yields: after `step` ticks, or after
+    `interval` seconds."""
+    def __init__(self, step, interval):
+        self.step = step
+        self.interval = interval
+        self.count = 0
+        self.last = time.time()
+
+    def tick(self):
+        self.count += 1
+        if self.count >= self.step or (self.interval is not None and\
+                time.time() - self.last >= self.interval):
+            self.count = 0
+            self.last = time.time()
+            return True
+        return False
+
+def _steps(schema, value, clock):
+    if isinstance(schema, ListType) and\
+            not _overrides_validate(schema, ListType):
+        return _list_steps(schema, value, clock)
+    if isinstance(schema, MapType) and\
+            not _overrides_validate(schema, MapType):
+        return _map_steps(schema, value, clock)
+    if isinstance(schema, FormationType) and\
+            not _overrides_validate(schema, FormationType):
+        return _formation_steps(schema, value, clock)
+    if isinstance(schema, FormationRef) and\
+            not _overrides_validate(schema, FormationRef):
+        return _steps(schema.target, value, clock)
+    return _validate_step(schema.validate, value)
+
+def _validate_step(validate, value):
+    validate(value)
+    return iter(())
+
+def _list_steps(schema, value, clock):
+    if not isinstance(value, types.ListType):
+        raise _type_error(value, "list")
+    if schema.maxLength is not None and len(value) > schema.maxLength:
+        raise _max_length_error(value, schema.maxLength)
+    element_type = schema.elementType
+    i = 0
+    try:
+        for i, v in enumerate(value):
+            for _ in _steps(element_type, v, clock):
+                yield
+            if clock.tick():
+                yield
+    except ValidationError as e:
+        e.push_path(i)
+        raise
+
+def _map_steps(schema, value, clock):
+    if not isinstance(value, types.DictType):
+        raise _type_error(value, "dict")
+    if schema.maxLength is not None and len(value) > schema.maxLength:
+        raise _max_length_error(value, schema.maxLength)
+    key_type = schema.keyType
+    value_type = schema.valueType
+    k = None
+    try:
+        for k,v in value.iteritems():
+            key_type.validate(k)
+            for _ in _steps(value_type, v, clock):
+                yield
+            if clock.tick():
+                yield
+    except ValidationError as e:
+        e.push_path(k)
+        raise
+
+def _formation_steps(schema, value, clock):
+    if not isinstance(value, types.DictType):
+        raise _type_error(value, "dict")
+    index = schema.fields
+    check_keys(index, schema.name, value)
+    k = None
+    try:
+        for k,v in value.iteritems():
+            field = index[k]
+            field_type = _field_type(field)
+            if field_type is None:
+                field.validate(v)
+            else:
+                for _ in _steps(field_type, v, clock):
+                    yield
+            if clock.tick():
+                yield
+    except ValidationError as e:
+        e.push_path(k)
+        raise
@@ -0,0 +1,158 @@
+"""A JSON encoder driven by a schema. Values are encoded by the C encoder of
+the :mod:`json` module, with datetimes encoded as ISO-8601 strings. In
+validating mode each value is first checked by the compiled validator of the
+schema; in trusted mode only the keys of formations are checked, by walking
+the parts of the value which hold formations.
+
+``benchmarks/jsoncodec.py`` measures both modes on a list of 1000 orders
+(3000 items). Trusted encoding takes about 7.5ms, against 5ms for the json
+module alone, which does not check keys. Validating encoding takes 13 to
+15ms, about as long as the compiled validator followed by the json module.
+Before values were handed to the json module, when each value was written
+by a function specialized for its type, these took 11 and 15.5ms.
+"""
+from .errors import ValidationError
+from .typing import BaseType, ListType, MapType, FormationType,\
+        FormationRef, _SchemaBuilder, _field_type
+from .utils import _keys_error
+
+import datetime, json
+
+def _encode_default(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    raise TypeError("%r is not JSON serializable" % (value,))
+
+class SchemaEncoder(_SchemaBuilder):
+    """Encodes values of a given type as compact JSON. Datetimes are encoded
+    as ISO-8601 strings, which :class:`flexo.decoder.SchemaDecoder` decodes
+    back into datetimes.
+
+    :type schema: flexo.typing.BaseType
+    :param schema: The type of the values to encode, usually a
+                   :class:`flexo.typing.FormationType`.
+
+    :type validate: bool
+    :param validate: If True, each value is validated before it is encoded
+                     and a :class:`flexo.errors.ValidationError` is raised
+                     for invalid values. If False (trusted mode), values are
+                     assumed to be valid and only keys which are not fields
+                     are rejected; encoding an invalid value may then produce
+                     JSON which does not match the schema, or raise
+                     :class:`TypeError`.
+    """
+    def __init__(self, schema, validate=False):
+        if not isinstance(schema, BaseType):
+            raise TypeError("schema must be an instance of BaseType")
+
+        super(SchemaEncoder, self).__init__()
+        self.schema = schema
+        self.validate = validate
+        self._json = json.JSONEncoder(separators=(',', ':'),
+                default=_encode_default)
+        if validate:
+            self._check = schema.compile()
+        else:
+            self._check = self._build(schema)
+
+    def encode(self, value):
+        """Returns the JSON encoding of the given value.
+
+        :param value: The value to encode.
+        """
+        if self._check is not None:
+            self._check(value)
+        return self._json.encode(value)
+
+    def encode_into(self, value, buffer):
+        """Appends the JSON encoding of the given value to a list of string
+        parts, which can be reused to encode many values into one output.
+
+        :param value: The value to encode.
+
+        :type buffer: list
+        :param buffer: The list to append the parts to. Nothing is appended
+                       if the value cannot be encoded.
+        """
+        buffer.append(self.encode(value))
+
+    def dump(self, value, fp):
+        """Writes the JSON encoding of the given value to a file-like object.
+
+        :param value: The value to encode.
+        :param fp: The file-like object to write to.
+        """
+        fp.write(self.encode(value))
+
+    def _fallback(self, schema):
+        """Trusted mode builds, for each type holding formations, a function
+        rejecting the keys of those formations which are not fields. Other
+        types have no keys to check, so None is built for them."""
+        return None
+
+    def _list_checker(self, schema):
+        check_element = self._build(schema.elementType)
+        if check_element is None:
+            return None
+
+        def check(value):
+            i = 0
+            try:
+                for i, v in enumerate(value):
+                    check_element(v)
+            except ValidationError as e:
+                e.push_path(i)
+                raise
+        return check
+
+    def _map_checker(self, schema):
+        check_value = self._build(schema.valueType)
+        if check_value is None:
+            return None
+
+        def check(value):
+            k = None
+            try:
+                for k,v in value.iteritems():
+                    check_value(v)
+            except ValidationError as e:
+                e.push_path(k)
+                raise
+        return check
+
+    def _formation_checker(self, schema):
+        index = schema.fields
+        name = schema.name
+        names = frozenset(index.iterkeys())
+        checks = []
+        for field_name, field in index.iteritems():
+            field_type = _field_type(field)
+            if field_type is not None:
+                check_field = self._build(field_type)
+                if check_field is not None:
+                    checks.append((field_name, check_field))
+
+        def check(value):
+            if not names.issuperset(value):
+                raise _keys_error(index, name, value)
+            for k, check_field in checks:
+                v = value.get(k)
+                if v is not None:
+                    try:
+                        check_field(v)
+                    except ValidationError as e:
+                        e.push_path(k)
+                        raise
+        return check
+
+    def _ref_checker(self, schema):
+        def check(value):
+            self._resolve(schema)(value)
+        return check
+
+    _builders = [
+        (FormationType, _formation_checker),
+        (FormationRef, _ref_checker),
+        (ListType, _list_checker),
+        (MapType, _map_checker)
+    ]
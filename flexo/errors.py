@@ -1,8 +1,163 @@
+from repr import Repr
+
+import re
+
 class DefinitionError(Exception):
     pass
 
+_MISSING = object()
+
+_IDENTIFIER_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+class _PreviewRepr(Repr):
+    # Repr truncates strings before rendering them but has no method for
+    # unicode, which it would render whole; its method for strings only
+    # slices them, so it serves for both.
+    repr_unicode = Repr.repr_str
+
+_preview_repr = _PreviewRepr()
+_preview_repr.maxstring = 60
+_preview_repr.maxother = 60
+
 class ValidationError(Exception):
-    pass
+    """Raised when a value is not valid. The message is only rendered when the
+    error is converted to a string, so that raising is cheap even when the
+    offending value is large, and the offending value is only ever rendered
+    as a truncated preview.
+
+    :type message: string
+    :param message: The message. If `value` or `details` are given, it is a
+                    format string which may refer to `%(value)s` (a preview
+                    of the offending value), `%(type)s` (the offending
+                    value's type), `%(expected)s` and any of the `details`.
+
+    :param value: The offending value.
+
+    :type expected: string
+    :param expected: A description of the expected type, if any.
+
+    :type constraint: string
+    :param constraint: The kind of constraint which failed, e.g. `"type"`,
+                       `"minLength"`, `"maxValue"`, `"field"` or
+                       `"required"`.
+    """
+    #: The maximum length of the preview of the offending value.
+    preview_length = 80
+
+    def __init__(self, message, value=_MISSING, expected=None,
+            constraint=None, **details):
+        super(ValidationError, self).__init__(message)
+        self.template = message
+        self.value = None if value is _MISSING else value
+        self.expected = expected
+        self.constraint = constraint
+        self.details = details
+        self._has_value = value is not _MISSING
+        self._reversed_path = []
+
+    def push_path(self, segment):
+        """Records that the value this error is about is found at `segment`
+        (a list index, or a field or map key) of its parent. Validators of
+        containers call this as the error propagates, so the innermost
+        segment is pushed first.
+        """
+        self._reversed_path.append(segment)
+
+    @property
+    def path(self):
+        """The list of segments leading from the validated value to the
+        offending value."""
+        return self._reversed_path[::-1]
+
+    @property
+    def path_string(self):
+        """The path rendered like `items[42].price`, or an empty string if the
+        offending value is the validated value itself."""
+        parts = []
+        for segment in reversed(self._reversed_path):
+            if isinstance(segment, (int, long)):
+                parts.append("[%s]" % segment)
+            elif isinstance(segment, basestring) and\
+                    _IDENTIFIER_RE.match(segment):
+                parts.append(".%s" % segment if parts else segment)
+            else:
+                parts.append("[%s]" % _preview_repr.repr(segment))
+        return "".join(parts)
+
+    @property
+    def message(self):
+        """The message, without the path."""
+        if not self._has_value and not self.details:
+            return self.template
+        arguments = dict(self.details)
+        arguments["value"] = self.preview()
+        arguments["type"] = type(self.value)
+        arguments["expected"] = self.expected
+        return self.template % arguments
+
+    def preview(self):
+        """Returns a truncated rendering of the offending value."""
+        preview = _preview_repr.repr(self.value)
+        if len(preview) > self.preview_length:
+            preview = preview[:self.preview_length - 3] + "..."
+        return preview
+
+    def __str__(self):
+        path = self.path_string
+        if path:
+            return "%s: %s" % (path, self.message)
+        return self.message
+
+    def __repr__(self):
+        # `args` holds the template, which is not rendered until needed.
+        return "%s(%r)" % (self.__class__.__name__, str(self))
+
+class BatchValidationError(ValidationError):
+    """Raised when one or more records of a batch are invalid.
+
+    :type failures: list
+    :param failures: A list of `(row, error)` tuples, ordered by row, where
+                     `error` is the :class:`ValidationError` for the record at
+                     index `row`.
+    """
+    def __init__(self, failures):
+        super(BatchValidationError, self).__init__(failures,
+                constraint="batch")
+        self.failures = failures
+
+    @property
+    def rows(self):
+        """The sorted indices of the invalid records."""
+        return sorted(set(row for row, _ in self.failures))
+
+    @property
+    def message(self):
+        row, error = self.failures[0]
+        return "%s invalid records, first at row %s: %s" %\
+                (len(self.rows), row, error)
+
+class MultipleValidationError(ValidationError):
+    """Raised when a value has been validated collecting all its errors (see
+    :func:`flexo.collect.validate_all`) and has at least one.
+
+    :type errors: list
+    :param errors: The :class:`ValidationError`\s, in the order they were
+                   found.
+
+    :type truncated: bool
+    :param truncated: True if validation stopped after the maximum number of
+                      errors, so that there may be more.
+    """
+    def __init__(self, errors, truncated=False):
+        super(MultipleValidationError, self).__init__(errors,
+                constraint="multiple")
+        self.errors = errors
+        self.truncated = truncated
+
+    @property
+    def message(self):
+        return "%s%s errors, first: %s" % ("at least " if self.truncated\
+                else "", len(self.errors), self.errors[0])
 
 class UnexpectedError(Exception):
     pass
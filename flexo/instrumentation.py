@@ -0,0 +1,121 @@
+"""Instrumentation of the validation of formations. Hooks registered with
+:func:`add_hook` are called after every validation of a formation by
+:meth:`flexo.typing.FormationType.validate`,
+:func:`flexo.utils.validate_fields` or a compiled formation validator, with::
+
+    hook(name, seconds, elements, error)
+
+where `name` is the name of the formation, `seconds` the time the validation
+took (including nested formations), `elements` the number of keys of the
+validated dictionary and `error` the :class:`flexo.errors.ValidationError`
+raised, or None. An error raised in a nested formation is seen by the hooks
+of each enclosing formation as well.
+
+When no hook is registered, validation only checks that the list of hooks is
+empty. :class:`Collector` is a hook aggregating metrics in process.
+"""
+from .utils import _hooks
+
+import bisect, threading
+
+#: The default upper bounds, in seconds, of the latency histogram buckets.
+BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1,
+        0.5, 1.0)
+
+def add_hook(hook):
+    """Registers a hook to call after each validation of a formation.
+
+    :param hook: A function taking the formation name, the time taken in
+                 seconds, the number of elements and the error (or None).
+    """
+    if hook not in _hooks:
+        _hooks.append(hook)
+
+def remove_hook(hook):
+    """Unregisters a hook registered with :func:`add_hook`."""
+    if hook in _hooks:
+        _hooks.remove(hook)
+
+class Collector(object):
+    """A hook counting, per formation name, validations, failures by
+    constraint, elements and latency (in total and as a histogram). Use
+    :meth:`install` to register it and :meth:`snapshot` to read the metrics.
+    Collectors are thread-safe.
+
+    :type buckets: tuple
+    :param buckets: The increasing upper bounds, in seconds, of the latency
+                    histogram buckets. A final bucket counts slower
+                    validations.
+    """
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, name, seconds, elements, error):
+        with self._lock:
+            metrics = self._metrics.get(name)
+            if metrics is None:
+                metrics = self._metrics[name] = {
+                    'calls': 0,
+                    'failures': 0,
+                    'seconds': 0.0,
+                    'elements': 0,
+                    'histogram': [0] * (len(self.buckets) + 1),
+                    'constraints': {}
+                }
+            metrics['calls'] += 1
+            metrics['seconds'] += seconds
+            metrics['elements'] += elements
+            metrics['histogram'][bisect.bisect_left(self.buckets,
+                seconds)] += 1
+            if error is not None:
+                metrics['failures'] += 1
+                constraints = metrics['constraints']
+                constraints[error.constraint] =\
+                        constraints.get(error.constraint, 0) + 1
+
+    def install(self):
+        """Registers the collector as a hook."""
+        add_hook(self)
+        return self
+
+    def uninstall(self):
+        """Unregisters the collector."""
+        remove_hook(self)
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, *args):
+        self.uninstall()
+
+    def snapshot(self):
+        """Returns a copy of the metrics as a dictionary of formation name to
+        a dictionary with:
+
+        * `calls` - the number of validations
+        * `failures` - the number of failed validations
+        * `constraints` - a dictionary of constraint (such as `"required"` or
+          `"maxLength"`) to the number of failures it caused
+        * `seconds` - the total time spent validating
+        * `elements` - the total number of keys validated
+        * `histogram` - a list of (upper bound, count) pairs, where the last
+          upper bound is None, as non-cumulative counts of validations by
+          latency
+        """
+        bounds = self.buckets + (None,)
+        with self._lock:
+            return dict((name, {
+                'calls': metrics['calls'],
+                'failures': metrics['failures'],
+                'constraints': dict(metrics['constraints']),
+                'seconds': metrics['seconds'],
+                'elements': metrics['elements'],
+                'histogram': zip(bounds, metrics['histogram'])
+            }) for name, metrics in self._metrics.iteritems())
+
+    def reset(self):
+        """Discards all metrics."""
+        with self._lock:
+            self._metrics.clear()
@@ -0,0 +1,221 @@
+"""Validation of large :class:`flexo.typing.ListType` and
+:class:`flexo.typing.MapType` values across a pool of processes.
+
+The schema is pickled once in the parent. Workers of the validator's own
+:mod:`multiprocessing` pool receive it once, when they start; when an
+existing `concurrent.futures` executor is used instead, the pickled schema
+accompanies each chunk and workers unpickle and compile it only the first
+time they see it.
+"""
+from .errors import DefinitionError, ValidationError
+from .typing import ListType, MapType
+
+import collections, hashlib, multiprocessing, pickle, types
+
+#: Values with fewer elements than this are validated in the calling process.
+THRESHOLD = 10000
+
+class ParallelValidator(object):
+    """Validates values of a :class:`ListType` or :class:`MapType` by
+    splitting their elements into chunks which are validated in parallel.
+    Values with fewer elements than `threshold` are validated sequentially,
+    so that small values do not pay for inter-process communication.
+
+    Errors are reported deterministically: the error returned by
+    :meth:`validate` is always the one for the first invalid element, and
+    :meth:`errors` returns errors in element order.
+
+    :type schema: ListType or MapType
+    :param schema: The type to validate against. It must be picklable.
+
+    :type processes: int
+    :param processes: The number of worker processes of the validator's own
+                      pool. Defaults to the number of CPUs.
+
+    :type threshold: int
+    :param threshold: The minimum number of elements for which validation is
+                      parallelized.
+
+    :type chunk_size: int
+    :param chunk_size: The number of elements per chunk. Defaults to
+                       splitting each value into four chunks per process.
+
+    :param executor: An optional `concurrent.futures` executor to submit
+                     chunks to instead of the validator's own pool.
+    """
+    def __init__(self, schema, processes=None, threshold=THRESHOLD,
+            chunk_size=None, executor=None):
+        if not isinstance(schema, (ListType, MapType)):
+            raise DefinitionError("schema must be an instance of ListType "\
+                    "or MapType")
+
+        self.schema = schema
+        self.processes = processes or multiprocessing.cpu_count()
+        self.threshold = threshold
+        self.chunk_size = chunk_size
+        self.executor = executor
+
+        #: The number of chunks submitted ahead of the one being awaited.
+        self.in_flight = self.processes * 2
+
+        self._validate = schema.compile()
+        self._validate_chunk = _chunk_validator(schema)
+        self._payload = pickle.dumps(schema, pickle.HIGHEST_PROTOCOL)
+        self._key = hashlib.sha1(self._payload).hexdigest()
+        self._pool = None
+
+    def validate(self, value):
+        """Validates the given value, raising the error for its first invalid
+        element.
+
+        :param value: The list or dictionary to validate.
+        """
+        if not self._check_container(value) or len(value) < self.threshold:
+            self._validate(value)
+            return
+
+        for errors in self._map(value, False):
+            if errors:
+                raise errors[0]
+
+    def errors(self, value):
+        """Validates every element of the given value, returning the
+        :class:`ValidationError` of each invalid element in element order.
+
+        :param value: The list or dictionary to validate.
+        """
+        if not self._check_container(value):
+            try:
+                self._validate(value)
+            except ValidationError as e:
+                return [e]
+            return []
+
+        if len(value) < self.threshold:
+            return self._validate_chunk(self._elements(value), 0, True)
+        return [error for errors in self._map(value, True)\
+                for error in errors]
+
+    def close(self):
+        """Shuts down the validator's own pool, if it was started."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _check_container(self, value):
+        """Returns True if `value` passes the checks of the schema on the
+        container itself, so that only its elements remain to be checked."""
+        container_type = types.ListType if isinstance(self.schema, ListType)\
+                else types.DictType
+        maxLength = self.schema.maxLength
+        return isinstance(value, container_type) and\
+                (maxLength is None or len(value) <= maxLength)
+
+    def _elements(self, value):
+        if isinstance(value, types.DictType):
+            return value.items()
+        return value
+
+    def _map(self, value, collect):
+        """Yields the errors of each chunk of the value, in order. Only
+        :attr:`in_flight` chunks are submitted ahead of the chunk whose errors
+        are awaited, so that once the caller stops reading (at the first
+        error, in :meth:`validate`) the remaining chunks are not validated."""
+        elements = self._elements(value)
+        chunk_size = self.chunk_size or\
+                max(1, -(-len(elements) // (self.processes * 4)))
+
+        if self.executor is not None:
+            def submit(offset):
+                return self.executor.submit(_validate_chunk, self._key,
+                        self._payload, elements[offset:offset + chunk_size],
+                        offset, collect)
+            result = lambda future: future.result()
+        else:
+            if self._pool is None:
+                self._pool = multiprocessing.Pool(self.processes, _install,
+                        (self._key, self._payload))
+
+            def submit(offset):
+                return self._pool.apply_async(_validate_installed_chunk,
+                        ((self._key, elements[offset:offset + chunk_size],
+                            offset, collect),))
+            result = lambda async_result: async_result.get()
+
+        pending = collections.deque()
+        try:
+            for offset in xrange(0, len(elements), chunk_size):
+                pending.append(submit(offset))
+                if len(pending) > self.in_flight:
+                    yield result(pending.popleft())
+            while pending:
+                yield result(pending.popleft())
+        finally:
+            if self.executor is not None:
+                for future in pending:
+                    future.cancel()
+
+#: Chunk validators of worker processes, keyed by the digest of the pickled
+#: schema.
+_worker_validators = {}
+
+def _install(key, payload):
+    _worker_validator(key, payload)
+
+def _worker_validator(key, payload):
+    validator = _worker_validators.get(key)
+    if validator is None:
+        validator = _chunk_validator(pickle.loads(payload))
+        _worker_validators[key] = validator
+    return validator
+
+def _validate_chunk(key, payload, chunk, offset, collect):
+    return _worker_validator(key, payload)(chunk, offset, collect)
+
+def _validate_installed_chunk(task):
+    key, chunk, offset, collect = task
+    return _worker_validators[key](chunk, offset, collect)
+
+def _chunk_validator(schema):
+    """Returns a function validating a chunk of the elements of a value of
+    `schema`, given its offset within the value, which returns the errors of
+    the chunk's invalid elements (only the first unless `collect` is True)."""
+    if isinstance(schema, ListType):
+        validate_element = schema.elementType.compile()
+
+        def validate(chunk, offset, collect):
+            errors = []
+            for i, v in enumerate(chunk):
+                try:
+                    validate_element(v)
+                except ValidationError as e:
+                    e.push_path(offset + i)
+                    errors.append(e)
+                    if not collect:
+                        break
+            return errors
+        return validate
+
+    validate_key = schema.keyType.compile()
+    validate_value = schema.valueType.compile()
+
+    def validate(chunk, offset, collect):
+        errors = []
+        for k,v in chunk:
+            try:
+                validate_key(k)
+                validate_value(v)
+            except ValidationError as e:
+                e.push_path(k)
+                errors.append(e)
+                if not collect:
+                    break
+        return errors
+    return validate
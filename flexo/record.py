@@ -0,0 +1,152 @@
+"""Record classes generated from a :class:`flexo.typing.FormationType`, to
+hold validated values with one slot per field rather than as dictionaries.
+Values of nested formations become instances of the nested formation's
+record class (also inside lists and as map values); lists and maps themselves
+stay lists and dictionaries.
+"""
+from .errors import DefinitionError
+from .typing import FormationType, FormationRef, ListType, MapType,\
+        _field_type, _overrides_validate
+
+import re
+
+_IDENTIFIER_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_]*$')
+
+class Record(object):
+    """Base class of generated record classes. Fields which are absent from a
+    record are None.
+
+    Records are built with keyword arguments or with :meth:`from_dict`, both
+    of which validate the values against the record's formation first.
+    """
+    __slots__ = ()
+
+    #: The :class:`flexo.typing.FormationType` the class was generated from.
+    formation = None
+
+    _fields = ()
+    _validate = None
+
+    def __init__(self, **values):
+        self._validate(values)
+        self._assign(values)
+
+    @classmethod
+    def from_dict(cls, value):
+        """Validates a dictionary against the formation and returns it as a
+        record.
+
+        :type value: dict
+        :param value: The dictionary to convert.
+
+        :raises ValidationError: if the dictionary is not valid.
+        """
+        cls._validate(value)
+        record = cls.__new__(cls)
+        record._assign(value)
+        return record
+
+    def _assign(self, value):
+        get = value.get
+        for name, from_value, to_value in self._fields:
+            v = get(name)
+            if from_value is not None and v is not None:
+                v = from_value(v)
+            setattr(self, name, v)
+
+    def to_dict(self):
+        """Returns the record as a dictionary of the fields which are present,
+        with nested records converted to dictionaries as well."""
+        result = {}
+        for name, from_value, to_value in self._fields:
+            v = getattr(self, name)
+            if v is not None:
+                result[name] = v if to_value is None else to_value(v)
+        return result
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name)\
+                for name, from_value, to_value in self._fields)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "%s(%s)" % (self.__class__.__name__,
+                ", ".join("%s=%r" % (name, getattr(self, name))\
+                for name, from_value, to_value in self._fields\
+                if getattr(self, name) is not None))
+
+def record_class(formation):
+    """Generates the record class of a formation. Use
+    :meth:`flexo.typing.FormationType.record_class`, which caches the class.
+
+    :type formation: flexo.typing.FormationType
+    :param formation: The formation to generate a class for.
+
+    :raises DefinitionError: if a field name is not a valid Python identifier
+                             or is reserved by :class:`Record`.
+    """
+    names = formation.fields.names
+    for name in names:
+        if not _IDENTIFIER_RE.match(name) or hasattr(Record, name):
+            raise DefinitionError("field %s cannot be a record attribute" %\
+                    name)
+
+    fields = []
+    for name in names:
+        from_value, to_value = _converters(
+                _field_type(formation.fields[name]))
+        fields.append((str(name), from_value, to_value))
+
+    class_name = str(formation.name) if _IDENTIFIER_RE.match(formation.name)\
+            else 'Record'
+    return type(class_name, (Record,), {
+        '__slots__': tuple(name for name, f, t in fields),
+        'formation': formation,
+        '_fields': tuple(fields),
+        '_validate': staticmethod(formation.compile())
+    })
+
+def _converters(schema):
+    """Returns a pair of functions converting a valid value of `schema` to its
+    record representation and back, each None if no conversion is needed."""
+    if isinstance(schema, FormationType) and\
+            not _overrides_validate(schema, FormationType):
+        cls = schema.record_class()
+
+        def from_value(value):
+            record = cls.__new__(cls)
+            record._assign(value)
+            return record
+        return from_value, cls.to_dict
+    if isinstance(schema, FormationRef) and\
+            not _overrides_validate(schema, FormationRef):
+        # The referenced formation's class is looked up on first conversion,
+        # as generating it may require this class.
+        def from_value(value):
+            cls = schema.target.record_class()
+            record = cls.__new__(cls)
+            record._assign(value)
+            return record
+        return from_value, lambda value: value.to_dict()
+    if isinstance(schema, ListType):
+        from_element, to_element = _converters(schema.elementType)
+        if from_element is None:
+            return None, None
+        return (lambda value: [from_element(v) for v in value],
+                lambda value: [to_element(v) for v in value])
+    if isinstance(schema, MapType):
+        from_element, to_element = _converters(schema.valueType)
+        if from_element is None:
+            return None, None
+        return (lambda value: dict((k, from_element(v))\
+                    for k,v in value.iteritems()),
+                lambda value: dict((k, to_element(v))\
+                    for k,v in value.iteritems()))
+    return None, None
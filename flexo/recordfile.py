@@ -0,0 +1,268 @@
+"""Files of records which all conform to one
+:class:`flexo.typing.FormationType`, read through `mmap` without loading them
+into memory.
+
+A record file consists of a header (magic, format version and a fingerprint
+of the schema), the records in the format of :mod:`flexo.binary`, an index of
+the offset of every record, and a footer holding the offset of the index and
+the number of records. Records are therefore found in constant time, and
+fields of a record are only decoded when they are accessed.
+"""
+from .binary import BinaryCodec, FormationLayout, checked_read
+from .errors import BatchValidationError, ValidationError
+from .typing import BaseType, EnumType, FormationType, FormationRef,\
+        _field_type
+
+import hashlib, mmap, struct
+
+MAGIC = 'FLXR'
+
+VERSION = 1
+
+_HEADER = struct.Struct('<4sB20s')
+_FOOTER = struct.Struct('<QQ4s')
+_OFFSET = struct.Struct('<Q')
+
+def schema_fingerprint(schema):
+    """Returns a SHA-1 digest of the binary layout of a type: its class, the
+    types it contains and, for formations, the name, requiredness and type
+    of each field in declaration order. Constraints such as bounds do not
+    change the layout and are not part of the fingerprint, so a record file
+    can be read with a stricter or looser schema than it was written with,
+    but not with one encoding records differently."""
+    return hashlib.sha1(_describe(schema)).digest()
+
+def _describe(schema):
+    if isinstance(schema, FormationRef):
+        return "ref(%r)" % schema.name
+    if isinstance(schema, FormationType):
+        fields = []
+        for name in schema.fields.names:
+            field = schema.fields[name]
+            field_type = _field_type(field)
+            fields.append("%r:%r:%s" % (name, bool(field.required),
+                "?" if field_type is None else _describe(field_type)))
+        return "formation(%r,[%s])" % (schema.name, ",".join(fields))
+    if isinstance(schema, EnumType):
+        # Members are encoded as strings or as longs depending on their kind.
+        return "EnumType(%s)" % schema.kind
+    attributes = []
+    for name in schema._attrs:
+        value = getattr(schema, name)
+        if isinstance(value, BaseType):
+            attributes.append("%s=%s" % (name, _describe(value)))
+    return "%s(%s)" % (type(schema).__name__, ",".join(attributes))
+
+class RecordWriter(object):
+    """Writes records to a record file. Records are validated before they
+    are written, and the index is written by :meth:`close`.
+
+    :type formation: flexo.typing.FormationType
+    :param formation: The schema of the records.
+
+    :param fp: A file object opened for writing in binary mode.
+    """
+    def __init__(self, formation, fp):
+        if not isinstance(formation, FormationType):
+            raise TypeError("formation must be an instance of FormationType")
+
+        self.formation = formation
+        self._fp = fp
+        self._codec = BinaryCodec(formation)
+        self._offsets = []
+        self._position = _HEADER.size
+        fp.write(_HEADER.pack(MAGIC, VERSION, schema_fingerprint(formation)))
+
+    def write(self, record):
+        """Validates a record and appends it to the file.
+
+        :type record: dict
+        :param record: The record to write.
+        """
+        encoded = self._codec.encode(record)
+        self._fp.write(encoded)
+        self._offsets.append(self._position)
+        self._position += len(encoded)
+
+    def close(self):
+        """Writes the index and footer. The file object is not closed."""
+        if self._offsets is None:
+            return
+        index_offset = self._position
+        self._fp.write(''.join(_OFFSET.pack(o) for o in self._offsets))
+        self._fp.write(_FOOTER.pack(index_offset, len(self._offsets), MAGIC))
+        self._fp.flush()
+        self._offsets = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+class RecordFile(object):
+    """A read-only, memory-mapped record file.
+
+    :type formation: flexo.typing.FormationType
+    :param formation: The schema of the records, which must have the same
+                      structure as the schema the file was written with.
+
+    :param fp: A file object opened for reading in binary mode.
+
+    :raises ValueError: if the file is not a record file of this schema.
+    """
+    def __init__(self, formation, fp):
+        self.formation = formation
+        self._buf = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._open()
+        except:
+            self._buf.close()
+            raise
+
+        codec = BinaryCodec(formation)
+        self._layout = FormationLayout(codec, formation)
+        self._readers = dict((name, read)\
+                for name, required, read, skip in self._layout.fields)
+        self._codec = codec
+
+    def _open(self):
+        buf = self._buf
+        if len(buf) < _HEADER.size + _FOOTER.size:
+            raise ValueError("not a record file")
+        magic, version, fingerprint = _HEADER.unpack_from(buf, 0)
+        index_offset, count, footer_magic = _FOOTER.unpack_from(buf,
+                len(buf) - _FOOTER.size)
+        if magic != MAGIC or footer_magic != MAGIC:
+            raise ValueError("not a record file")
+        if version != VERSION:
+            raise ValueError("unsupported record file version %s" % version)
+        if fingerprint != schema_fingerprint(self.formation):
+            raise ValueError("record file was written with a different "\
+                    "schema than %s" % self.formation.name)
+        if index_offset + count * _OFFSET.size + _FOOTER.size != len(buf):
+            raise ValueError("corrupt record file index")
+        self._index_offset = index_offset
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def offset(self, i):
+        """Returns the position of the `i`-th record in the file."""
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("record index out of range")
+        return _OFFSET.unpack_from(self._buf,
+                self._index_offset + i * _OFFSET.size)[0]
+
+    def __getitem__(self, i):
+        """Returns a :class:`RecordView` of the `i`-th record."""
+        return RecordView(self, self.offset(i))
+
+    def __iter__(self):
+        for i in xrange(self._count):
+            yield self[i]
+
+    def read(self, i):
+        """Decodes and validates the `i`-th record, returning a dictionary."""
+        return self._codec.decode(self._buf, self.offset(i))
+
+    def validate_column(self, name):
+        """Validates one field of every record, decoding only that field.
+
+        :type name: string
+        :param name: The name of the field.
+
+        :raises BatchValidationError: if the field is invalid in any record.
+        :raises ValueError: if a record is truncated or malformed.
+        """
+        self._validate_fields([name])
+
+    def validate(self):
+        """Validates every field of every record.
+
+        :raises BatchValidationError: if any record is invalid.
+        :raises ValueError: if a record is truncated or malformed.
+        """
+        self._validate_fields(self.formation.fields.names)
+
+    def _validate_fields(self, names):
+        # The positions of the fields of a record are found once for all the
+        # fields validated.
+        readers = [(name, self._readers[name]) for name in names]
+        buf = self._buf
+        offsets = self._layout.offsets
+        failures = []
+        for row in xrange(self._count):
+            positions = checked_read(offsets, buf, self.offset(row))[0]
+            for name, read in readers:
+                position = positions.get(name)
+                if position is None:
+                    continue
+                try:
+                    checked_read(read, buf, position)
+                except ValidationError as e:
+                    e.push_path(name)
+                    failures.append((row, e))
+        if failures:
+            raise BatchValidationError(failures)
+
+    def close(self):
+        self._buf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+class RecordView(object):
+    """A lazy view of a record of a :class:`RecordFile`. The positions of the
+    record's fields are found on first access by skipping over their
+    encodings, and each field is only decoded (and validated) when it is
+    accessed.
+    """
+    __slots__ = ('_file', '_pos', '_positions')
+
+    def __init__(self, record_file, pos):
+        self._file = record_file
+        self._pos = pos
+        self._positions = None
+
+    def _fields(self):
+        if self._positions is None:
+            self._positions = checked_read(self._file._layout.offsets,
+                    self._file._buf, self._pos)[0]
+        return self._positions
+
+    def __getitem__(self, name):
+        position = self._fields()[name]
+        return checked_read(self._file._readers[name], self._file._buf,
+                position)[0]
+
+    def get(self, name, default=None):
+        if name not in self._fields():
+            return default
+        return self[name]
+
+    def __contains__(self, name):
+        return name in self._fields()
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self._fields())
+
+    def keys(self):
+        """Returns the names of the fields present in the record, in
+        declaration order."""
+        fields = self._fields()
+        return [name for name in self._file.formation.fields.names\
+                if name in fields]
+
+    def to_dict(self):
+        """Decodes the whole record into a dictionary."""
+        return self._file._codec.decode(self._file._buf, self._pos)
@@ -0,0 +1,208 @@
+"""A registry of formations defined by name, for applications with many
+formations. Each formation is registered with a factory which is only called
+when the formation is first used, so that defining formations costs nothing
+at import time, and formations refer to each other by name with
+:meth:`SchemaRegistry.ref`, which makes recursive formations possible::
+
+    registry = SchemaRegistry()
+
+    @registry.formation("node")
+    def node():
+        return FormationType("node", "A tree node", [
+            Field("value", LongType()),
+            Field("children", ListType(registry.ref("node")), required=False)
+        ])
+
+    registry.validate("node", {"value": 1L, "children": [{"value": 2L}]})
+
+Built formations can be saved to a cache file with :meth:`SchemaRegistry.save`
+and loaded at startup with :meth:`SchemaRegistry.load` instead of calling
+their factories.
+
+Registries, and therefore types containing references, can also be pickled,
+for instance to validate in other processes with
+:class:`flexo.parallel.ParallelValidator`. A pickled registry holds its
+built formations but not their factories.
+"""
+from .errors import DefinitionError
+from .typing import FormationType, FormationRef
+
+import cPickle, threading
+
+class SchemaRegistry(object):
+    """A registry of formations by name. Formations are built, and their
+    validators compiled, on first use. Registries are thread-safe.
+    """
+    def __init__(self):
+        self._factories = {}
+        self._formations = {}
+        self._validators = {}
+        self._building = set()
+        self._lock = threading.RLock()
+
+    def register(self, name, factory):
+        """Registers the factory of a formation.
+
+        :type name: string
+        :param name: The name under which the formation is used.
+
+        :param factory: A function taking no arguments and returning the
+                        :class:`flexo.typing.FormationType`.
+
+        :raises DefinitionError: if a formation is already registered under
+                                 `name`.
+        """
+        with self._lock:
+            if name in self._factories:
+                raise DefinitionError("formation %s is already registered" %\
+                        name)
+            self._factories[name] = factory
+
+    def formation(self, name):
+        """Returns a decorator registering the decorated function as the
+        factory of a formation. See :meth:`register`."""
+        def decorator(factory):
+            self.register(name, factory)
+            return factory
+        return decorator
+
+    def ref(self, name):
+        """Returns a :class:`flexo.typing.FormationRef` to a formation of this
+        registry, for use as a type (for instance as the type of a field or
+        the element type of a list) before the formation is built. The
+        formation does not need to be registered yet.
+
+        :type name: string
+        :param name: The name of the formation.
+        """
+        return FormationRef(self, name)
+
+    def get(self, name):
+        """Returns a formation, building it if it has not been built.
+
+        :type name: string
+        :param name: The name of the formation.
+
+        :raises KeyError: if no formation is registered under `name`.
+        :raises DefinitionError: if the factory does not return a
+                                 :class:`flexo.typing.FormationType`, or if
+                                 building the formation requires building
+                                 itself (use :meth:`ref` instead).
+        """
+        formation = self._formations.get(name)
+        if formation is not None:
+            return formation
+
+        with self._lock:
+            formation = self._formations.get(name)
+            if formation is not None:
+                return formation
+            factory = self._factories[name]
+            if name in self._building:
+                raise DefinitionError("formation %s requires itself to be "\
+                        "built; refer to it with ref()" % name)
+            self._building.add(name)
+            try:
+                formation = factory()
+            finally:
+                self._building.discard(name)
+            if not isinstance(formation, FormationType):
+                raise DefinitionError("factory of %s must return a "\
+                        "FormationType" % name)
+            self._formations[name] = formation
+            return formation
+
+    def validator(self, name):
+        """Returns the compiled validator of a formation (see
+        :meth:`flexo.typing.BaseType.compile`), compiling it on first use.
+
+        :type name: string
+        :param name: The name of the formation.
+        """
+        validate = self._validators.get(name)
+        if validate is None:
+            validate = self.get(name).compile()
+            with self._lock:
+                validate = self._validators.setdefault(name, validate)
+        return validate
+
+    def validate(self, name, value):
+        """Validates a value against a formation with its compiled validator.
+
+        :type name: string
+        :param name: The name of the formation.
+
+        :param value: The dictionary to validate.
+        """
+        self.validator(name)(value)
+
+    def names(self):
+        """Returns the sorted names of the registered and loaded
+        formations."""
+        with self._lock:
+            return sorted(set(self._factories) | set(self._formations))
+
+    def __contains__(self, name):
+        return name in self._factories or name in self._formations
+
+    def build_all(self, compile=False):
+        """Builds every registered formation, for instance before saving them,
+        optionally compiling their validators as well."""
+        for name in self.names():
+            if compile:
+                self.validator(name)
+            else:
+                self.get(name)
+
+    def save(self, fp):
+        """Pickles the formations built so far to a file, with the references
+        they contain. Compiled validators cannot be pickled; they are compiled
+        again on first use after :meth:`load`.
+
+        :param fp: A file open for writing in binary mode.
+        """
+        with self._lock:
+            formations = dict(self._formations)
+        pickler = cPickle.Pickler(fp, cPickle.HIGHEST_PROTOCOL)
+        pickler.persistent_id = self._persistent_id
+        pickler.dump(formations)
+
+    def load(self, fp):
+        """Loads formations saved with :meth:`save`, so that their factories
+        are not called. References in the loaded formations refer to this
+        registry. Formations which have already been built are kept.
+
+        :param fp: A file open for reading in binary mode.
+        """
+        unpickler = cPickle.Unpickler(fp)
+        unpickler.persistent_load = self._persistent_load
+        formations = unpickler.load()
+        with self._lock:
+            for name, formation in formations.iteritems():
+                self._formations.setdefault(name, formation)
+
+    def __getstate__(self):
+        # Factories and compiled validators may not be picklable, and locks
+        # cannot be, so a pickled registry holds only its formations, all of
+        # which are built first so that the references they contain can be
+        # resolved once unpickled.
+        self.build_all()
+        with self._lock:
+            return {'_formations': dict(self._formations)}
+
+    def __setstate__(self, state):
+        self.__init__()
+        self._formations.update(state['_formations'])
+
+    def _persistent_id(self, obj):
+        # References are saved without the registry, which is rebound on
+        # load.
+        if obj is self:
+            return "registry"
+        return None
+
+    def _persistent_load(self, persistent_id):
+        if persistent_id != "registry":
+            raise cPickle.UnpicklingError("unknown persistent id %s" %\
+                    persistent_id)
+        return self
@@ -0,0 +1,159 @@
+"""Validation of a sample of the elements of large lists and maps, for
+values from trusted sources where validating every element costs more than
+it is worth but drift from the schema should still be noticed.
+"""
+from .errors import ValidationError
+from .typing import BaseType, ListType, MapType, FormationType, FormationRef,\
+        _SchemaBuilder, _field_type
+from .utils import fields_validator
+
+import math, random, types
+
+class SamplingValidator(_SchemaBuilder):
+    """Validates values of a type, checking only some of the elements of each
+    list and map in them: the first `head` elements, plus either a `fraction`
+    of the remaining elements or `sample` of them, chosen at random. The
+    container itself (its type and `maxLength`) is always checked, as are
+    formations and scalars outside of skipped elements.
+
+    Sampled elements are chosen with a generator seeded with `seed`, so that
+    the same sequence of values is sampled identically.
+
+    :type schema: flexo.typing.BaseType
+    :param schema: The type to validate against.
+
+    :type fraction: float
+    :param fraction: The fraction (between 0 and 1) of the elements after the
+                     first `head` to validate. Fractions of elements are
+                     rounded up.
+
+    :type head: int
+    :param head: The number of leading elements always validated.
+
+    :type sample: int
+    :param sample: The number of elements after the first `head` to validate,
+                   if `fraction` is not given.
+
+    :param seed: The seed of the random generator choosing elements.
+    """
+    def __init__(self, schema, fraction=None, head=0, sample=None, seed=None):
+        if not isinstance(schema, BaseType):
+            raise TypeError("schema must be an instance of BaseType")
+        if (fraction is None) == (sample is None):
+            raise ValueError("exactly one of fraction and sample must be "\
+                    "given")
+        if fraction is not None and not 0.0 <= fraction <= 1.0:
+            raise ValueError("fraction must be between 0 and 1")
+
+        super(SamplingValidator, self).__init__()
+        self.schema = schema
+        self.fraction = fraction
+        self.head = head
+        self.sample = sample
+
+        #: The number of list and map elements validated.
+        self.checked = 0
+
+        #: The number of list and map elements skipped.
+        self.skipped = 0
+
+        self._random = random.Random(seed)
+        self._validate = self._build(schema)
+
+    def validate(self, value):
+        """Validates the sampled parts of a value.
+
+        :param value: The value to validate.
+
+        :raises ValidationError: if a validated part of the value is invalid.
+        """
+        self._validate(value)
+
+    def reset(self):
+        """Resets the counters."""
+        self.checked = self.skipped = 0
+
+    def _sample_size(self, remaining):
+        if self.fraction is not None:
+            return int(math.ceil(self.fraction * remaining))
+        return min(self.sample, remaining)
+
+    def _list_validator(self, schema):
+        validate_container = schema.compile()
+        validate_element = self._build(schema.elementType)
+        maxLength = schema.maxLength
+        head = self.head
+
+        def validate(value):
+            if not isinstance(value, types.ListType) or\
+                    (maxLength is not None and len(value) > maxLength):
+                validate_container(value)
+            remaining = len(value) - head
+            if remaining > 0:
+                indexes = sorted(self._random.sample(
+                    xrange(head, len(value)), self._sample_size(remaining)))
+                self.skipped += remaining - len(indexes)
+                indexes[:0] = xrange(head)
+            else:
+                indexes = xrange(len(value))
+            self.checked += len(indexes)
+
+            i = 0
+            try:
+                for i in indexes:
+                    validate_element(value[i])
+            except ValidationError as e:
+                e.push_path(i)
+                raise
+        return validate
+
+    def _map_validator(self, schema):
+        validate_container = schema.compile()
+        validate_key = schema.keyType.compile()
+        validate_value = self._build(schema.valueType)
+        maxLength = schema.maxLength
+        head = self.head
+
+        def validate(value):
+            if not isinstance(value, types.DictType) or\
+                    (maxLength is not None and len(value) > maxLength):
+                validate_container(value)
+            remaining = len(value) - head
+            if remaining > 0:
+                keys = value.keys()
+                sampled = self._random.sample(keys[head:],
+                        self._sample_size(remaining))
+                self.skipped += remaining - len(sampled)
+                keys[head:] = sampled
+            else:
+                keys = value.iterkeys()
+            k = None
+            try:
+                for k in keys:
+                    validate_key(k)
+                    validate_value(value[k])
+                    self.checked += 1
+            except ValidationError as e:
+                e.push_path(k)
+                raise
+        return validate
+
+    def _formation_validator(self, schema):
+        validators = {}
+        for field_name, field in schema.fields.iteritems():
+            field_type = _field_type(field)
+            validators[field_name] = field.validate if field_type is None\
+                    else self._build(field_type)
+        return fields_validator(schema.fields, validators, schema.name)
+
+    def _ref_validator(self, schema):
+        def validate(value):
+            self._resolve(schema)(value)
+        return validate
+
+    _builders = [
+        (FormationType, _formation_validator),
+        (FormationRef, _ref_validator),
+        (ListType, _list_validator),
+        (MapType, _map_validator)
+    ]
@@ -0,0 +1,204 @@
+"""Validation of JSON documents whose top level is a large array, without
+loading the whole document into memory. Elements are parsed and validated one
+at a time, so memory is bounded by the size of the largest element rather
+than the size of the document.
+"""
+from .errors import DefinitionError, ValidationError
+from .typing import ListType, _max_count_error
+
+import codecs, json, json.decoder, json.scanner, re, types
+
+#: The number of characters read from the source at a time.
+CHUNK_SIZE = 65536
+
+_WHITESPACE_RE = re.compile(r'[ \t\n\r]*')
+
+_VALUE_START = frozenset(u'{["-0123456789tfnNI')
+
+_ERROR_POSITION_RE = re.compile(r'\(char (\d+)\)')
+
+# The C decoder does not report where a value nested in an array or object
+# fails to start, so the position of such errors is found by decoding again
+# with the pure Python decoder, which does.
+_diagnostic_decoder = json.JSONDecoder()
+_diagnostic_decoder.parse_string = json.decoder.py_scanstring
+_diagnostic_decoder.scan_once = json.scanner.py_make_scanner(
+        _diagnostic_decoder)
+
+#: The length of the longest token (`-Infinity`) which the decoder reports as
+#: an error at its start when it is cut short by the end of the buffer.
+_MAX_TOKEN = 10
+
+def iter_validated(source, schema, chunk_size=CHUNK_SIZE,
+        yield_errors=False, encoding='utf-8'):
+    """Parses a JSON array incrementally from `source` and validates each of
+    its elements against the element type of `schema` as soon as the element
+    is complete, yielding the validated elements in order. JSON integers are
+    decoded as longs.
+
+    :param source: A file-like object with a `read` method, a string, or an
+                   iterable of string chunks.
+
+    :type schema: ListType
+    :param schema: The type of the array.
+
+    :type chunk_size: int
+    :param chunk_size: The number of characters to read from a file-like
+                       source at a time.
+
+    :type yield_errors: bool
+    :param yield_errors: If True, invalid elements are replaced by their
+                         :class:`flexo.errors.ValidationError` in the output
+                         and parsing continues. Otherwise the first error is
+                         raised.
+
+    :type encoding: string
+    :param encoding: The encoding of byte string sources.
+
+    :raises ValidationError: if an element is invalid (and `yield_errors` is
+                             False).
+    :raises ValueError: if the source is not a well-formed JSON array.
+    """
+    if not isinstance(schema, ListType):
+        raise DefinitionError("schema must be an instance of ListType")
+
+    validate = schema.elementType.compile()
+    maxLength = schema.maxLength
+    reader = _Reader(source, chunk_size, encoding)
+    decoder = json.JSONDecoder(parse_int=long)
+
+    if not reader.skip_whitespace() or reader.peek() != u'[':
+        raise ValueError("expected a JSON array")
+    reader.pos += 1
+
+    index = 0
+    while True:
+        if not reader.skip_whitespace():
+            raise ValueError("unterminated JSON array")
+        if reader.peek() == u']' and index == 0:
+            reader.pos += 1
+            break
+        if index == maxLength:
+            raise _max_count_error(maxLength)
+
+        element = reader.decode(decoder)
+        try:
+            validate(element)
+        except ValidationError as e:
+            e.push_path(index)
+            if not yield_errors:
+                raise
+            yield e
+        else:
+            yield element
+        index += 1
+
+        if not reader.skip_whitespace():
+            raise ValueError("unterminated JSON array")
+        delimiter = reader.peek()
+        reader.pos += 1
+        if delimiter == u']':
+            break
+        if delimiter != u',':
+            raise ValueError("expected ',' or ']' at element %s" % index)
+        reader.compact()
+
+    if reader.skip_whitespace():
+        raise ValueError("unexpected data after JSON array")
+
+class _Reader(object):
+    """A buffer over a source of characters which is refilled on demand."""
+    def __init__(self, source, chunk_size, encoding):
+        if isinstance(source, types.StringTypes):
+            source = [source]
+        if hasattr(source, 'read'):
+            read = source.read
+            self._chunks = iter(lambda: read(chunk_size), '')
+        else:
+            self._chunks = iter(source)
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self.chunk_size = chunk_size
+        self.buffer = u''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, minimum=1):
+        """Reads until at least `minimum` more characters are buffered or the
+        source is exhausted. Returns False if nothing more could be read."""
+        parts = [self.buffer]
+        length = len(self.buffer)
+        target = length + minimum
+        while not self.eof and length < target:
+            chunk = next(self._chunks, None)
+            if chunk is None or chunk == '':
+                self.eof = True
+                chunk = self._decoder.decode('', True)
+            elif not isinstance(chunk, types.UnicodeType):
+                chunk = self._decoder.decode(chunk)
+            if chunk:
+                parts.append(chunk)
+                length += len(chunk)
+        if len(parts) == 1:
+            return False
+        self.buffer = u''.join(parts)
+        return True
+
+    def skip_whitespace(self):
+        """Advances past whitespace, reading as needed. Returns False if the
+        source is exhausted."""
+        while True:
+            self.pos = _WHITESPACE_RE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return True
+            if not self.fill():
+                return False
+
+    def peek(self):
+        return self.buffer[self.pos]
+
+    def decode(self, decoder):
+        """Decodes the JSON value starting at the current position, which must
+        not be whitespace. The value must be followed by another character
+        (or the end of the source) so that numbers are known to be complete.
+        While the value is incomplete, the buffered amount is doubled before
+        retrying, so large values are parsed a bounded number of times.
+        Malformed values are reported without reading further."""
+        if self.peek() not in _VALUE_START:
+            raise ValueError("unexpected character %r" % self.peek())
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.pos)
+            except ValueError as e:
+                if not self._truncated(e) or not self.fill(
+                        max(len(self.buffer) - self.pos, self.chunk_size)):
+                    raise
+                continue
+            if end < len(self.buffer) or self.eof or\
+                    not self.fill(self.chunk_size):
+                self.pos = end
+                return value
+
+    def _truncated(self, error):
+        """Returns True if an error decoding the value at the current position
+        may be due to the end of the buffer rather than to malformed data,
+        that is if it is an unterminated string or is found near the end of
+        the buffer."""
+        message = str(error)
+        match = _ERROR_POSITION_RE.search(message)
+        if match is None and message != "end is out of bounds":
+            try:
+                _diagnostic_decoder.raw_decode(self.buffer, self.pos)
+            except ValueError as e:
+                message = str(e)
+                match = _ERROR_POSITION_RE.search(message)
+        if message.startswith("Unterminated string") or\
+                message == "end is out of bounds":
+            return True
+        position = int(match.group(1)) if match else self.pos
+        return position >= len(self.buffer) - _MAX_TOKEN
+
+    def compact(self):
+        """Drops consumed characters once they make up most of the buffer."""
+        if self.pos > self.chunk_size and self.pos * 2 > len(self.buffer):
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
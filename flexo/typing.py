@@ -1,12 +1,240 @@
 from .errors import DefinitionError, ValidationError
-from .utils import validate_fields
+from .utils import FieldIndex, validate_fields, fields_validator,\
+        invalid_field_error, missing_fields_error, _hooks
 
-import datetime, types, json
+import datetime, types, json, weakref
 
 class BaseType(object):
      """Base class for basic types or formations (complex types). This enables
      determination if a variable is a valid 'type' (basic or formation)."""
-     pass
+     __slots__ = ('__weakref__',)
+
+     #: The names of the attributes which define a type. They cannot be
+     #: changed once set. If a class declares its own `_attrs`, instances of
+     #: that class whose defining attributes are equal are equal (and hash
+     #: equally); instances of other classes, such as custom types which may
+     #: hold state the base class does not know about, are only equal to
+     #: themselves.
+     _attrs = ()
+
+     def compile(self):
+         """Returns a function which validates a value exactly as
+         :meth:`validate` does, specialized for this type's configuration so
+         that constraints which are not set cost nothing at validation time.
+         Compiling a container type or formation compiles the types it
+         contains, so the returned function validates the whole value without
+         dispatching through each nested type's :meth:`validate`.
+
+         The base implementation returns :meth:`validate` itself.
+         """
+         return self.validate
+
+     def validation_steps(self, value, step=1000, interval=None):
+         """Returns a generator which validates a value a few elements at a
+         time, yielding between them, so that validating a large value does
+         not hold up an event loop. See
+         :func:`flexo.cooperative.validation_steps`.
+         """
+         from .cooperative import validation_steps
+         return validation_steps(self, value, step, interval)
+
+     def _key(self):
+         """Returns the tuple of the class and defining attributes of the
+         type, or None if the class does not declare its own `_attrs` and
+         instances are compared by identity."""
+         if '_attrs' not in self.__class__.__dict__:
+             return None
+         return (self.__class__,) +\
+                 tuple(getattr(self, name, None) for name in self._attrs)
+
+     def __setattr__(self, name, value):
+         if name in self._attrs and hasattr(self, name):
+             raise AttributeError("%s is immutable" % self.__class__.__name__)
+         object.__setattr__(self, name, value)
+
+     def __delattr__(self, name):
+         if name in self._attrs:
+             raise AttributeError("%s is immutable" % self.__class__.__name__)
+         object.__delattr__(self, name)
+
+     def __eq__(self, other):
+         if self is other:
+             return True
+         if not isinstance(other, BaseType):
+             return NotImplemented
+         key = self._key()
+         return key is not None and key == other._key()
+
+     def __ne__(self, other):
+         result = self.__eq__(other)
+         return result if result is NotImplemented else not result
+
+     def __hash__(self):
+         key = self._key()
+         if key is None:
+             return object.__hash__(self)
+         return hash(key)
+
+     def __getstate__(self):
+         state = dict((name, getattr(self, name)) for name in self._attrs)
+         state.update(getattr(self, '__dict__', {}))
+         return state
+
+     def __setstate__(self, state):
+         for name, value in state.iteritems():
+             object.__setattr__(self, name, value)
+
+     def __repr__(self):
+         return "%s(%s)" % (self.__class__.__name__, ", ".join("%s=%r" %\
+                 (name, getattr(self, name, None)) for name in self._attrs))
+
+_interned = weakref.WeakValueDictionary()
+
+def interned(schema):
+    """Returns the shared instance of types equal to `schema`, registering
+    `schema` as that instance if there is none, so that structurally identical
+    type definitions can share one object::
+
+        name = interned(StringType(0, 255))
+        assert interned(StringType(0, 255)) is name
+
+    Shared instances are held weakly. Formations, and types whose class does
+    not declare its own `_attrs`, are equal only to themselves, so interning
+    them returns them unchanged.
+
+    :type schema: BaseType
+    :param schema: The type to intern.
+    """
+    if isinstance(schema, FormationType):
+        return schema
+    key = schema._key()
+    if key is None:
+        return schema
+    shared = _interned.get(key)
+    if shared is None:
+        _interned[key] = shared = schema
+    return shared
+
+def _overrides_validate(instance, cls):
+    """Returns True if `instance` validates with something other than
+    `cls.validate`, in which case a validator compiled by `cls` would not be
+    equivalent and the instance's own `validate` must be used."""
+    return getattr(instance.validate, '__func__', None) is not\
+            cls.__dict__['validate']
+
+def _field_type(field):
+    """Returns the :class:`BaseType` a field exposes as `type`, or None if it
+    does not expose one."""
+    field_type = getattr(field, 'type', None)
+    if isinstance(field_type, BaseType):
+        return field_type
+    return None
+
+def _compile_field(field):
+    """Returns a compiled validator for a field. Fields which expose their
+    :class:`BaseType` as `type` have that type compiled, otherwise the field's
+    own `validate` is used."""
+    field_type = _field_type(field)
+    if field_type is not None:
+        return field_type.compile()
+    return field.validate
+
+def _memoized(memo, value, schema):
+    """Returns True if `value` has already been validated against `schema`
+    during the call owning `memo`, and records it otherwise. The value is
+    kept in the memo so that its id cannot be reused during the call."""
+    key = (id(value), id(schema))
+    if key in memo:
+        return True
+    memo[key] = value
+    return False
+
+def _validate_memo(schema, value, memo):
+    """Validates a value against a type, passing `memo` on to list, map and
+    formation types whose `validate` accepts it."""
+    for cls in _MEMO_TYPES:
+        if isinstance(schema, cls):
+            if not _overrides_validate(schema, cls):
+                schema.validate(value, memo)
+                return
+            break
+    schema.validate(value)
+
+def _validate_field_memo(field, value, memo):
+    """Validates the value of a field with a memo. Fields which expose their
+    :class:`BaseType` as `type` are validated through it."""
+    field_type = _field_type(field)
+    if field_type is None:
+        field.validate(value)
+    else:
+        _validate_memo(field_type, value, memo)
+
+def _type_error(value, expected):
+    return ValidationError("%(value)s: expected %(expected)s but was "\
+            "%(type)s", value, expected=expected, constraint="type")
+
+def _min_length_error(value, minLength):
+    return ValidationError("length of %(value)s is %(length)s, but minimum "\
+            "is %(limit)s", value, constraint="minLength", length=len(value),
+            limit=minLength)
+
+def _max_length_error(value, maxLength):
+    return ValidationError("length of %(value)s is %(length)s, but maximum "\
+            "is %(limit)s", value, constraint="maxLength", length=len(value),
+            limit=maxLength)
+
+def _max_count_error(maxLength):
+    """Returns the error for a list or map with more than `maxLength`
+    elements, for use before the whole value has been read."""
+    return ValidationError("more than %(limit)s elements", constraint=\
+            "maxLength", limit=maxLength)
+
+def _check_max_length(maxLength):
+    if maxLength is not None and not isinstance(maxLength, types.IntType):
+        raise DefinitionError("maxLength "\
+                "'%s' must be an integer, but was %s" %\
+                (str(maxLength), type(maxLength)))
+
+def _min_value_error(value, minValue):
+    return ValidationError("%(value)s is less than minimum %(limit)s", value,
+            constraint="minValue", limit=minValue)
+
+def _max_value_error(value, maxValue):
+    return ValidationError("%(value)s is greater than maximum %(limit)s",
+            value, constraint="maxValue", limit=maxValue)
+
+def _member_error(value, members):
+    return ValidationError("%(value)s is not one of the %(count)s allowed "\
+            "values", value, constraint="enum", count=len(members))
+
+def _compile_range(value_type, expected, minValue, maxValue):
+    """Returns a validator checking that values are instances of `value_type`
+    and lie within the given bounds, omitting the checks for unset bounds."""
+    if minValue is None and maxValue is None:
+        def validate(value):
+            if not isinstance(value, value_type):
+                raise _type_error(value, expected)
+    elif maxValue is None:
+        def validate(value):
+            if not isinstance(value, value_type):
+                raise _type_error(value, expected)
+            if value < minValue:
+                raise _min_value_error(value, minValue)
+    elif minValue is None:
+        def validate(value):
+            if not isinstance(value, value_type):
+                raise _type_error(value, expected)
+            if value > maxValue:
+                raise _max_value_error(value, maxValue)
+    else:
+        def validate(value):
+            if not isinstance(value, value_type):
+                raise _type_error(value, expected)
+            if value < minValue:
+                raise _min_value_error(value, minValue)
+            if value > maxValue:
+                raise _max_value_error(value, maxValue)
+    return validate
 
 class StringType(BaseType):
     """A type representing a unicode string.
@@ -19,6 +247,8 @@ class StringType(BaseType):
     :param maxLength: The maximum length of strings of this type. Defaults
                       to None (unspecified).
     """
+    __slots__ = _attrs = ('minLength', 'maxLength')
+
     def __init__(self, minLength=0, maxLength=None):
         if not isinstance(minLength, types.IntType):
             raise DefinitionError("minLength "\
@@ -44,14 +274,46 @@ class StringType(BaseType):
         :param value: The value to validate.
         """
         if not isinstance(value, types.StringTypes):
-            raise ValidationError("%s: expected string but was %s" %\
-                    (str(value), type(value)))
+            raise _type_error(value, "string")
         if len(value) < self.minLength:
-            raise ValidationError("length of '%s' is %s, but minimum is %s" %\
-                    (value, len(value), self.minLength))
+            raise _min_length_error(value, self.minLength)
         if self.maxLength is not None and len(value) > self.maxLength:
-            raise ValidationError("length of '%s' is %s, but maximum is %s" %\
-                    (value, len(value), self.maxLength))
+            raise _max_length_error(value, self.maxLength)
+
+    def compile(self):
+        if _overrides_validate(self, StringType):
+            return self.validate
+
+        string_types = types.StringTypes
+        minLength = self.minLength
+        maxLength = self.maxLength
+
+        if minLength <= 0 and maxLength is None:
+            def validate(value):
+                if not isinstance(value, string_types):
+                    raise _type_error(value, "string")
+        elif maxLength is None:
+            def validate(value):
+                if not isinstance(value, string_types):
+                    raise _type_error(value, "string")
+                if len(value) < minLength:
+                    raise _min_length_error(value, minLength)
+        elif minLength <= 0:
+            def validate(value):
+                if not isinstance(value, string_types):
+                    raise _type_error(value, "string")
+                if len(value) > maxLength:
+                    raise _max_length_error(value, maxLength)
+        else:
+            def validate(value):
+                if not isinstance(value, string_types):
+                    raise _type_error(value, "string")
+                length = len(value)
+                if length < minLength:
+                    raise _min_length_error(value, minLength)
+                if length > maxLength:
+                    raise _max_length_error(value, maxLength)
+        return validate
 
 class LongType(BaseType):
     """A type representing a Long.
@@ -64,6 +326,8 @@ class LongType(BaseType):
     :param maxValue: The maximum size of longs of this type. Defaults
                      to None (unspecified).
     """
+    __slots__ = _attrs = ('minValue', 'maxValue')
+
     def __init__(self, minValue=None, maxValue=None):
         if minValue is not None and not isinstance(minValue,\
                 types.LongType):
@@ -91,14 +355,17 @@ class LongType(BaseType):
         :param value: The value to validate.
         """
         if not isinstance(value, types.LongType):
-            raise ValidationError("%s: expected long but was %s" %\
-                    (str(value), type(value)))
+            raise _type_error(value, "long")
         if self.minValue is not None and value < self.minValue:
-            raise ValidationError("%s is less than minimum %s" %\
-                    (str(value), self.minValue))
+            raise _min_value_error(value, self.minValue)
         if self.maxValue is not None and value > self.maxValue:
-            raise ValidationError("%s is greater than maximum %s" %\
-                    (str(value), self.maxValue))
+            raise _max_value_error(value, self.maxValue)
+
+    def compile(self):
+        if _overrides_validate(self, LongType):
+            return self.validate
+        return _compile_range(types.LongType, "long", self.minValue,
+                self.maxValue)
 
 class FloatType(BaseType):
     """A type representing a float.
@@ -111,6 +378,8 @@ class FloatType(BaseType):
     :param maxValue: The maximum size of floats of this type. Defaults
                      to None (unspecified).
     """
+    __slots__ = _attrs = ('minValue', 'maxValue')
+
     def __init__(self, minValue=None, maxValue=None):
         if minValue is not None and not isinstance(minValue,\
                 types.FloatType):
@@ -138,14 +407,17 @@ class FloatType(BaseType):
         :param value: The value to validate.
         """
         if not isinstance(value, types.FloatType):
-            raise ValidationError("%s: expected float but was %s" %\
-                    (str(value), type(value)))
+            raise _type_error(value, "float")
         if self.minValue is not None and value < self.minValue:
-            raise ValidationError("%s is less than minimum %s" %\
-                    (str(value), self.minValue))
+            raise _min_value_error(value, self.minValue)
         if self.maxValue is not None and value > self.maxValue:
-            raise ValidationError("%s is greater than maximum %s" %\
-                    (str(value), self.maxValue))
+            raise _max_value_error(value, self.maxValue)
+
+    def compile(self):
+        if _overrides_validate(self, FloatType):
+            return self.validate
+        return _compile_range(types.FloatType, "float", self.minValue,
+                self.maxValue)
 
 class PositiveLongType(LongType):
     """A type representing a positive long.
@@ -154,6 +426,9 @@ class PositiveLongType(LongType):
     :param maxValue: The maximum size of longs of this type. Defaults
                      to None (unspecified).
     """
+    __slots__ = ()
+    _attrs = LongType._attrs
+
     def __init__(self, maxValue=None):
         super(PositiveLongType, self).__init__(0L, maxValue)
 
@@ -164,6 +439,9 @@ class NonzeroPositiveLongType(LongType):
     :param maxValue: The maximum size of longs of this type. Defaults
                      to None (unspecified).
     """
+    __slots__ = ()
+    _attrs = LongType._attrs
+
     def __init__(self, maxValue=None):
         super(NonzeroPositiveLongType, self).__init__(1L, maxValue)
 
@@ -172,11 +450,16 @@ class PositiveFloatType(FloatType):
 
     :param maxValue: The maximum size of floats of this type. Defaults
     to None (unspecified)."""
+    __slots__ = ()
+    _attrs = FloatType._attrs
+
     def __init__(self, maxValue=None):
         super(PositiveFloatType, self).__init__(0.0, maxValue)
 
 class BooleanType(BaseType):
     """A type representing a boolean."""
+    __slots__ = _attrs = ()
+
     def __init__(self):
         pass
 
@@ -187,72 +470,206 @@ class BooleanType(BaseType):
         :param value: The value to validate.
         """
         if not isinstance(value, types.BooleanType):
-            raise ValidationError("%s: expected boolean but was %s" %\
-                    (str(value), type(value)))
+            raise _type_error(value, "boolean")
+
+    def compile(self):
+        if _overrides_validate(self, BooleanType):
+            return self.validate
+
+        boolean_type = types.BooleanType
+
+        def validate(value):
+            if not isinstance(value, boolean_type):
+                raise _type_error(value, "boolean")
+        return validate
 
 class ListType(BaseType):
     """A type representing a list of `:class:BaseType`s.
 
     :param element_type: A `:class:BaseType` shared by all elements of the
     list.
+
+    :type maxLength: int
+    :param maxLength: The maximum number of elements of lists of this type.
+                      Defaults to None (unspecified).
     """
-    def __init__(self, elementType):
+    __slots__ = _attrs = ('elementType', 'maxLength')
+
+    def __init__(self, elementType, maxLength=None):
         if not isinstance(elementType, BaseType):
             raise DefinitionError("elementType must be an instance of BaseType")
+        _check_max_length(maxLength)
 
         self.elementType = elementType
+        self.maxLength = maxLength
 
-    def validate(self, value):
+    def validate(self, value, memo=None):
         """Validates if the given value is a valid list, and that each element
         of the list is valid with respect to the elementType.
 
         :type value: list
         :param value: The value to validate.
+
+        :type memo: dict
+        :param memo: An optional dictionary, empty at the start of a
+                     validation, in which lists, maps and formations record
+                     the objects they have validated. An object referenced
+                     from many places in the value (or from itself) is then
+                     validated once per type rather than once per reference.
         """
         if not isinstance(value, types.ListType):
-            raise ValidationError("%s: expected list but was %s" %\
-                    (str(value), type(value)))
+            raise _type_error(value, "list")
+        if self.maxLength is not None and len(value) > self.maxLength:
+            raise _max_length_error(value, self.maxLength)
+
+        i = 0
+        try:
+            if memo is None:
+                for i, v in enumerate(value):
+                    self.elementType.validate(v)
+            elif not _memoized(memo, value, self):
+                for i, v in enumerate(value):
+                    _validate_memo(self.elementType, v, memo)
+        except ValidationError as e:
+            e.push_path(i)
+            raise
+
+    def compile(self):
+        if _overrides_validate(self, ListType):
+            return self.validate
+
+        list_type = types.ListType
+        validate_element = self.elementType.compile()
+        maxLength = self.maxLength
 
-        for v in value:
-            self.elementType.validate(v)
+        if maxLength is None:
+            def validate(value):
+                if not isinstance(value, list_type):
+                    raise _type_error(value, "list")
+                i = 0
+                try:
+                    for i, v in enumerate(value):
+                        validate_element(v)
+                except ValidationError as e:
+                    e.push_path(i)
+                    raise
+        else:
+            def validate(value):
+                if not isinstance(value, list_type):
+                    raise _type_error(value, "list")
+                if len(value) > maxLength:
+                    raise _max_length_error(value, maxLength)
+                i = 0
+                try:
+                    for i, v in enumerate(value):
+                        validate_element(v)
+                except ValidationError as e:
+                    e.push_path(i)
+                    raise
+        return validate
 
 class MapType(BaseType):
     """A type representing a map of key-value pairs. Keys must be
-    :class:`StringType`\s, while values can be any subclass of
-    :class:`BaseType`.
+    :class:`StringType`\s or :class:`EnumType`\s of strings, while values can
+    be any subclass of :class:`BaseType`.
 
     :type keyType: StringType
     :param keyType: The type to validate keys against.
 
     :type valueType: BaseType
     :param valueType: The type shared by values in this map.
+
+    :type maxLength: int
+    :param maxLength: The maximum number of entries of maps of this type.
+                      Defaults to None (unspecified).
     """
-    def __init__(self, keyType, valueType):
-        if not isinstance(keyType, StringType):
-            raise DefinitionError("keyType must be an instance of StringType")
+    __slots__ = _attrs = ('keyType', 'valueType', 'maxLength')
+
+    def __init__(self, keyType, valueType, maxLength=None):
+        if not isinstance(keyType, StringType) and\
+                not (isinstance(keyType, EnumType) and\
+                keyType.kind == "string"):
+            raise DefinitionError("keyType must be an instance of StringType "\
+                    "or an EnumType of strings")
         if not isinstance(valueType, BaseType):
             raise DefinitionError("valueType must be a valid type")
+        _check_max_length(maxLength)
 
         self.keyType = keyType
         self.valueType = valueType
+        self.maxLength = maxLength
 
-    def validate(self, value):
+    def validate(self, value, memo=None):
         """Validates if the given value is a valid map, and that each key-value
         pair is valid with respect to the keyType and valueType.
 
         :type value: dict
         :param value: The value to validate.
+
+        :type memo: dict
+        :param memo: An optional memo of validated objects, as for
+                     :meth:`ListType.validate`.
         """
         if not isinstance(value, types.DictType):
-            raise ValidationError("%s: expected dict but was %s" %\
-                    (str(value), type(value)))
+            raise _type_error(value, "dict")
+        if self.maxLength is not None and len(value) > self.maxLength:
+            raise _max_length_error(value, self.maxLength)
+
+        k = None
+        try:
+            if memo is None:
+                for k,v in value.iteritems():
+                    self.keyType.validate(k)
+                    self.valueType.validate(v)
+            elif not _memoized(memo, value, self):
+                for k,v in value.iteritems():
+                    self.keyType.validate(k)
+                    _validate_memo(self.valueType, v, memo)
+        except ValidationError as e:
+            e.push_path(k)
+            raise
+
+    def compile(self):
+        if _overrides_validate(self, MapType):
+            return self.validate
 
-        for k,v in value.iteritems():
-            self.keyType.validate(k)
-            self.valueType.validate(v)
+        dict_type = types.DictType
+        validate_key = self.keyType.compile()
+        validate_value = self.valueType.compile()
+        maxLength = self.maxLength
+
+        if maxLength is None:
+            def validate(value):
+                if not isinstance(value, dict_type):
+                    raise _type_error(value, "dict")
+                k = None
+                try:
+                    for k,v in value.iteritems():
+                        validate_key(k)
+                        validate_value(v)
+                except ValidationError as e:
+                    e.push_path(k)
+                    raise
+        else:
+            def validate(value):
+                if not isinstance(value, dict_type):
+                    raise _type_error(value, "dict")
+                if len(value) > maxLength:
+                    raise _max_length_error(value, maxLength)
+                k = None
+                try:
+                    for k,v in value.iteritems():
+                        validate_key(k)
+                        validate_value(v)
+                except ValidationError as e:
+                    e.push_path(k)
+                    raise
+        return validate
 
 class DatetimeType(BaseType):
     """A type representing a datetime."""
+    __slots__ = _attrs = ()
+
     def __init__(self):
         pass
 
@@ -264,10 +681,90 @@ class DatetimeType(BaseType):
         :param value: The value to validate.
         """
         if not isinstance(value, datetime.datetime):
-            raise ValidationError("%s: expected datetime but was %s" %\
-                    (str(value), type(value)))
+            raise _type_error(value, "datetime")
+
+    def compile(self):
+        if _overrides_validate(self, DatetimeType):
+            return self.validate
+
+        datetime_type = datetime.datetime
 
-class FormationType(object):
+        def validate(value):
+            if not isinstance(value, datetime_type):
+                raise _type_error(value, "datetime")
+        return validate
+
+class EnumType(BaseType):
+    """A type whose values are one of a set of strings or of longs. Whatever
+    the number of members, a value is checked with a single hashed lookup.
+
+    :type members: frozenset
+    :param members: The allowed values, either all strings or all longs. A
+                    frozenset is kept as it is rather than copied, so that a
+                    large set of members can be shared by several types;
+                    other iterables are converted to a frozenset.
+    """
+    __slots__ = ('members', 'kind')
+    _attrs = __slots__[:1]
+
+    def __init__(self, members):
+        if not isinstance(members, frozenset):
+            members = frozenset(members)
+
+        if len(members) == 0:
+            raise DefinitionError("members must contain at least one value")
+
+        if not all(isinstance(m, types.StringTypes) for m in members) and\
+                not all(isinstance(m, types.LongType) for m in members):
+            raise DefinitionError("members must be all strings or all longs")
+
+        self.members = members
+
+        #: `"string"` if the members are strings, `"long"` if they are longs.
+        self.kind = _member_kind(members)
+
+    def __setstate__(self, state):
+        BaseType.__setstate__(self, state)
+        self.kind = _member_kind(self.members)
+
+    def validate(self, value):
+        """Validates if the given value is one of the members. Values must be
+        of the members' type: a string for string members and a long for long
+        members.
+
+        :param value: The value to validate.
+        """
+        kind = self.kind
+        if not isinstance(value, _ENUM_VALUE_TYPES[kind]):
+            raise _type_error(value, kind)
+        if value not in self.members:
+            raise _member_error(value, self.members)
+
+    def compile(self):
+        if _overrides_validate(self, EnumType):
+            return self.validate
+
+        kind = self.kind
+        value_types = _ENUM_VALUE_TYPES[kind]
+        members = self.members
+
+        def validate(value):
+            if not isinstance(value, value_types):
+                raise _type_error(value, kind)
+            if value not in members:
+                raise _member_error(value, members)
+        return validate
+
+def _member_kind(members):
+    for member in members:
+        return "string" if isinstance(member, types.StringTypes) else "long"
+
+_ENUM_VALUE_TYPES = {
+    "string": types.StringTypes,
+    "long": types.LongType
+}
+
+class FormationType(BaseType):
     """Represents a complex type. Instances of this class define the fields
     for the formation along with some additional metadata about it. They can
     output values for all the constituent fields of the formation in the form
@@ -283,6 +780,10 @@ class FormationType(object):
     :param fields: A list of fields that make up this formation. Duplicate
                    names are not allowed.
     """
+    __slots__ = ('name', 'description', 'fields', '_record_class',
+            '_compiled', '_compiled_fields')
+    _attrs = __slots__[:3]
+
     def __init__(self, name, description, fields):
         #: The name of the formation.
         self.name = name
@@ -293,17 +794,234 @@ class FormationType(object):
         if len(fields) == 0:
             raise DefinitionError("fields must contain at least one field")
 
-        #: The :class:`Field`s that make up this Formation.
-        self.fields = {}
+        names = set()
         for field in fields:
-            if field.name in self.fields:
+            if field.name in names:
                 raise DefinitionError("duplicate field: %s" % field.name)
-            self.fields[field.name] = field
+            names.add(field.name)
 
-    def validate(self, value):
+        #: The :class:`Field`s that make up this Formation, as an immutable
+        #: :class:`flexo.utils.FieldIndex` of field name to field.
+        self.fields = FieldIndex(fields)
+
+        self._record_class = None
+        self._compiled = None
+        self._compiled_fields = None
+
+    def validate(self, value, memo=None):
         """Validates a dictionary against this formation type.
         
         :param value: The dictionary to validate.
+
+        :type memo: dict
+        :param memo: An optional memo of validated objects, as for
+                     :meth:`ListType.validate`.
+        """
+        if memo is None:
+            validate_fields(self.fields, value, self.name)
+        elif not _memoized(memo, value, self):
+            validate_fields(self.fields, value, self.name, memo)
+
+    def validate_partial(self, patch, removed=None):
+        """Validates a partial update of a value of this formation: each key
+        of `patch` must be a field and its value valid for that field, but
+        required fields may be absent. The value being updated is not needed.
+
+        :type patch: dict
+        :param patch: The fields to set.
+
+        :type removed: list
+        :param removed: An optional list of the names of fields the update
+                        removes, which must be fields that are not required.
+        """
+        if not isinstance(patch, types.DictType):
+            raise _type_error(patch, "dict")
+        validators = self.fields.validators
+        k = None
+        try:
+            for k,v in patch.iteritems():
+                validate = validators.get(k)
+                if validate is None:
+                    raise invalid_field_error(self.name, k)
+                validate(v)
+        except ValidationError as e:
+            e.push_path(k)
+            raise
+
+        if removed:
+            for k in removed:
+                if k not in validators:
+                    raise invalid_field_error(self.name, k)
+            required = [k for k in self.fields.names\
+                    if k in self.fields.required and k in removed]
+            if required:
+                raise missing_fields_error(self.name, required)
+
+    def validate_batch(self, records):
+        """Validates a list of dictionaries against this formation type,
+        checking each field column by column. All invalid records are
+        reported rather than only the first.
+
+        :type records: list
+        :param records: The dictionaries to validate.
+
+        :raises BatchValidationError: if any record is invalid.
+        """
+        from .batch import validate_batch
+        validate_batch(self, records)
+
+    def validate_columns(self, columns):
+        """Validates records given as a dictionary of field name to a column
+        of that field's values (a list, tuple or NumPy array), without
+        building a dictionary per record. Columns must be of equal length and
+        every required field must have a column; columns of fields which are
+        not required may contain None for records without that field.
+
+        :type columns: dict
+        :param columns: The columns to validate.
+
+        :raises BatchValidationError: if any record is invalid.
+        """
+        from .batch import validate_columns
+        validate_columns(self, columns)
+
+    def __eq__(self, other):
+        return self is other
+
+    def __ne__(self, other):
+        return self is not other
+
+    __hash__ = object.__hash__
+
+    def __setstate__(self, state):
+        # Generated record classes and compiled validators are not pickled.
+        BaseType.__setstate__(self, state)
+        self._record_class = None
+        self._compiled = None
+        self._compiled_fields = None
+
+    def record_class(self):
+        """Returns a class with a slot for each field of this formation,
+        whose instances hold valid values of the formation with less memory
+        than dictionaries and faster attribute access. The class is generated
+        on first use; see :mod:`flexo.record`.
+        """
+        if self._record_class is None:
+            from .record import record_class
+            self._record_class = record_class(self)
+        return self._record_class
+
+    def field_validators(self):
+        """Returns a dictionary of field name to a compiled validator for
+        that field (see :meth:`BaseType.compile`). The validators are compiled
+        on first use and shared by later calls, so the dictionary must not be
+        modified.
+        """
+        if self._compiled_fields is None:
+            self._compiled_fields = dict((name, _compile_field(field))\
+                    for name, field in self.fields.iteritems())
+        return self._compiled_fields
+
+    def compile(self):
+        """Returns a compiled validator for this formation, as for
+        :meth:`BaseType.compile`. The formation is compiled on first use and
+        later calls return the same function.
+        """
+        if _overrides_validate(self, FormationType):
+            return self.validate
+        if self._compiled is None:
+            self._compiled = self._compile()
+        return self._compiled
+
+    def _compile(self):
+        return fields_validator(self.fields, self.field_validators(),
+                self.name, _hooks)
+
+class FormationRef(BaseType):
+    """A reference to a formation by name, resolved through a registry when
+    it is first used rather than when it is defined, so that a formation can
+    refer to formations defined after it, or to itself. See
+    :class:`flexo.registry.SchemaRegistry`.
+
+    :param registry: The registry defining the formation. Its `get(name)`
+                     returns the formation and its `validator(name)` a
+                     compiled validator for it.
+
+    :type name: string
+    :param name: The name of the referenced formation.
+    """
+    __slots__ = _attrs = ('registry', 'name')
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    @property
+    def target(self):
+        """The referenced :class:`FormationType`."""
+        return self.registry.get(self.name)
+
+    def validate(self, value, memo=None):
+        """Validates a dictionary against the referenced formation.
+
+        :param value: The dictionary to validate.
+
+        :type memo: dict
+        :param memo: An optional memo of validated objects, as for
+                     :meth:`ListType.validate`.
         """
-        validate_fields(self.fields, value, self.name)
+        if memo is None:
+            self.target.validate(value)
+        else:
+            _validate_memo(self.target, value, memo)
+
+    def compile(self):
+        if _overrides_validate(self, FormationRef):
+            return self.validate
+
+        registry = self.registry
+        name = self.name
+        compiled = []
+
+        # The formation is only compiled on first use, as it may contain
+        # this reference.
+        def validate(value):
+            if not compiled:
+                compiled.append(registry.validator(name))
+            compiled[0](value)
+        return validate
+
+_MEMO_TYPES = (FormationType, FormationRef, ListType, MapType)
+
+class _SchemaBuilder(object):
+    """Base class of the objects which build a function, or a tuple of
+    functions, for each type of a schema, such as the decoders, encoders and
+    codecs. The `(type, method)` pairs of `_builders` are tried in order, and
+    the method of the first type the schema is an instance of, without
+    overriding `validate`, builds its function. Other types are given to
+    `_fallback`, which compiles them.
+    """
+    _builders = []
+
+    def __init__(self):
+        self._referenced = {}
+
+    def _build(self, schema):
+        for cls, build in self._builders:
+            if isinstance(schema, cls) and\
+                    not _overrides_validate(schema, cls):
+                return build(self, schema)
+        return self._fallback(schema)
+
+    def _fallback(self, schema):
+        return schema.compile()
 
+    def _resolve(self, ref):
+        """Returns what was built for the formation referenced by a
+        :class:`FormationRef`. The formation may contain the reference, so it
+        is built when the functions of the reference are first called rather
+        than with them, and shared by equal references."""
+        built = self._referenced.get(ref)
+        if built is None:
+            built = self._referenced[ref] = self._build(ref.target)
+        return built
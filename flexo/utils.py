@@ -1,29 +1,222 @@
 from .errors import ValidationError
 
-def validate_fields(fields, to_validate, context_message=None):
+import functools, time, types
+
+#: The instrumentation hooks called after each validation of a formation (see
+#: :mod:`flexo.instrumentation`). Validation only checks that this list is
+#: empty when no hook is registered.
+_hooks = []
+
+class FieldIndex(dict):
+    """An immutable dictionary of field name to field, built once from a list
+    of fields so that validation does not have to rediscover which fields are
+    required.
+
+    :type fields: list
+    :param fields: The fields to index. Names are assumed to be unique.
+    """
+    def __init__(self, fields):
+        dict.__init__(self, ((f.name, f) for f in fields))
+
+        #: The field names, in the order the fields were given.
+        self.names = tuple(f.name for f in fields)
+
+        #: A frozenset of the names of the required fields.
+        self.required = frozenset(f.name for f in fields if f.required)
+
+        #: The number of required fields.
+        self.required_count = len(self.required)
+
+        #: Dictionary of field name to that field's `validate`.
+        self.validators = dict((f.name, f.validate) for f in fields)
+
+        # The functions built by fields_validator from `validators`, by
+        # context message, for validate_fields.
+        self._validate = {}
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("%s is immutable" % self.__class__.__name__)
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault =\
+            update = _immutable
+
+    def __reduce__(self):
+        return (self.__class__, ([self[name] for name in self.names],))
+
+    def missing(self, to_validate):
+        """Returns the names of required fields which are not keys of the
+        given dictionary, in declaration order."""
+        return [name for name in self.names\
+                if name in self.required and name not in to_validate]
+
+def validate_fields(fields, to_validate, context_message=None, memo=None,
+        _observed=False):
     """Validate that the given dictionary is valid with respect to the given
     field definitions (dictionary of field name to :class:`flexo.model.Field`)
     by ensuring that there are no keys which are not fields, that all required
     fields are present, and that each present field is valid w.r.t. that
     field's base type.
 
+    If `fields` is a :class:`FieldIndex`, required fields are checked by
+    counting the required keys encountered rather than by building sets.
+
     :param fields: Dictionary of field name to :class:`flexo.model.Field`.
     :param to_validate: The dictionary to validate against the field
     definitions.
     :param context_message: An optional message to prepend to validation
     errors.
+    :param memo: An optional memo of validated objects (see
+    :meth:`flexo.typing.ListType.validate`), passed on to the types of fields
+    which expose their type as `type`.
     """
-    context_message = "" if context_message is None else\
-            "%s: " % context_message
+    # When hooks are registered, validation calls itself through _observe;
+    # otherwise it runs in this frame.
+    if _hooks and not _observed:
+        _observe(context_message, to_validate, validate_fields, fields,
+                to_validate, context_message, memo, True)
+        return
 
-    for k,v in to_validate.iteritems():
-        if k not in fields:
-            raise ValidationError("%sinvalid field %s" %\
-                    (context_message, k))
-        fields[k].validate(v)
+    if not isinstance(to_validate, types.DictType):
+        from .typing import _type_error
+        raise _type_error(to_validate, "dict")
+
+    if memo is not None:
+        from .typing import _validate_field_memo
+        validate_field = lambda field, v: _validate_field_memo(field, v, memo)
+    else:
+        validate_field = None
+
+    if isinstance(fields, FieldIndex):
+        if validate_field is not None:
+            validate = fields_validator(fields, dict((name,\
+                    functools.partial(validate_field, field))\
+                    for name, field in fields.iteritems()), context_message)
+        else:
+            validate = fields._validate.get(context_message)
+            if validate is None:
+                validate = fields._validate[context_message] =\
+                        fields_validator(fields, fields.validators,
+                                context_message)
+        validate(to_validate)
+        return
+
+    k = None
+    try:
+        for k,v in to_validate.iteritems():
+            if k not in fields:
+                raise invalid_field_error(context_message, k)
+            if validate_field is None:
+                fields[k].validate(v)
+            else:
+                validate_field(fields[k], v)
+    except ValidationError as e:
+        e.push_path(k)
+        raise
 
     required_fields = set([f.name for f in fields.values() if f.required])
     missing = required_fields - set(to_validate.keys())
     if len(missing) > 0:
-        raise ValidationError("%smissing required fields: %s" %\
-                (context_message, ', '.join(missing)))
+        raise missing_fields_error(context_message, missing)
+
+def fields_validator(index, validators, context_message=None, hooks=()):
+    """Returns a function validating a dictionary against the fields of a
+    :class:`FieldIndex`, as :func:`validate_fields` does. Its keys are
+    checked first, as by :func:`check_keys`, then each value is validated by
+    the function of its key in `validators`, and errors are given the key as
+    their path.
+
+    :type index: FieldIndex
+    :param index: The fields.
+
+    :type validators: dict
+    :param validators: Dictionary of field name to the function validating
+                       the values of that field.
+
+    :param context_message: An optional message to prepend to validation
+                            errors, and to pass to instrumentation hooks.
+
+    :type hooks: list
+    :param hooks: A list of instrumentation hooks, usually `_hooks`. While it
+                  is not empty, the function calls itself through
+                  :func:`_observe`, which calls them; otherwise it runs in a
+                  single frame.
+    """
+    from .typing import _type_error
+    names = index.viewkeys()
+    required = index.required
+
+    def validate(value, _observed=False):
+        if hooks and not _observed:
+            _observe(context_message, value, validate, value, True)
+            return
+        if not isinstance(value, types.DictType):
+            raise _type_error(value, "dict")
+        keys = value.viewkeys()
+        if not (keys <= names and keys >= required):
+            raise _keys_error(index, context_message, value)
+        k = None
+        try:
+            for k,v in value.iteritems():
+                validators[k](v)
+        except ValidationError as e:
+            e.push_path(k)
+            raise
+    return validate
+
+def check_keys(index, context_message, to_validate):
+    """Raises the :class:`ValidationError` of the first key of a dictionary
+    which is not a field of a :class:`FieldIndex`, with the key as its path,
+    or else of the required fields the dictionary lacks, if any.
+
+    :type index: FieldIndex
+    :param index: The fields.
+
+    :param context_message: An optional message to prepend to the error.
+
+    :type to_validate: dict
+    :param to_validate: The dictionary whose keys to check.
+    """
+    keys = to_validate.viewkeys()
+    if not (keys <= index.viewkeys() and keys >= index.required):
+        raise _keys_error(index, context_message, to_validate)
+
+def _keys_error(index, context_message, to_validate):
+    for k in to_validate:
+        if k not in index:
+            e = invalid_field_error(context_message, k)
+            e.push_path(k)
+            return e
+    return missing_fields_error(context_message, index.missing(to_validate))
+
+def _observe(name, value, validate, *args):
+    """Calls `validate` with `args`, then each instrumentation hook with the
+    formation name, the time taken in seconds, the number of keys of `value`
+    and the :class:`ValidationError` raised (or None).
+    """
+    start = time.time()
+    try:
+        validate(*args)
+    except ValidationError as e:
+        _notify(name, time.time() - start, value, e)
+        raise
+    _notify(name, time.time() - start, value, None)
+
+def _notify(name, elapsed, value, error):
+    elements = len(value) if isinstance(value, types.DictType) else 0
+    for hook in _hooks:
+        hook(name, elapsed, elements, error)
+
+def invalid_field_error(context_message, name):
+    """Returns the :class:`ValidationError` for a key which is not a field."""
+    return ValidationError("%(context)sinvalid field %(field)s",
+            constraint="field", context=_context(context_message), field=name,
+            formation=context_message)
+
+def missing_fields_error(context_message, names):
+    """Returns the :class:`ValidationError` for missing required fields."""
+    return ValidationError("%(context)smissing required fields: %(fields)s",
+            constraint="required", context=_context(context_message),
+            fields=', '.join(names), formation=context_message)
+
+def _context(context_message):
+    return "" if context_message is None else "%s: " % context_message
@@ -0,0 +1,142 @@
+"""Dictionaries bound to a :class:`flexo.typing.FormationType` which keep
+track of the fields changed since they were last validated, so that
+revalidating them only checks those fields.
+"""
+from .errors import ValidationError
+from .typing import FormationType
+from .utils import invalid_field_error, missing_fields_error
+
+class ValidatedDict(dict):
+    """A dictionary of values of a formation's fields. The initial contents
+    are validated in full; afterwards, keys which are not fields are rejected
+    as they are assigned, and assigned or deleted fields are recorded as
+    dirty until the next :meth:`validate`, which only checks those fields (and
+    that no required field was deleted).
+
+    Changes made inside a field's value (such as appending to a list) are not
+    seen by the dictionary; call :meth:`mark_dirty` for such fields.
+
+    :type formation: flexo.typing.FormationType
+    :param formation: The formation the dictionary is a value of.
+
+    :type value: dict
+    :param value: The initial contents.
+
+    :type eager: bool
+    :param eager: If True, fields are validated as they are assigned and an
+                  invalid assignment raises without changing the dictionary.
+                  Only deletions are then left to :meth:`validate`.
+
+    :raises ValidationError: if the initial contents are not valid.
+    """
+    def __init__(self, formation, value=None, eager=False):
+        if not isinstance(formation, FormationType):
+            raise TypeError("formation must be an instance of FormationType")
+
+        value = {} if value is None else value
+        formation.compile()(value)
+        dict.__init__(self, value)
+
+        self.formation = formation
+        self.eager = eager
+        self._validators = formation.field_validators()
+        self._dirty = set()
+
+    @property
+    def dirty(self):
+        """A frozenset of the fields changed since the last validation."""
+        return frozenset(self._dirty)
+
+    def mark_dirty(self, key):
+        """Records that a field's value has changed in place, so that the next
+        :meth:`validate` checks it."""
+        if key not in self._validators:
+            raise invalid_field_error(self.formation.name, key)
+        self._dirty.add(key)
+
+    def validate(self):
+        """Validates the fields changed since the last validation, and that
+        required fields are present.
+
+        :raises ValidationError: if the dictionary is not valid. The changed
+                                 fields stay dirty.
+        """
+        missing = False
+        k = None
+        try:
+            for k in self._dirty:
+                if k in self:
+                    self._validators[k](dict.__getitem__(self, k))
+                elif k in self.formation.fields.required:
+                    missing = True
+        except ValidationError as e:
+            e.push_path(k)
+            raise
+
+        if missing:
+            raise missing_fields_error(self.formation.name,
+                    self.formation.fields.missing(self))
+        self._dirty.clear()
+
+    def _assign(self, key, value):
+        validate = self._validators.get(key)
+        if validate is None:
+            raise invalid_field_error(self.formation.name, key)
+        if self.eager:
+            try:
+                validate(value)
+            except ValidationError as e:
+                e.push_path(key)
+                raise
+        else:
+            self._dirty.add(key)
+
+    def __setitem__(self, key, value):
+        self._assign(key, value)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self._dirty.add(key)
+
+    def update(self, *args, **kwargs):
+        for k,v in dict(*args, **kwargs).iteritems():
+            self[k] = v
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return dict.__getitem__(self, key)
+
+    _no_default = object()
+
+    def pop(self, key, default=_no_default):
+        if key not in self:
+            if default is self._no_default:
+                raise KeyError(key)
+            return default
+        value = dict.pop(self, key)
+        self._dirty.add(key)
+        return value
+
+    def popitem(self):
+        key, value = dict.popitem(self)
+        self._dirty.add(key)
+        return key, value
+
+    def clear(self):
+        self._dirty.update(self)
+        dict.clear(self)
+
+    def __reduce__(self):
+        return (_rebuild, (self.formation, dict(self), self.eager,
+            self.dirty))
+
+def _rebuild(formation, value, eager, dirty):
+    result = ValidatedDict.__new__(ValidatedDict)
+    dict.__init__(result, value)
+    result.formation = formation
+    result.eager = eager
+    result._validators = formation.field_validators()
+    result._dirty = set(dirty)
+    return result
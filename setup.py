@@ -29,6 +29,10 @@ setup(
     install_requires=[
         'requests>=2.11.1'
     ],
+    extras_require={
+        'numpy': ['numpy'],
+        'parallel': ['futures; python_version < "3"']
+    },
     classifiers=[
         'Development Status :: 4 - Beta',
         'Intended Audience :: Developers',
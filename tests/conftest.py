@@ -0,0 +1,4 @@
+import os, sys
+
+# The test modules of every directory import the shared helpers module.
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -0,0 +1,67 @@
+"""Helpers shared by the tests."""
+from flexo.typing import BaseType, StringType, LongType, FloatType,\
+        BooleanType, ListType, MapType, DatetimeType, FormationType
+
+from mock import MagicMock
+
+import datetime
+
+def make_field(name, type, required=True):
+    """Returns a mock field of the given type, which validates values with
+    the type."""
+    field = MagicMock()
+    field.name = name
+    field.type = type
+    field.required = required
+    field.validate = type.validate
+    return field
+
+class Field(object):
+    """A field of the given type which, unlike the mocks returned by
+    :func:`make_field`, can be pickled."""
+    def __init__(self, name, type, required=True):
+        self.name = name
+        self.type = type
+        self.required = required
+
+    def validate(self, value):
+        self.type.validate(value)
+
+class MockType(BaseType):
+    """A type whose `validate` is a mock, accepting every value."""
+    def __init__(self):
+        self.validate = MagicMock()
+
+def make_item(*fields):
+    """Returns the formation of an order item, with a sku, the given fields
+    and an optional count."""
+    return FormationType("item", "item",
+            [make_field("sku", StringType(minLength=1, maxLength=8))] +\
+            list(fields) +\
+            [make_field("count", LongType(minValue=1L), required=False)])
+
+def make_order(price_type=None):
+    """Returns the formation of an order with an id, a datetime, a list of
+    priced items and optional paid flag and tags, holding a value of each
+    kind of type.
+
+    :param price_type: The type of the prices of the items, by default a
+                       non-negative float.
+    """
+    item = make_item(make_field("price",
+        price_type or FloatType(minValue=0.0)))
+    return FormationType("order", "order", [
+        make_field("id", LongType()),
+        make_field("created", DatetimeType()),
+        make_field("paid", BooleanType(), required=False),
+        make_field("items", ListType(item)),
+        make_field("tags", MapType(StringType(), StringType()),
+            required=False)])
+
+def make_order_value():
+    """Returns a valid value of :func:`make_order`."""
+    return {"id": -2L**70,
+            "created": datetime.datetime(1960, 9, 1, 12, 30, 0, 5),
+            "paid": False, "tags": {u"\u00e9": u"b\n"},
+            "items": [{"sku": u"abc", "price": 1.5, "count": 2L},
+                {"sku": u"\u00e9", "price": 1e100}]}
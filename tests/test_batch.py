@@ -0,0 +1,168 @@
+import pytest
+
+import flexo.batch
+from flexo.typing import FormationType, LongType, PositiveLongType,\
+        FloatType, PositiveFloatType, StringType, ListType, EnumType
+from flexo.errors import ValidationError, BatchValidationError
+
+from mock import patch
+from helpers import make_field
+
+def make_formation():
+    return FormationType("test", "test", [
+        make_field("id", PositiveLongType()),
+        make_field("price", PositiveFloatType(maxValue=100.0)),
+        make_field("name", StringType(minLength=1, maxLength=3),
+            required=False),
+        make_field("tags", ListType(StringType()), required=False)])
+
+def make_records(count):
+    return [{"id": long(i), "price": 1.5, "name": "abc", "tags": ["a"]}\
+            for i in range(count)]
+
+@pytest.fixture(params=[True, False])
+def use_numpy(request):
+    if request.param and flexo.batch.numpy is None:
+        pytest.skip("numpy is not installed")
+    numpy = flexo.batch.numpy if request.param else None
+    with patch.object(flexo.batch, "numpy", numpy):
+        yield request.param
+
+def test_validate_batch_not_list():
+    with pytest.raises(ValidationError):
+        make_formation().validate_batch({})
+
+@pytest.mark.parametrize("count", [0, 10, 200])
+def test_validate_batch(use_numpy, count):
+    make_formation().validate_batch(make_records(count))
+
+def test_validate_batch_failing_rows(use_numpy):
+    records = make_records(200)
+    records[3]["id"] = -1L
+    records[7]["price"] = 100.5
+    records[7]["name"] = ""
+    records[50]["name"] = "abcd"
+    records[60]["tags"] = [1L]
+    records[70]["id"] = 1
+    records[80] = "test"
+    del records[90]["price"]
+    records[100]["other"] = 1L
+
+    with pytest.raises(BatchValidationError) as e:
+        make_formation().validate_batch(records)
+
+    assert e.value.rows == [3, 7, 50, 60, 70, 80, 90, 100]
+    assert [row for row, _ in e.value.failures] ==\
+            [3, 7, 7, 50, 60, 70, 80, 90, 100]
+
+def test_validate_batch_optional_none(use_numpy):
+    records = make_records(10)
+    records[2]["name"] = None
+    del records[4]["name"]
+
+    with pytest.raises(BatchValidationError) as e:
+        make_formation().validate_batch(records)
+
+    assert e.value.rows == [2]
+    assert e.value.failures[0][1].constraint == "type"
+
+def test_failing_positions_long_overflow(use_numpy):
+    values = [2L**70, 1L] * 50
+    positions = flexo.batch.failing_positions(LongType(maxValue=10L), values)
+
+    assert positions == range(0, 100, 2)
+
+def test_failing_positions_float_bounds(use_numpy):
+    values = [float(i) for i in range(100)]
+    positions = flexo.batch.failing_positions(
+            FloatType(minValue=10.0, maxValue=89.5), values)
+
+    assert positions == range(10) + range(90, 100)
+
+@pytest.mark.parametrize("values", [[u"a", u"x", "b", 1L] * 25,
+    [1L, 5L, 2L, True] * 25])
+def test_failing_positions_enum(use_numpy, values):
+    schema = EnumType([u"a", u"b"]) if isinstance(values[0], unicode)\
+            else EnumType([1L, 2L])
+
+    assert flexo.batch.failing_positions(schema, values) ==\
+            sorted(range(1, 100, 4) + range(3, 100, 4))
+
+def test_failing_positions_enum_array(use_numpy):
+    if not use_numpy:
+        pytest.skip("arrays require numpy")
+    numpy = flexo.batch.numpy
+    values = numpy.array([1, 5, 2, 7] * 25)
+
+    assert flexo.batch.failing_positions(EnumType([1L, 2L]), values) ==\
+            sorted(range(1, 100, 4) + range(3, 100, 4))
+
+def make_columns(count):
+    return {"id": [long(i) for i in range(count)],
+            "price": [1.5] * count,
+            "name": ["abc", None] * (count / 2)}
+
+def test_validate_columns_not_dict():
+    with pytest.raises(ValidationError):
+        make_formation().validate_columns([])
+
+@pytest.mark.parametrize("count", [0, 10, 200])
+def test_validate_columns(use_numpy, count):
+    make_formation().validate_columns(make_columns(count))
+
+def test_validate_columns_structure():
+    columns = make_columns(10)
+    columns["other"] = [1L] * 10
+    with pytest.raises(ValidationError):
+        make_formation().validate_columns(columns)
+
+    columns = make_columns(10)
+    del columns["price"]
+    with pytest.raises(ValidationError):
+        make_formation().validate_columns(columns)
+
+    columns = make_columns(10)
+    columns["price"].append(1.5)
+    with pytest.raises(ValidationError):
+        make_formation().validate_columns(columns)
+
+@pytest.mark.parametrize("column", [5L, "abc", None, {1: 1L}])
+def test_validate_columns_not_sequence(column):
+    columns = make_columns(3)
+    columns["id"] = column
+
+    with pytest.raises(ValidationError) as e:
+        make_formation().validate_columns(columns)
+    assert e.value.constraint == "type"
+    assert e.value.path == ["id"]
+
+def test_validate_columns_failing_rows(use_numpy):
+    columns = make_columns(200)
+    columns["id"][3] = -1L
+    columns["id"][5] = None
+    columns["price"][7] = 100.5
+    columns["name"][50] = "abcd"
+    columns["tags"] = [["a"]] * 200
+    columns["tags"][60] = [1L]
+
+    with pytest.raises(BatchValidationError) as e:
+        make_formation().validate_columns(columns)
+
+    assert e.value.rows == [3, 5, 7, 50, 60]
+
+def test_validate_columns_arrays():
+    numpy = pytest.importorskip("numpy")
+    columns = {"id": numpy.arange(100), "price": numpy.ones(100) * 200.0,
+            "name": numpy.array(["abcd", "a"] * 50)}
+
+    with pytest.raises(BatchValidationError) as e:
+        make_formation().validate_columns(columns)
+
+    assert e.value.rows == range(100)
+    assert len(e.value.failures) == 150
+
+    columns["id"] = numpy.arange(100, dtype=numpy.float64)
+    with pytest.raises(BatchValidationError) as e:
+        make_formation().validate_columns(columns)
+
+    assert len(e.value.failures) == 250
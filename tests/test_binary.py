@@ -0,0 +1,152 @@
+import pytest, datetime, mmap, tempfile
+
+from flexo.binary import BinaryCodec, read_varint, write_varint
+from flexo.typing import StringType, LongType, FloatType, ListType,\
+        MapType, DatetimeType, EnumType
+from flexo.errors import ValidationError
+
+from helpers import MockType, make_order, make_order_value
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 300, 2**64])
+def test_varint(value):
+    parts = []
+    write_varint(value, parts.append)
+
+    assert read_varint("".join(parts) + "x", 0) == (value, len("".join(parts)))
+
+def test_round_trip():
+    codec = BinaryCodec(make_order())
+    value = make_order_value()
+    encoded = codec.encode(value)
+
+    assert codec.decode(encoded) == value
+    assert codec.skip(encoded, 0) == len(encoded)
+    assert "sku" not in encoded
+
+def test_optional_fields_absent():
+    codec = BinaryCodec(make_order())
+    value = make_order_value()
+    del value["paid"]
+    del value["tags"]
+    del value["items"][0]["count"]
+
+    assert codec.decode(codec.encode(value)) == value
+
+def test_decode_from_mmap():
+    codec = BinaryCodec(ListType(make_order()))
+    value = [make_order_value()] * 3
+    with tempfile.TemporaryFile() as f:
+        f.write(codec.encode(value))
+        f.flush()
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            assert codec.decode(buf) == value
+        finally:
+            buf.close()
+
+def test_aware_datetime():
+    class Offset(datetime.tzinfo):
+        def utcoffset(self, dt):
+            return datetime.timedelta(hours=2)
+
+    codec = BinaryCodec(DatetimeType())
+    value = datetime.datetime(2016, 1, 1, 12, tzinfo=Offset())
+
+    assert codec.decode(codec.encode(value)) ==\
+            datetime.datetime(2016, 1, 1, 10)
+
+def test_decode_validates():
+    codec = BinaryCodec(ListType(make_order()))
+    value = make_order_value()
+    value["items"][1]["price"] = -1.0
+    encoded = BinaryCodec(ListType(make_order(FloatType()))).encode(
+            [make_order_value(), value])
+
+    with pytest.raises(ValidationError) as e:
+        codec.decode(encoded)
+    assert e.value.path == [1, "items", 1, "price"]
+
+@pytest.mark.parametrize("name, field_value", [("id", "abc"),
+    ("id", 1.5), ("paid", "yes"), ("created", "2016-09-01"),
+    ("tags", {u"a": 1L}), ("items", [1L])])
+def test_encode_validates_scalars(name, field_value):
+    codec = BinaryCodec(make_order())
+    value = make_order_value()
+    value[name] = field_value
+
+    with pytest.raises(ValidationError) as e:
+        codec.encode(value)
+    assert e.value.path[0] == name
+
+def test_encode_rejects_invalid_utf8():
+    codec = BinaryCodec(MapType(StringType(), StringType()))
+    assert codec.decode(codec.encode({"a": u"\u00e9".encode("utf-8")})) ==\
+            {u"a": u"\u00e9"}
+
+    for value in [{"a": "\xff"}, {"\xe9": "a"}]:
+        with pytest.raises(ValidationError) as e:
+            codec.encode(value)
+        assert e.value.constraint == "encoding"
+
+def test_encode_validates_bounds():
+    codec = BinaryCodec(ListType(make_order()))
+    value = make_order_value()
+    value["items"][0]["price"] = -1.0
+
+    with pytest.raises(ValidationError) as e:
+        codec.encode([value])
+    assert e.value.path == [0, "items", 0, "price"]
+
+def test_encode_rejects_invalid_structure():
+    codec = BinaryCodec(make_order())
+    value = make_order_value()
+    value["bogus"] = 1L
+    with pytest.raises(ValidationError):
+        codec.encode(value)
+
+    value = make_order_value()
+    del value["id"]
+    with pytest.raises(ValidationError):
+        codec.encode(value)
+
+    value = make_order_value()
+    value["items"] = {}
+    with pytest.raises(ValidationError):
+        codec.encode(value)
+
+def test_truncated():
+    codec = BinaryCodec(make_order())
+    encoded = codec.encode(make_order_value())
+
+    for end in [0, 5, len(encoded) - 1]:
+        with pytest.raises(ValueError):
+            codec.decode(encoded[:end])
+
+def test_custom_type():
+    custom = MockType()
+    codec = BinaryCodec(ListType(custom))
+
+    assert codec.decode(codec.encode([{"a": [1L]}])) == [{"a": [1L]}]
+    custom.validate.assert_called_with({"a": [1L]})
+
+def test_enum():
+    codec = BinaryCodec(MapType(EnumType([u"a", u"\u00e9"]),
+        ListType(EnumType([-1L, 2L**70]))))
+    value = {u"\u00e9": [-1L, 2L**70], u"a": []}
+
+    assert codec.decode(codec.encode(value)) == value
+    invalid = BinaryCodec(MapType(StringType(), ListType(LongType())))
+    with pytest.raises(ValidationError) as e:
+        codec.decode(invalid.encode({u"a": [3L]}))
+    assert e.value.constraint == "enum"
+    assert e.value.path == [u"a", 0]
+
+def test_max_length():
+    encoded = BinaryCodec(ListType(LongType())).encode([1L, 2L, 3L])
+    codec = BinaryCodec(ListType(LongType(), maxLength=2))
+
+    for encode in [lambda: codec.encode([1L, 2L, 3L]),
+            lambda: codec.decode(encoded)]:
+        with pytest.raises(ValidationError) as e:
+            encode()
+        assert e.value.constraint == "maxLength"
@@ -0,0 +1,49 @@
+import pytest
+
+from flexo.budget import PayloadBudget
+from flexo.typing import StringType, ListType, MapType
+from flexo.errors import ValidationError
+
+def error(budget, value):
+    with pytest.raises(ValidationError) as e:
+        budget.check(value)
+    return e.value
+
+def test_within_budget():
+    PayloadBudget(max_depth=2, max_elements=4, max_string_length=5).check(
+            {"ab": ["c", "d"], "e": 1L})
+    PayloadBudget().check([[[[]]]])
+
+def test_max_depth():
+    value = []
+    for i in range(5000):
+        value = [value]
+    e = error(PayloadBudget(max_depth=3), value)
+
+    assert e.constraint == "maxDepth"
+    assert e.path == [0, 0, 0]
+
+def test_max_elements():
+    e = error(PayloadBudget(max_elements=3), {"a": [1L, 2L], "b": [3L]})
+
+    assert e.constraint == "maxElements"
+    assert e.details["limit"] == 3
+
+def test_max_string_length():
+    e = error(PayloadBudget(max_string_length=3), {"a": [u"bc", u"de"]})
+
+    assert e.constraint == "maxStringLength"
+    assert e.path[0] == "a"
+
+def test_validator():
+    validate = PayloadBudget(max_elements=3).validator(
+            MapType(StringType(), ListType(StringType(maxLength=1))))
+    validate({"a": ["b"]})
+
+    with pytest.raises(ValidationError) as e:
+        validate({"a": ["b", "c", "d"]})
+    assert e.value.constraint == "maxElements"
+
+    with pytest.raises(ValidationError) as e:
+        validate({"a": ["bc"]})
+    assert e.value.constraint == "maxLength"
@@ -0,0 +1,113 @@
+import pytest, datetime, re
+
+from flexo.cache import ValidationCache
+from flexo.typing import BaseType, StringType, LongType, ListType
+from flexo.errors import ValidationError
+
+from helpers import MockType
+
+def test_hashable_values():
+    schema = MockType()
+    cache = ValidationCache()
+
+    for value in ["US", "US", u"US", 1, 1L, 1.0, True, 1]:
+        cache.validate(schema, value)
+
+    assert schema.validate.call_count == 6
+    assert (cache.hits, cache.misses) == (2, 6)
+
+def test_unhashable_values():
+    schema = MockType()
+    cache = ValidationCache()
+
+    cache.validate(schema, {"a": [1, 2], "b": {"c": None}})
+    cache.validate(schema, {"b": {"c": None}, "a": [1, 2]})
+    cache.validate(schema, {"a": [1, 2.0], "b": {"c": None}})
+    cache.validate(schema, {"a": (1, 2), "b": {"c": None}})
+
+    assert schema.validate.call_count == 3
+    assert cache.hits == 1
+
+def test_digest_size_cutoff():
+    schema = MockType()
+    cache = ValidationCache(max_digest_size=10)
+
+    cache.validate(schema, range(20))
+    cache.validate(schema, range(20))
+    cache.validate(schema, [object()])
+
+    assert schema.validate.call_count == 3
+    assert cache.skipped == 3
+    assert len(cache) == 0
+
+def test_lru_eviction():
+    schema = MockType()
+    cache = ValidationCache(maxsize=2)
+
+    for value in ["a", "b", "a", "c", "a", "b"]:
+        cache.validate(schema, value)
+
+    assert len(cache) == 2
+    assert [c[0][0] for c in schema.validate.call_args_list] ==\
+            ["a", "b", "c", "b"]
+
+def test_invalid_values_not_cached():
+    validate = ValidationCache().validator(StringType(maxLength=1))
+
+    for i in range(2):
+        with pytest.raises(ValidationError):
+            validate("ab")
+
+def test_validator_keys_by_type():
+    cache = ValidationCache()
+    schema = StringType()
+    validate_string = cache.validator(schema)
+    validate_long = cache.validator(LongType())
+
+    validate_string("1")
+    with pytest.raises(ValidationError):
+        validate_long("1")
+    cache.validator(schema)("1")
+    cache.validator(StringType())("1")
+
+    assert (cache.hits, cache.misses) == (1, 3)
+
+class PatternType(BaseType):
+    __slots__ = ('pattern',)
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+
+    def validate(self, value):
+        if not re.match(self.pattern + "$", value):
+            raise ValidationError("mismatch")
+
+def test_custom_types_not_shared():
+    cache = ValidationCache()
+    cache.validator(ListType(PatternType("a+")))(["aaa"])
+
+    with pytest.raises(ValidationError):
+        cache.validator(ListType(PatternType("b+")))(["aaa"])
+
+def test_disable():
+    schema = MockType()
+    cache = ValidationCache()
+    cache.validate(schema, "a")
+
+    cache.disable(schema)
+    cache.validate(schema, "a")
+    assert len(cache) == 0
+    assert schema.validate.call_count == 2
+
+    cache.enable(schema)
+    cache.validate(schema, "a")
+    cache.validate(schema, "a")
+    assert schema.validate.call_count == 3
+
+def test_clear():
+    cache = ValidationCache()
+    cache.validate(StringType(), datetime.datetime.now().isoformat())
+    cache.clear()
+
+    assert len(cache) == 0
+    assert cache.misses == 0
@@ -0,0 +1,91 @@
+import pytest
+
+from flexo.collect import ErrorCollector, field_errors, validate_all
+from flexo.typing import StringType, LongType, ListType, MapType,\
+        FormationType
+from flexo.errors import ValidationError, MultipleValidationError
+
+from helpers import make_field
+
+def make_formation():
+    return FormationType("item", "An item", [
+        make_field("name", StringType(1)),
+        make_field("price", LongType(0L)),
+        make_field("tags", ListType(StringType(), maxLength=2),
+            required=False)])
+
+def test_ctor():
+    with pytest.raises(TypeError):
+        ErrorCollector("x")
+
+def test_valid():
+    collector = ErrorCollector(ListType(make_formation()))
+
+    assert collector.errors([{"name": u"a", "price": 1L}]) == []
+    collector.validate([{"name": u"a", "price": 1L, "tags": [u"x"]}])
+
+def test_all_list_errors():
+    errors = ErrorCollector(ListType(LongType(0L))).errors([1L, -1L, "x", -2L])
+
+    assert [e.path for e in errors] == [[1], [2], [3]]
+    assert [e.constraint for e in errors] == ["minValue", "type", "minValue"]
+
+def test_nested_paths():
+    value = [{"name": u"", "price": 1L}, {"price": "x", "tags": [1L, u"y"],
+        "extra": 1L}]
+    errors = ErrorCollector(ListType(make_formation())).errors(value)
+
+    found = sorted((e.path, e.constraint) for e in errors)
+    assert found == [([0, "name"], "minLength"), ([1], "required"),
+            ([1, "extra"], "field"), ([1, "price"], "type"),
+            ([1, "tags", 0], "type")]
+
+def test_formation_not_dict():
+    errors = ErrorCollector(ListType(make_formation())).errors([[1L], None])
+
+    assert [(e.path, e.constraint) for e in errors] == [([0], "type"),
+            ([1], "type")]
+    assert [e.constraint for e in field_errors({}, "x")] == ["type"]
+
+def test_container_errors():
+    schema = ListType(LongType(), maxLength=2)
+
+    errors = ErrorCollector(MapType(StringType(), schema)).errors(
+            {u"a": "x", u"b": [1L, 2L, 3L], 1L: [1L]})
+
+    assert sorted((e.path, e.constraint) for e in errors) == [([1L], "type"),
+            ([u"a"], "type"), ([u"b"], "maxLength")]
+
+def test_max_errors():
+    collector = ErrorCollector(ListType(LongType()))
+    value = ["x"] * 100
+
+    errors = collector.errors(value, max_errors=3)
+    assert [e.path for e in errors] == [[0], [1], [2]]
+
+    with pytest.raises(MultipleValidationError) as e:
+        collector.validate(value, max_errors=3)
+    assert e.value.truncated
+    assert str(e.value).startswith("at least 3 errors, first: [0]: ")
+
+def test_validate_all():
+    with pytest.raises(MultipleValidationError) as e:
+        validate_all(ListType(LongType()), [1L, "x", "y"])
+
+    assert isinstance(e.value, ValidationError)
+    assert e.value.constraint == "multiple"
+    assert not e.value.truncated
+    assert [error.path for error in e.value.errors] == [[1], [2]]
+    assert str(e.value).startswith("2 errors, first: [1]: ")
+
+def test_field_errors():
+    fields = {"name": make_field("name", StringType(1)),
+            "price": make_field("price", LongType())}
+
+    errors = field_errors(fields, {"name": u"", "other": 1L}, "item")
+
+    assert sorted((e.path, e.constraint) for e in errors) == [([], "required"),
+            (["name"], "minLength"), (["other"], "field")]
+    assert len(field_errors(fields, {"name": u"", "other": 1L}, "item",
+        max_errors=1)) == 1
+    assert field_errors(fields, {"name": u"a", "price": 1L}) == []
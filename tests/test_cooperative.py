@@ -0,0 +1,97 @@
+import pytest
+
+from flexo.cooperative import validation_steps, validate_cooperatively,\
+        offload
+from flexo.typing import StringType, LongType, ListType, MapType,\
+        FormationType
+from flexo.errors import ValidationError
+
+from concurrent.futures import ThreadPoolExecutor
+from mock import MagicMock
+from helpers import make_field, MockType
+
+def make_schema():
+    item = FormationType("item", "item", [
+        make_field("id", LongType(minValue=0L)),
+        make_field("tags", MapType(StringType(), StringType(), maxLength=2),
+            required=False)])
+    return ListType(item)
+
+def error(validate, value):
+    with pytest.raises(ValidationError) as e:
+        validate(value)
+    return e.value
+
+def test_yields_every_step():
+    value = [{"id": long(i)} for i in range(100)]
+    steps = list(validation_steps(make_schema(), value, step=10))
+
+    assert len(steps) == 20
+
+def test_interval():
+    value = [{"id": long(i)} for i in range(10)]
+
+    assert len(list(validation_steps(make_schema(), value, step=1000,
+        interval=0.0))) == 20
+
+@pytest.mark.parametrize("value", [
+    [{"id": 1L}, {"id": -1L}],
+    [{"id": 1L}, {"bogus": 1L}],
+    [{"id": 1L, "tags": {"a": 1L}}],
+    [{"tags": {}}],
+    {"id": 1L},
+    [{"id": "x"}],
+    [{"id": 1L, "tags": {"a": "b", "c": "d", "e": "f"}}]])
+def test_errors_match_validate(value):
+    schema = make_schema()
+    expected = error(schema.validate, value)
+    actual = error(lambda v: list(validation_steps(schema, v, step=1)), value)
+
+    assert str(actual) == str(expected)
+    assert actual.path == expected.path
+
+def test_validate_cooperatively():
+    pause = MagicMock()
+    validate_cooperatively(make_schema(), [{"id": 1L}] * 5, step=2,
+            pause=pause)
+
+    assert pause.call_count == 5
+
+def test_other_types():
+    custom = MockType()
+
+    assert list(validation_steps(ListType(custom), ["a"])) == []
+    custom.validate.assert_called_with("a")
+    with pytest.raises(ValidationError):
+        list(validation_steps(StringType(), 1L))
+
+def test_offload():
+    schema = ListType(LongType())
+    executor = ThreadPoolExecutor(1)
+    try:
+        assert offload(executor, schema, [1L] * 10,
+                threshold=5).result() is None
+        assert offload(executor, schema, [1L], threshold=5).result() is None
+        with pytest.raises(ValidationError):
+            offload(executor, schema, [1L] * 9 + ["x"], threshold=5).result()
+        with pytest.raises(ValidationError):
+            offload(executor, schema, ["x"], threshold=5).result()
+    finally:
+        executor.shutdown()
+
+@pytest.mark.parametrize("value", [[1L], [1L] * 10])
+def test_offload_other_errors(value):
+    schema = MagicMock()
+    schema.validate.side_effect = RuntimeError("test")
+    executor = ThreadPoolExecutor(1)
+    try:
+        future = offload(executor, schema, value, threshold=5)
+        with pytest.raises(RuntimeError):
+            future.result()
+    finally:
+        executor.shutdown()
+
+def test_method():
+    value = [{"id": long(i)} for i in range(10)]
+
+    assert len(list(make_schema().validation_steps(value, step=5))) == 4
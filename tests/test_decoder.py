@@ -0,0 +1,127 @@
+import pytest, datetime, json, math
+
+from flexo.decoder import SchemaDecoder, parse_datetime
+from flexo.typing import StringType, LongType, FloatType, ListType,\
+        MapType, DatetimeType, EnumType, FormationType
+from flexo.errors import ValidationError
+
+from helpers import make_field, MockType, make_order
+
+def test_parse_datetime():
+    assert parse_datetime(u"2016-09-01T12:30:15.25Z") ==\
+            datetime.datetime(2016, 9, 1, 12, 30, 15, 250000)
+    assert parse_datetime(u"2016-09-01T12:30+02:00") ==\
+            datetime.datetime(2016, 9, 1, 10, 30)
+    assert parse_datetime(u"2016-09-01 12:30:00-0130") ==\
+            datetime.datetime(2016, 9, 1, 14, 0)
+
+    for value in [u"2016-09-01", u"2016-13-01T00:00", u"x"]:
+        with pytest.raises(ValueError):
+            parse_datetime(value)
+
+@pytest.mark.parametrize("text", [u"0001-01-01T00:00+01:00",
+    u"9999-12-31T23:59-01:00"])
+def test_datetime_out_of_range(text):
+    with pytest.raises(ValueError):
+        parse_datetime(text)
+
+    decoder = SchemaDecoder(ListType(FormationType("event", "event",
+        [make_field("at", DatetimeType())])))
+    with pytest.raises(ValidationError) as e:
+        decoder.decode(json.dumps([{"at": text}]))
+    assert e.value.constraint == "type"
+    assert e.value.path == [0, "at"]
+
+def test_decode():
+    document = json.dumps({"id": 1, "created": "2016-09-01T12:30:00Z",
+        "paid": True, "tags": {"a": "b"},
+        "items": [{"sku": "abc", "price": 1.5, "count": 2},
+            {"sku": u"\u00e9", "price": 0.0}]})
+    value = SchemaDecoder(make_order()).decode(document)
+
+    assert value == {"id": 1L, "created": datetime.datetime(2016, 9, 1, 12, 30),
+            "paid": True, "tags": {"a": "b"},
+            "items": [{"sku": "abc", "price": 1.5, "count": 2L},
+                {"sku": u"\u00e9", "price": 0.0}]}
+    assert isinstance(value["id"], long)
+    make_order().validate(value)
+
+@pytest.mark.parametrize("document, path", [
+    ('{"id": 1, "bogus": [', ["bogus"]),
+    ('{"id": 1.5, "created": "2016-09-01T00:00", "items": []}', ["id"]),
+    ('{"id": 1, "created": "yesterday", "items": []}', ["created"]),
+    ('{"id": 1, "created": "2016-09-01T00:00", "items": ['
+        '{"sku": "abcdefghi", "price": 1.0}]}', ["items", 0, "sku"]),
+    ('{"id": 1, "created": "2016-09-01T00:00", "items": ['
+        '{"sku": "a", "price": 1.0}, {"sku": "a", "price": 1}]}',
+        ["items", 1, "price"]),
+    ('{"id": 1, "created": "2016-09-01T00:00", "items": [], '
+        '"tags": {"a": null}}', ["tags", "a"]),
+    ('{"id": 1, "created": "2016-09-01T00:00", "items": [1]}',
+        ["items", 0]),
+    ('{"id": 1, "items": []}', [])])
+def test_decode_invalid(document, path):
+    with pytest.raises(ValidationError) as e:
+        SchemaDecoder(make_order()).decode(document)
+
+    assert e.value.path == path
+
+@pytest.mark.parametrize("document", ['{"a": [1, 2', '{"a": [1 2]}',
+    '{"a" [1]}', '{"a": [1],}', '{"a": [1]} 2', '{1: [1]}', ''])
+def test_decode_malformed(document):
+    with pytest.raises(ValueError):
+        SchemaDecoder(MapType(StringType(), ListType(LongType()))).decode(
+                document)
+
+def test_float_constants():
+    value = SchemaDecoder(ListType(FloatType())).decode(
+            "[NaN, Infinity, -Infinity, 1e3]")
+
+    assert math.isnan(value[0])
+    assert value[1:] == [float("inf"), float("-inf"), 1000.0]
+
+def test_custom_type():
+    custom = MockType()
+
+    assert SchemaDecoder(ListType(custom)).decode('[{"a": [1]}]') ==\
+            [{"a": [1L]}]
+    custom.validate.assert_called_with({"a": [1L]})
+
+def test_enum():
+    decoder = SchemaDecoder(MapType(EnumType([u"a", u"b"]),
+        ListType(EnumType([1L, 2L]))))
+
+    assert decoder.decode('{"a": [1, 2], "b": []}') == {u"a": [1L, 2L],
+            u"b": []}
+    for document, path in [('{"c": []}', [u"c"]), ('{"a": [3]}', [u"a", 0]),
+            ('{"a": ["1"]}', [u"a", 0])]:
+        with pytest.raises(ValidationError) as e:
+            decoder.decode(document)
+        assert e.value.path == path
+
+def test_max_length():
+    schema = MapType(StringType(), ListType(DatetimeType(), maxLength=2),
+            maxLength=1)
+    decoder = SchemaDecoder(schema)
+    at = '"2016-09-01T00:00"'
+
+    assert decoder.decode('{"a": [%s, %s], "a": []}' % (at, at)) ==\
+            {"a": []}
+    with pytest.raises(ValidationError) as e:
+        decoder.decode('{"a": [%s, %s, %s, ' % (at, at, at))
+    assert e.value.constraint == "maxLength"
+    assert e.value.path == ["a"]
+    with pytest.raises(ValidationError) as e:
+        decoder.decode('{"a": [], "b": ')
+    assert e.value.path == []
+
+def test_values_without_datetimes_scanned_whole():
+    decoder = SchemaDecoder(MapType(StringType(), ListType(LongType(),
+        maxLength=2)))
+
+    assert decoder.decode('{"a": [1, 2]}') == {"a": [1L, 2L]}
+    with pytest.raises(ValidationError) as e:
+        decoder.decode('{"a": [1, 2, 3]}')
+    assert e.value.path == ["a"]
+    with pytest.raises(ValueError):
+        decoder.decode('{"a": [1, 2, 3, ')
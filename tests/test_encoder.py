@@ -0,0 +1,99 @@
+import pytest, json
+
+from flexo.encoder import SchemaEncoder
+from flexo.decoder import SchemaDecoder
+from flexo.typing import LongType, FloatType, ListType, MapType, EnumType,\
+        FormationType
+from flexo.errors import ValidationError
+
+from helpers import make_field, MockType, make_order, make_order_value
+
+@pytest.mark.parametrize("validate", [True, False])
+def test_encode(validate):
+    value = make_order_value()
+    encoded = SchemaEncoder(make_order(), validate=validate).encode(value)
+
+    expected = dict(value, created="1960-09-01T12:30:00.000005")
+    assert json.loads(encoded) == expected
+    assert SchemaDecoder(make_order()).decode(encoded) == value
+    assert " " not in encoded.replace('"b\\n"', "")
+
+def test_encode_into():
+    encoder = SchemaEncoder(ListType(FloatType()))
+    buffer = []
+    encoder.encode_into([1.0, float("nan")], buffer)
+    buffer.append("\n")
+    encoder.encode_into([float("-inf")], buffer)
+
+    assert "".join(buffer) == "[1.0,NaN]\n[-Infinity]"
+
+def test_encode_into_invalid():
+    encoder = SchemaEncoder(make_order(), validate=True)
+    value = make_order_value()
+    value["items"][1]["sku"] = ""
+    buffer = ["[1]"]
+
+    with pytest.raises(ValidationError):
+        encoder.encode_into(value, buffer)
+    assert buffer == ["[1]"]
+
+@pytest.mark.parametrize("change, path", [
+    (lambda v: v.update(id=1), ["id"]),
+    (lambda v: v["items"][1].update(sku=""), ["items", 1, "sku"]),
+    (lambda v: v["tags"].update({1L: "a"}), ["tags", 1L]),
+    (lambda v: v.update(items={}), ["items"]),
+    (lambda v: v["items"].append(1L), ["items", 2]),
+    (lambda v: v.pop("created"), [])])
+def test_encode_validating(change, path):
+    value = make_order_value()
+    change(value)
+
+    with pytest.raises(ValidationError) as e:
+        SchemaEncoder(make_order(), validate=True).encode(value)
+    assert e.value.path == path
+
+def test_encode_trusted_rejects_unknown_fields():
+    value = make_order_value()
+    value["bogus"] = 1L
+
+    with pytest.raises(ValidationError):
+        SchemaEncoder(make_order()).encode(value)
+
+def test_encode_trusted_rejects_nested_unknown_fields():
+    value = make_order_value()
+    value["items"][1]["bogus"] = 1L
+
+    with pytest.raises(ValidationError) as e:
+        SchemaEncoder(make_order()).encode(value)
+    assert e.value.constraint == "field"
+    assert e.value.path == ["items", 1, "bogus"]
+
+def test_custom_type():
+    custom = MockType()
+
+    assert SchemaEncoder(ListType(custom), validate=True).encode(
+            [{"a": [1L]}]) == '[{"a":[1]}]'
+    custom.validate.assert_called_with({"a": [1L]})
+
+@pytest.mark.parametrize("validate", [True, False])
+def test_encode_enum(validate):
+    encoder = SchemaEncoder(MapType(EnumType([u"a", u"\u00e9"]),
+        ListType(EnumType([1L, 2L]))), validate=validate)
+
+    assert encoder.encode({u"\u00e9": [1L, 2L]}) == '{"\\u00e9":[1,2]}'
+
+def test_encode_enum_validating():
+    encoder = SchemaEncoder(ListType(EnumType([1L, 2L])), validate=True)
+
+    with pytest.raises(ValidationError) as e:
+        encoder.encode([1L, 3L])
+    assert e.value.constraint == "enum"
+    assert e.value.path == [1]
+
+def test_encode_max_length():
+    item = FormationType("item", "item", [make_field("a", LongType())])
+    encoder = SchemaEncoder(ListType(item, maxLength=1), validate=True)
+
+    with pytest.raises(ValidationError) as e:
+        encoder.encode([{"a": 1L}, {"a": 2L}])
+    assert e.value.constraint == "maxLength"
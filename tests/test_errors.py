@@ -0,0 +1,77 @@
+import pickle
+
+from flexo.errors import ValidationError, BatchValidationError
+
+def test_plain_message():
+    e = ValidationError("test %s")
+
+    assert str(e) == "test %s"
+    assert e.path == []
+
+def test_message_rendered_lazily():
+    value = range(10000)
+    e = ValidationError("%(value)s: expected %(expected)s, limit %(limit)s",
+            value, expected="dict", constraint="type", limit=3)
+
+    assert e.value is value
+    assert e.constraint == "type"
+    assert e.details == {"limit": 3}
+    assert str(e).startswith("[0, 1, 2")
+    assert str(e).endswith(": expected dict, limit 3")
+    assert len(e.preview()) <= ValidationError.preview_length
+
+def test_repr_rendered():
+    e = ValidationError("%(value)s: expected %(expected)s", 1L,
+            expected="string")
+    e.push_path("id")
+
+    assert repr(e) == "ValidationError('id: 1L: expected string')"
+    assert repr(BatchValidationError([(0, e)])) ==\
+            "BatchValidationError('1 invalid records, first at row 0: "\
+            "id: 1L: expected string')"
+
+def test_preview_truncated():
+    e = ValidationError("%(value)s", "a" * 1000)
+
+    assert len(str(e)) <= ValidationError.preview_length
+    assert "..." in str(e)
+
+def test_preview_truncated_unicode():
+    e = ValidationError("%(value)s", u"\u00e9" * 1000)
+
+    assert e.preview().startswith("u'\\xe9")
+    assert len(e.preview()) <= ValidationError.preview_length
+    assert "..." in e.preview()
+
+def test_path():
+    e = ValidationError("test")
+    e.push_path("price")
+    e.push_path(42)
+    e.push_path("items")
+
+    assert e.path == ["items", 42, "price"]
+    assert e.path_string == "items[42].price"
+    assert str(e) == "items[42].price: test"
+
+def test_path_non_identifier_key():
+    e = ValidationError("test")
+    e.push_path("a key")
+    e.push_path(0)
+
+    assert e.path_string == "[0]['a key']"
+
+def test_pickle():
+    e = ValidationError("%(value)s is bad", 1L, constraint="minValue")
+    e.push_path("test")
+    copy = pickle.loads(pickle.dumps(e, 2))
+
+    assert str(copy) == str(e)
+    assert copy.constraint == "minValue"
+
+def test_batch_error():
+    e = BatchValidationError([(1, ValidationError("one")),
+        (1, ValidationError("two")), (5, ValidationError("three"))])
+
+    assert e.rows == [1, 5]
+    assert str(e) == "2 invalid records, first at row 1: one"
+    assert pickle.loads(pickle.dumps(e)).rows == [1, 5]
@@ -0,0 +1,74 @@
+import pytest
+
+from flexo.instrumentation import Collector, add_hook, remove_hook
+from flexo.typing import LongType, ListType, FormationType
+from flexo.utils import _hooks
+from flexo.errors import ValidationError
+
+from mock import MagicMock
+from helpers import make_field, make_item
+
+def make_formation():
+    return FormationType("order", "order", [
+        make_field("id", LongType()),
+        make_field("items", ListType(make_item()))])
+
+@pytest.fixture
+def hook():
+    hook = MagicMock()
+    add_hook(hook)
+    yield hook
+    remove_hook(hook)
+    assert _hooks == []
+
+@pytest.mark.parametrize("compiled", [False, True])
+def test_hook(hook, compiled):
+    formation = make_formation()
+    validate = formation.compile() if compiled else formation.validate
+    validate({"id": 1L, "items": [{"sku": "a"}]})
+
+    assert [c[0][0] for c in hook.call_args_list] == ["item", "order"]
+    name, seconds, elements, error = hook.call_args[0]
+    assert seconds >= 0
+    assert elements == 2
+    assert error is None
+
+@pytest.mark.parametrize("compiled", [False, True])
+def test_hook_failure(hook, compiled):
+    formation = make_formation()
+    validate = formation.compile() if compiled else formation.validate
+
+    with pytest.raises(ValidationError) as e:
+        validate({"id": 1L, "items": [{"sku": ""}]})
+
+    assert [c[0][3] for c in hook.call_args_list] == [e.value, e.value]
+
+def test_add_hook_once(hook):
+    add_hook(hook)
+    make_formation().validate({"id": 1L, "items": []})
+
+    assert hook.call_count == 1
+
+def test_collector():
+    formation = make_formation()
+    validate = formation.compile()
+
+    with Collector(buckets=(10.0,)) as collector:
+        validate({"id": 1L, "items": [{"sku": "a"}, {"sku": "b"}]})
+        for value in [{"items": []}, {"id": 1L, "items": [{"sku": ""}]}]:
+            with pytest.raises(ValidationError):
+                validate(value)
+    validate({"id": 1L, "items": []})
+
+    snapshot = collector.snapshot()
+    assert set(snapshot) == set(["order", "item"])
+    order = snapshot["order"]
+    assert order["calls"] == 3
+    assert order["failures"] == 2
+    assert order["constraints"] == {"required": 1, "minLength": 1}
+    assert order["elements"] == 5
+    assert order["histogram"] == [(10.0, 3), (None, 0)]
+    assert snapshot["item"]["calls"] == 3
+
+    collector.reset()
+    assert collector.snapshot() == {}
@@ -0,0 +1,110 @@
+import pytest
+
+from flexo.parallel import ParallelValidator
+from flexo.typing import ListType, MapType, LongType, StringType
+from flexo.errors import DefinitionError, ValidationError
+
+from mock import patch
+
+@pytest.fixture
+def validator():
+    with ParallelValidator(ListType(LongType(minValue=0L)), processes=2,
+            threshold=10, chunk_size=7) as validator:
+        yield validator
+
+def test_ctor_not_container():
+    with pytest.raises(DefinitionError):
+        ParallelValidator(LongType())
+
+def test_validate(validator):
+    validator.validate([long(i) for i in range(100)])
+
+def test_validate_first_error(validator):
+    values = [long(i) for i in range(100)]
+    values[30] = -1L
+    values[80] = "test"
+
+    with pytest.raises(ValidationError) as e:
+        validator.validate(values)
+    assert e.value.path == [30]
+
+def test_validate_not_list(validator):
+    with pytest.raises(ValidationError):
+        validator.validate("a" * 100)
+
+def test_errors(validator):
+    values = [long(i) for i in range(100)]
+    values[30] = -1L
+    values[80] = "test"
+
+    assert [e.path for e in validator.errors(values)] == [[30], [80]]
+    assert [e.path for e in validator.errors(values[:20])] == []
+    assert [e.path for e in validator.errors(values[25:35])] == [[5]]
+
+def test_below_threshold_stays_sequential(validator):
+    validator.validate([1L, 2L])
+    assert validator._pool is None
+
+def test_errors_below_threshold_not_recompiled(validator):
+    with patch("flexo.parallel._chunk_validator") as chunk_validator:
+        assert [e.path for e in validator.errors([1L, -1L])] == [[1]]
+    assert not chunk_validator.called
+
+def test_map():
+    values = dict(("key%s" % i, long(i)) for i in range(50))
+    values["key7"] = -1L
+
+    with ParallelValidator(MapType(StringType(), LongType(minValue=0L)),
+            processes=2, threshold=10) as validator:
+        with pytest.raises(ValidationError) as e:
+            validator.validate(values)
+
+    assert e.value.path == ["key7"]
+
+def test_executor():
+    futures = pytest.importorskip("concurrent.futures")
+    values = [long(i) for i in range(100)]
+    values[55] = -1L
+
+    with futures.ProcessPoolExecutor(2) as executor:
+        validator = ParallelValidator(ListType(LongType(minValue=0L)),
+                threshold=10, executor=executor)
+        validator.validate(values[:50])
+        with pytest.raises(ValidationError) as e:
+            validator.validate(values)
+
+    assert e.value.path == [55]
+
+def test_stops_submitting_after_error():
+    futures = pytest.importorskip("concurrent.futures")
+    values = [long(i) for i in range(100)]
+    values[3] = -1L
+    submitted = []
+
+    class Executor(object):
+        def submit(self, function, *args):
+            submitted.append(args[3])
+            future = futures.Future()
+            future.set_result(function(*args))
+            return future
+
+    validator = ParallelValidator(ListType(LongType(minValue=0L)),
+            processes=2, threshold=10, chunk_size=7, executor=Executor())
+    with pytest.raises(ValidationError) as e:
+        validator.validate(values)
+
+    assert e.value.path == [3]
+    assert submitted == [0, 7, 14, 21, 28]
+    assert len(validator.errors(values)) == 1
+    assert len(submitted) == 5 + 15
+
+def test_max_length():
+    with ParallelValidator(ListType(LongType(), maxLength=50), processes=2,
+            threshold=10) as validator:
+        with pytest.raises(ValidationError) as e:
+            validator.validate([1L] * 100)
+        errors = validator.errors([1L] * 100)
+        assert [error.constraint for error in errors] == ["maxLength"]
+        assert validator._pool is None
+
+    assert e.value.constraint == "maxLength"
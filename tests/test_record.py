@@ -0,0 +1,70 @@
+import pytest
+
+from flexo.record import Record
+from flexo.typing import StringType, LongType, ListType, MapType,\
+        FormationType
+from flexo.errors import DefinitionError, ValidationError
+
+from helpers import make_field, make_item
+
+def make_formation():
+    item = make_item()
+    return FormationType("order", "order", [
+        make_field("id", LongType()),
+        make_field("items", ListType(item)),
+        make_field("byName", MapType(StringType(), item), required=False),
+        make_field("note", StringType(), required=False)])
+
+VALUE = {"id": 1L, "items": [{"sku": "a", "count": 2L}, {"sku": "b"}],
+        "byName": {"x": {"sku": "c"}}}
+
+def test_record_class():
+    formation = make_formation()
+    cls = formation.record_class()
+
+    assert cls is formation.record_class()
+    assert issubclass(cls, Record)
+    assert cls.__name__ == "order"
+    assert cls.__slots__ == ("id", "items", "byName", "note")
+
+def test_from_dict():
+    order = make_formation().record_class().from_dict(VALUE)
+
+    assert order.id == 1L
+    assert order.note is None
+    assert order.items[0].sku == "a"
+    assert order.items[1].count is None
+    assert order.byName["x"].sku == "c"
+    assert not hasattr(order, "__dict__")
+    assert order.to_dict() == VALUE
+
+def test_from_dict_invalid():
+    cls = make_formation().record_class()
+
+    with pytest.raises(ValidationError) as e:
+        cls.from_dict({"id": 1L, "items": [{"sku": ""}]})
+    assert e.value.path == ["items", 0, "sku"]
+
+    with pytest.raises(ValidationError):
+        cls(id=1L)
+
+def test_equality():
+    cls = make_formation().record_class()
+
+    assert cls.from_dict(VALUE) == cls(**VALUE)
+    assert cls.from_dict(VALUE) != cls(id=2L, items=[])
+    assert repr(cls(id=2L, items=[])) == "order(id=2L, items=[])"
+
+def test_invalid_field_name():
+    formation = FormationType("f", "f", [make_field("not valid", LongType())])
+
+    with pytest.raises(DefinitionError):
+        formation.record_class()
+
+def test_getstate():
+    formation = FormationType("f", "f", [make_field("a", LongType())])
+    formation.record_class()
+
+    state = formation.__getstate__()
+    assert "_record_class" not in state
+    assert formation._record_class is not None
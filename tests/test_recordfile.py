@@ -0,0 +1,117 @@
+import pytest, datetime, tempfile
+
+from flexo.recordfile import RecordWriter, RecordFile, schema_fingerprint
+from flexo.typing import StringType, LongType, FloatType, ListType,\
+        DatetimeType, FormationType
+from flexo.errors import ValidationError, BatchValidationError
+
+from helpers import make_field
+
+def make_formation(maxPrice=None, note_required=False):
+    return FormationType("order", "order", [
+        make_field("id", LongType()),
+        make_field("created", DatetimeType()),
+        make_field("price", FloatType(minValue=0.0, maxValue=maxPrice)),
+        make_field("note", StringType(), required=note_required),
+        make_field("tags", ListType(StringType()))])
+
+def make_records(count):
+    return [{"id": long(i), "created": datetime.datetime(2016, 1, 1, i % 24),
+        "price": float(i), "tags": ["a"] * (i % 3)} for i in range(count)]
+
+@pytest.fixture
+def path(tmpdir):
+    path = str(tmpdir.join("records.flxr"))
+    records = make_records(50)
+    records[7]["note"] = u"seven"
+    with open(path, "wb") as fp:
+        with RecordWriter(make_formation(), fp) as writer:
+            for record in records:
+                writer.write(record)
+    return path
+
+def test_fingerprint():
+    assert schema_fingerprint(make_formation()) ==\
+            schema_fingerprint(make_formation())
+    assert schema_fingerprint(make_formation()) ==\
+            schema_fingerprint(make_formation(maxPrice=1.0))
+    assert schema_fingerprint(make_formation()) !=\
+            schema_fingerprint(make_formation(note_required=True))
+    assert schema_fingerprint(ListType(StringType())) !=\
+            schema_fingerprint(ListType(LongType()))
+
+def test_write_validates():
+    record = make_records(1)[0]
+    record["price"] = -1.0
+    writer = RecordWriter(make_formation(), tempfile.TemporaryFile())
+
+    with pytest.raises(ValidationError):
+        writer.write(record)
+
+def test_read(path):
+    expected = make_records(50)
+    expected[7]["note"] = u"seven"
+    with open(path, "rb") as fp:
+        with RecordFile(make_formation(), fp) as records:
+            assert len(records) == 50
+            assert records.read(7) == expected[7]
+            assert records[-1].to_dict() == expected[-1]
+            assert [r.to_dict() for r in records] == expected
+
+            view = records[7]
+            assert view["price"] == 7.0
+            assert view.get("note") == u"seven"
+            assert records[8].get("note") is None
+            assert "note" not in records[8]
+            assert view.keys() == ["id", "created", "price", "note", "tags"]
+
+            with pytest.raises(IndexError):
+                records[50]
+
+            records.validate()
+
+def test_validate_column(path):
+    with open(path, "rb") as fp:
+        with RecordFile(make_formation(), fp) as records:
+            records.validate_column("price")
+
+def test_validate_stricter_schema(path):
+    with open(path, "rb") as fp:
+        with RecordFile(make_formation(maxPrice=10.0), fp) as records:
+            with pytest.raises(BatchValidationError) as e:
+                records.validate()
+            with pytest.raises(BatchValidationError) as column:
+                records.validate_column("price")
+
+    assert e.value.rows == range(11, 50)
+    assert [error.path for row, error in e.value.failures] ==\
+            [["price"]] * 39
+    assert column.value.rows == e.value.rows
+
+def test_schema_mismatch(path):
+    with open(path, "rb") as fp:
+        with pytest.raises(ValueError):
+            RecordFile(make_formation(note_required=True), fp)
+
+def test_malformed_record(path):
+    with open(path, "rb") as fp:
+        data = fp.read()
+    with open(path, "wb") as fp:
+        fp.write(data.replace("seven", "\xff" * 5))
+
+    with open(path, "rb") as fp:
+        with RecordFile(make_formation(), fp) as records:
+            assert records[7]["price"] == 7.0
+            with pytest.raises(ValueError):
+                records[7]["note"]
+            with pytest.raises(ValueError):
+                records.validate_column("note")
+            with pytest.raises(ValueError):
+                records.validate()
+
+def test_not_a_record_file(tmpdir):
+    path = tmpdir.join("other")
+    path.write("x" * 100)
+    with open(str(path), "rb") as fp:
+        with pytest.raises(ValueError):
+            RecordFile(make_formation(), fp)
@@ -0,0 +1,195 @@
+import pytest
+
+from flexo.registry import SchemaRegistry
+from flexo.collect import ErrorCollector
+from flexo.binary import BinaryCodec
+from flexo.cooperative import validation_steps
+from flexo.decoder import SchemaDecoder
+from flexo.encoder import SchemaEncoder
+from flexo.parallel import ParallelValidator
+from flexo.sampling import SamplingValidator
+from flexo.typing import StringType, LongType, ListType, DatetimeType,\
+        FormationType, FormationRef
+from flexo.errors import DefinitionError, ValidationError
+
+from cStringIO import StringIO
+
+import datetime, pickle
+from mock import MagicMock
+from helpers import Field
+
+def make_registry():
+    registry = SchemaRegistry()
+
+    @registry.formation("node")
+    def node():
+        return FormationType("node", "A tree node", [
+            Field("value", LongType()),
+            Field("at", DatetimeType(), required=False),
+            Field("owner", registry.ref("person"), required=False),
+            Field("children", ListType(registry.ref("node")), required=False)
+        ])
+
+    @registry.formation("person")
+    def person():
+        return FormationType("person", "A person", [
+            Field("name", StringType(1))])
+
+    return registry
+
+TREE = {"value": 1L, "owner": {"name": u"a"}, "children": [{"value": 2L},
+    {"value": 3L, "children": [{"value": 4L, "owner": {"name": u"b"}}]}]}
+
+def test_lazy():
+    registry = SchemaRegistry()
+    factory = MagicMock(return_value=FormationType("x", "x",
+        [Field("a", LongType())]))
+    registry.register("x", factory)
+
+    assert "x" in registry
+    assert not factory.called
+    assert registry.get("x") is registry.get("x")
+    assert factory.call_count == 1
+    assert registry.validator("x") is registry.validator("x")
+
+def test_register_errors():
+    registry = SchemaRegistry()
+    registry.register("x", lambda: "x")
+
+    with pytest.raises(DefinitionError):
+        registry.register("x", lambda: None)
+    with pytest.raises(DefinitionError):
+        registry.get("x")
+    with pytest.raises(KeyError):
+        registry.get("y")
+
+def test_self_requiring_factory():
+    registry = SchemaRegistry()
+    registry.register("x", lambda: FormationType("x", "x",
+        [Field("x", registry.get("x"))]))
+
+    with pytest.raises(DefinitionError):
+        registry.get("x")
+
+def test_recursive_validation():
+    registry = make_registry()
+    invalid = {"value": 1L, "children": [{"value": 2L,
+        "children": [{"value": "x"}]}]}
+
+    for validate in [registry.get("node").validate,
+            registry.get("node").compile(),
+            lambda value: registry.validate("node", value)]:
+        validate(TREE)
+        with pytest.raises(ValidationError) as e:
+            validate(invalid)
+        assert e.value.path == ["children", 0, "children", 0, "value"]
+
+def test_ref():
+    registry = make_registry()
+    ref = registry.ref("node")
+
+    assert ref == registry.ref("node")
+    assert ref != registry.ref("person")
+    assert ref.target is registry.get("node")
+    ref.validate(TREE, {})
+    with pytest.raises(AttributeError):
+        ref.name = "person"
+
+def test_record_class():
+    node = make_registry().get("node")
+    record = node.record_class().from_dict(TREE)
+
+    child = record.children[1].children[0]
+    assert child.value == 4L
+    assert child.owner.name == u"b"
+    assert type(child) is type(record)
+    assert record.to_dict() == TREE
+
+def test_collect():
+    errors = ErrorCollector(make_registry().ref("node")).errors({"value": "x",
+        "children": [{"value": 2L, "owner": {}}, {"value": "y"}]})
+
+    assert sorted((e.path, e.constraint) for e in errors) == [
+            (["children", 0, "owner"], "required"),
+            (["children", 1, "value"], "type"), (["value"], "type")]
+
+def test_save_load():
+    registry = make_registry()
+    registry.build_all(compile=True)
+    fp = StringIO()
+    registry.save(fp)
+
+    loaded = SchemaRegistry()
+    loaded.load(StringIO(fp.getvalue()))
+
+    assert loaded.names() == ["node", "person"]
+    children = loaded.get("node").fields["children"].type.elementType
+    assert isinstance(children, FormationRef)
+    assert children.registry is loaded
+    loaded.validate("node", TREE)
+    with pytest.raises(ValidationError):
+        loaded.validate("node", {"value": 1L, "owner": {"name": u""}})
+
+@pytest.mark.parametrize("protocol", [0, pickle.HIGHEST_PROTOCOL])
+def test_pickle(protocol):
+    schema = ListType(make_registry().ref("node"))
+    copy = pickle.loads(pickle.dumps(schema, protocol))
+
+    node = copy.elementType
+    assert node.registry.names() == ["node", "person"]
+    assert node.target.fields["children"].type.elementType.registry is\
+            node.registry
+    copy.compile()([TREE])
+    with pytest.raises(ValidationError) as e:
+        copy.compile()([TREE, {"value": 1L, "owner": {}}])
+    assert e.value.path == [1, "owner"]
+
+def test_parallel():
+    values = [TREE] * 20
+    values[13] = {"value": 1L, "children": [{"value": "x"}]}
+
+    with ParallelValidator(ListType(make_registry().ref("node")),
+            processes=2, threshold=10, chunk_size=3) as validator:
+        with pytest.raises(ValidationError) as e:
+            validator.validate(values)
+        assert e.value.path == [13, "children", 0, "value"]
+        assert [e.path for e in validator.errors(values)] ==\
+                [[13, "children", 0, "value"]]
+
+@pytest.mark.parametrize("validate", [True, False])
+def test_encode_decode(validate):
+    registry = make_registry()
+    value = {"value": 1L, "children": [{"value": 2L,
+        "at": datetime.datetime(2016, 9, 1, 12, 30),
+        "children": [{"value": 3L, "owner": {"name": u"a"}}]}]}
+    node = registry.ref("node")
+
+    document = SchemaEncoder(node, validate=validate).encode(value)
+    assert SchemaDecoder(node).decode(document) == value
+    codec = BinaryCodec(node)
+    assert codec.decode(codec.encode(value)) == value
+
+    with pytest.raises(ValidationError) as e:
+        SchemaDecoder(node).decode(
+                '{"value": 1, "children": [{"value": "x"}]}')
+    assert e.value.path == ["children", 0, "value"]
+
+def test_cooperative():
+    node = make_registry().ref("node")
+    value = {"value": 1L, "children": [{"value": 2L,
+        "children": [{"value": long(i)} for i in range(10)]}]}
+
+    assert len(list(validation_steps(node, value, step=1))) > 10
+
+    value["children"][0]["children"][5]["value"] = "x"
+    with pytest.raises(ValidationError) as e:
+        list(validation_steps(node, value, step=1))
+    assert e.value.path == ["children", 0, "children", 5, "value"]
+
+def test_sampling():
+    node = make_registry().ref("node")
+    validator = SamplingValidator(node, sample=2, seed=1)
+    validator.validate({"value": 1L, "children": [{"value": 2L,
+        "children": [{"value": long(i)} for i in range(10)]}]})
+
+    assert (validator.checked, validator.skipped) == (3, 8)
@@ -0,0 +1,71 @@
+import pytest
+
+from flexo.sampling import SamplingValidator
+from flexo.typing import StringType, LongType, ListType, MapType,\
+        FormationType
+from flexo.errors import ValidationError
+
+from helpers import make_field, MockType
+
+def validated(element, value, **kwargs):
+    SamplingValidator(ListType(element), **kwargs).validate(value)
+    return [c[0][0] for c in element.validate.call_args_list]
+
+def test_ctor():
+    for kwargs in [{}, {"fraction": 0.5, "sample": 1}, {"fraction": 2.0}]:
+        with pytest.raises(ValueError):
+            SamplingValidator(LongType(), **kwargs)
+
+def test_fraction():
+    element = MockType()
+    validator = SamplingValidator(ListType(element), fraction=0.1, head=5,
+            seed=1)
+    validator.validate(range(105))
+
+    assert element.validate.call_count == 15
+    assert [c[0][0] for c in element.validate.call_args_list][:5] == range(5)
+    assert (validator.checked, validator.skipped) == (15, 90)
+
+def test_sample_is_deterministic():
+    one = validated(MockType(), range(1000), sample=10, seed=42)
+    two = validated(MockType(), range(1000), sample=10, seed=42)
+
+    assert one == two
+    assert one == sorted(one)
+    assert len(one) == 10
+
+def test_short_lists_fully_validated():
+    assert validated(MockType(), range(3), sample=10, head=2) == range(3)
+
+def test_container_always_checked():
+    validator = SamplingValidator(ListType(LongType(), maxLength=5),
+            fraction=0.0)
+    validator.validate([1L, 2L])
+
+    for value in ["x", [1L] * 6]:
+        with pytest.raises(ValidationError):
+            validator.validate(value)
+
+def test_map_and_formation():
+    item = FormationType("item", "item", [
+        make_field("tags", MapType(StringType(), LongType(minValue=0L)))])
+    validator = SamplingValidator(ListType(item), fraction=1.0, seed=0)
+
+    with pytest.raises(ValidationError) as e:
+        validator.validate([{"tags": {"a": 1L}}, {"tags": {"b": -1L}}])
+    assert e.value.path == [1, "tags", "b"]
+
+    with pytest.raises(ValidationError) as e:
+        validator.validate([{"bogus": {}}])
+    assert e.value.constraint == "field"
+
+def test_map_sample():
+    value = MockType()
+    validator = SamplingValidator(MapType(StringType(), value), sample=3,
+            head=1, seed=3)
+    validator.validate(dict(("k%s" % i, i) for i in range(20)))
+
+    assert value.validate.call_count == 4
+    assert (validator.checked, validator.skipped) == (4, 16)
+    validator.reset()
+    assert validator.checked == 0
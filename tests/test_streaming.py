@@ -0,0 +1,98 @@
+import pytest, json, StringIO
+
+from flexo.streaming import iter_validated
+from flexo.typing import ListType, LongType, StringType, MapType,\
+        BooleanType
+from flexo.errors import DefinitionError, ValidationError
+
+def make_schema():
+    return ListType(MapType(StringType(), LongType(minValue=0L)))
+
+def make_document(count):
+    return json.dumps([{"a": i, "b": i * 1000} for i in range(count)])
+
+def test_not_list_type():
+    with pytest.raises(DefinitionError):
+        list(iter_validated("[]", LongType()))
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_file(chunk_size):
+    document = make_document(100)
+    elements = list(iter_validated(StringIO.StringIO(document),
+        make_schema(), chunk_size=chunk_size))
+
+    assert elements == json.loads(document)
+    assert all(isinstance(e["a"], long) for e in elements)
+
+def test_chunks():
+    document = make_document(10)
+    chunks = [document[i:i + 3] for i in range(0, len(document), 3)]
+
+    assert list(iter_validated(iter(chunks), make_schema())) ==\
+            json.loads(document)
+
+def test_multibyte_characters_split_across_chunks():
+    document = json.dumps([u"\u00e9t\u00e9"] * 5, ensure_ascii=False)\
+            .encode("utf-8")
+
+    assert list(iter_validated(StringIO.StringIO(document),
+        ListType(StringType()), chunk_size=1)) == [u"\u00e9t\u00e9"] * 5
+
+def test_number_at_chunk_boundary():
+    chunks = ["[1", "2", "3, 4", "5]"]
+
+    assert list(iter_validated(chunks, ListType(LongType()))) == [123L, 45L]
+
+@pytest.mark.parametrize("document", ["[]", " [ ] ", "\n[1]\n"])
+def test_small_documents(document):
+    assert list(iter_validated(document, ListType(LongType()))) ==\
+            json.loads(document)
+
+def test_invalid_element():
+    elements = iter_validated("[1, -1, 2]", ListType(LongType(minValue=0L)))
+
+    assert next(elements) == 1L
+    with pytest.raises(ValidationError) as e:
+        next(elements)
+    assert e.value.path == [1]
+
+def test_yield_errors():
+    elements = list(iter_validated("[1, -1, 2]",
+        ListType(LongType(minValue=0L)), yield_errors=True))
+
+    assert elements[0] == 1L
+    assert isinstance(elements[1], ValidationError)
+    assert elements[2] == 2L
+
+@pytest.mark.parametrize("document", ["", "{}", "[1", "[1,", "[1 2]",
+    "[1,]", "[x]", "[1] 2"])
+def test_malformed(document):
+    with pytest.raises(ValueError):
+        list(iter_validated(document, ListType(LongType())))
+
+def test_max_length():
+    elements = iter_validated("[1, 2, 3", ListType(LongType(), maxLength=2))
+
+    assert [next(elements), next(elements)] == [1L, 2L]
+    with pytest.raises(ValidationError) as e:
+        next(elements)
+    assert e.value.constraint == "maxLength"
+
+def test_tokens_split_across_chunks():
+    assert list(iter_validated(["[tr", "ue, fal", "se]"],
+        ListType(BooleanType()))) == [True, False]
+    assert list(iter_validated(['["\\u00', 'e9", "', 'a"]'],
+        ListType(StringType()))) == [u"\u00e9", u"a"]
+
+def test_malformed_element_stops_reading():
+    read = []
+
+    def chunks():
+        yield '[{"a": 1 x}, '
+        for i in range(100000):
+            read.append(i)
+            yield '{"a": 1}, ' * 100
+
+    with pytest.raises(ValueError):
+        list(iter_validated(chunks(), make_schema(), chunk_size=1024))
+    assert len(read) <= 2
@@ -49,3 +49,82 @@ def test_validate():
     flexo.utils.validate_fields(fields, to_validate)
     for field in fields.values():
         field.validate.assert_called_with(to_validate[field.name])
+
+def make_field(name, required):
+    field = MagicMock()
+    field.name = name
+    field.validate = MagicMock()
+    field.required = required
+    return field
+
+def test_field_index():
+    fields = [make_field("one", True), make_field("two", False),
+            make_field("three", True)]
+    index = flexo.utils.FieldIndex(fields)
+
+    assert index == {f.name: f for f in fields}
+    assert index.names == ("one", "two", "three")
+    assert index.required == frozenset(["one", "three"])
+    assert index.required_count == 2
+    assert index.validators["two"] is fields[1].validate
+    assert index.missing({"one": 1}) == ["three"]
+
+def test_field_index_immutable():
+    index = flexo.utils.FieldIndex([make_field("one", True)])
+
+    with pytest.raises(TypeError):
+        index["two"] = make_field("two", True)
+    with pytest.raises(TypeError):
+        del index["one"]
+    with pytest.raises(TypeError):
+        index.update({})
+
+def test_validate_field_index():
+    fields = [make_field("one", True), make_field("two", False),
+            make_field("three", True)]
+    index = flexo.utils.FieldIndex(fields)
+
+    flexo.utils.validate_fields(index, {"one": 1, "three": 3})
+    fields[0].validate.assert_called_with(1)
+    fields[2].validate.assert_called_with(3)
+
+    with pytest.raises(ValidationError):
+        flexo.utils.validate_fields(index, {"one": 1, "two": 2})
+    with pytest.raises(ValidationError):
+        flexo.utils.validate_fields(index, {"one": 1, "three": 3, "four": 4})
+
+@pytest.mark.parametrize("fields", [{}, flexo.utils.FieldIndex([])])
+@pytest.mark.parametrize("value", [None, [], "a", 1L])
+def test_validate_fields_not_dict(fields, value):
+    with pytest.raises(ValidationError) as e:
+        flexo.utils.validate_fields(fields, value)
+    assert e.value.constraint == "type"
+
+@pytest.mark.parametrize("value, constraint, path", [
+    ({"one": 1, "three": 3, "four": 4}, "field", ["four"]),
+    ({"one": 1, "two": 2}, "required", [])])
+def test_check_keys(value, constraint, path):
+    index = flexo.utils.FieldIndex([make_field("one", True),
+        make_field("two", False), make_field("three", True)])
+    flexo.utils.check_keys(index, "test", {"one": 1, "three": 3})
+
+    with pytest.raises(ValidationError) as e:
+        flexo.utils.check_keys(index, "test", value)
+    assert e.value.constraint == constraint
+    assert e.value.path == path
+
+def test_fields_validator():
+    index = flexo.utils.FieldIndex([make_field("one", True),
+        make_field("two", False)])
+    validators = {"one": MagicMock(), "two": MagicMock(
+        side_effect=ValidationError("invalid"))}
+    validate = flexo.utils.fields_validator(index, validators, "test")
+
+    validate({"one": 1})
+    validators["one"].assert_called_with(1)
+    with pytest.raises(ValidationError) as e:
+        validate({"one": 1, "two": 2})
+    assert e.value.path == ["two"]
+    with pytest.raises(ValidationError) as e:
+        validate([])
+    assert e.value.constraint == "type"
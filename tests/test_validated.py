@@ -0,0 +1,100 @@
+import pytest, copy
+
+from flexo.validated import ValidatedDict
+from flexo.typing import StringType, LongType, ListType, FormationType
+from flexo.errors import ValidationError
+
+from helpers import make_field, MockType
+
+def make_formation(tags_type=None):
+    return FormationType("user", "user", [
+        make_field("name", StringType(minLength=1)),
+        make_field("age", LongType(minValue=0L), required=False),
+        make_field("tags", tags_type or ListType(StringType()),
+            required=False)])
+
+def test_initial_validation():
+    with pytest.raises(ValidationError):
+        ValidatedDict(make_formation(), {"age": 1L})
+
+def test_validates_only_dirty_fields():
+    tags = MockType()
+    value = ValidatedDict(make_formation(tags), {"name": "a", "tags": ["x"]})
+    tags.validate.reset_mock()
+
+    value["age"] = 2L
+    assert value.dirty == frozenset(["age"])
+    value.validate()
+
+    assert value.dirty == frozenset()
+    assert not tags.validate.called
+    assert value == {"name": "a", "age": 2L, "tags": ["x"]}
+
+def test_invalid_assignment():
+    value = ValidatedDict(make_formation(), {"name": "a"})
+    value["age"] = -1L
+
+    with pytest.raises(ValidationError) as e:
+        value.validate()
+    assert e.value.path == ["age"]
+    assert value.dirty == frozenset(["age"])
+
+    with pytest.raises(ValidationError):
+        value["bogus"] = 1L
+
+def test_eager():
+    value = ValidatedDict(make_formation(), {"name": "a"}, eager=True)
+
+    with pytest.raises(ValidationError):
+        value["age"] = -1L
+    assert "age" not in value
+
+    value.update(age=1L)
+    assert value.dirty == frozenset()
+
+def test_required_deleted():
+    value = ValidatedDict(make_formation(), {"name": "a", "age": 1L})
+    del value["age"]
+    value.validate()
+
+    value.pop("name")
+    with pytest.raises(ValidationError) as e:
+        value.validate()
+    assert e.value.constraint == "required"
+
+    value.setdefault("name", "b")
+    value.validate()
+
+    value.clear()
+    with pytest.raises(ValidationError):
+        value.validate()
+
+def test_mark_dirty():
+    value = ValidatedDict(make_formation(), {"name": "a", "tags": []})
+    value["tags"].append(1L)
+    value.validate()
+
+    value.mark_dirty("tags")
+    with pytest.raises(ValidationError) as e:
+        value.validate()
+    assert e.value.path == ["tags", 0]
+
+def test_copy():
+    value = ValidatedDict(make_formation(), {"name": "a"})
+    value["age"] = 1L
+    other = copy.copy(value)
+
+    assert other == value
+    assert other.dirty == value.dirty
+    assert other.formation is value.formation
+
+def test_formation_compiled_once():
+    formation = make_formation()
+    validators = formation.field_validators()
+
+    assert formation.compile() is formation.compile()
+
+    for i in range(3):
+        value = ValidatedDict(formation, {"name": "a"})
+        assert value._validators is validators
+    assert copy.copy(value)._validators is validators
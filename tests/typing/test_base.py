@@ -0,0 +1,93 @@
+import pytest, pickle
+
+from flexo.typing import BaseType, StringType, LongType, FloatType,\
+        PositiveLongType, BooleanType, ListType, MapType, DatetimeType,\
+        FormationType, interned
+
+from mock import MagicMock
+
+def test_slots():
+    for schema in [StringType(), LongType(), PositiveLongType(), FloatType(),
+            BooleanType(), DatetimeType(), ListType(StringType()),
+            MapType(StringType(), LongType())]:
+        assert not hasattr(schema, "__dict__")
+
+def test_immutable():
+    schema = StringType(0, 255)
+
+    with pytest.raises(AttributeError):
+        schema.maxLength = 10
+    with pytest.raises(AttributeError):
+        del schema.minLength
+    with pytest.raises(AttributeError):
+        ListType(schema).elementType = schema
+    assert schema.maxLength == 255
+
+def test_equality():
+    assert StringType(0, 255) == StringType(0, 255)
+    assert hash(StringType(0, 255)) == hash(StringType(0, 255))
+    assert StringType(0, 255) != StringType(0, 10)
+    assert LongType(0L) != PositiveLongType()
+    assert LongType() != FloatType()
+    assert ListType(LongType(1L)) == ListType(LongType(1L))
+    assert MapType(StringType(), ListType(BooleanType())) ==\
+            MapType(StringType(), ListType(BooleanType()))
+    assert BooleanType() == BooleanType()
+    assert StringType() != "StringType()"
+    assert len(set([DatetimeType(), DatetimeType(), BooleanType()])) == 2
+
+class PatternType(BaseType):
+    __slots__ = ('pattern',)
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+
+class PatternListType(ListType):
+    __slots__ = ('pattern',)
+
+    def __init__(self, pattern):
+        super(PatternListType, self).__init__(StringType())
+        self.pattern = pattern
+
+def test_custom_type_identity():
+    one = PatternType("a+")
+    two = PatternType("b+")
+
+    assert one == one
+    assert one != two
+    assert hash(one) != hash(two)
+    assert interned(two) is two
+    assert ListType(one) != ListType(two)
+    assert PatternListType("a+") != PatternListType("b+")
+    assert PositiveLongType(5L) == PositiveLongType(5L)
+
+def test_formation_identity():
+    field = MagicMock()
+    field.name = "a"
+    one = FormationType("f", "f", [field])
+    two = FormationType("f", "f", [field])
+
+    assert one == one
+    assert one != two
+    assert interned(one) is one
+
+def test_interned():
+    one = interned(StringType(0, 255))
+
+    assert interned(StringType(0, 255)) is one
+    assert interned(StringType(0, 10)) is not one
+    assert interned(ListType(StringType(0, 255))) is\
+            interned(ListType(StringType(0, 255)))
+
+def test_pickle():
+    schema = MapType(StringType(1), ListType(PositiveLongType(10L)))
+
+    for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+        copy = pickle.loads(pickle.dumps(schema, protocol))
+        assert copy == schema
+        assert copy.valueType.elementType.maxValue == 10L
+
+def test_repr():
+    assert repr(ListType(StringType(0, 5))) ==\
+            "ListType(elementType=StringType(minLength=0, maxLength=5), "\
+            "maxLength=None)"
@@ -0,0 +1,130 @@
+import pytest, datetime
+
+from flexo.typing import StringType, LongType, FloatType, BooleanType,\
+        ListType, MapType, DatetimeType, FormationType
+from flexo.errors import ValidationError
+
+from mock import MagicMock
+from helpers import make_field, MockType
+
+def test_base_type_compiles_to_validate():
+    t = MockType()
+
+    assert t.compile() is t.validate
+
+def test_string():
+    validate = StringType(minLength=2, maxLength=4).compile()
+    validate("abc")
+
+    for value in [10, "a", "aaaaa"]:
+        with pytest.raises(ValidationError):
+            validate(value)
+
+def test_string_no_bounds():
+    validate = StringType().compile()
+    validate("")
+
+    with pytest.raises(ValidationError):
+        validate(10)
+
+def test_long():
+    validate = LongType(minValue=2L, maxValue=4L).compile()
+    validate(3L)
+
+    for value in [3, "test", 1L, 5L]:
+        with pytest.raises(ValidationError):
+            validate(value)
+
+def test_float_one_bound():
+    validate = FloatType(minValue=0.0).compile()
+    validate(1e100)
+
+    for value in [1L, -1.0]:
+        with pytest.raises(ValidationError):
+            validate(value)
+
+def test_boolean_and_datetime():
+    BooleanType().compile()(True)
+    DatetimeType().compile()(datetime.datetime.utcnow())
+
+    with pytest.raises(ValidationError):
+        BooleanType().compile()(1)
+    with pytest.raises(ValidationError):
+        DatetimeType().compile()(1)
+
+def test_list_and_map():
+    validate = MapType(StringType(maxLength=3),
+            ListType(LongType(minValue=0L))).compile()
+    validate({"abc": [1L, 2L], "d": []})
+
+    for value in [[], {"abcd": []}, {"a": 1L}, {"a": [-1L]}]:
+        with pytest.raises(ValidationError):
+            validate(value)
+
+def test_max_length():
+    validate_list = ListType(LongType(), maxLength=2).compile()
+    validate_map = MapType(StringType(), LongType(), maxLength=1).compile()
+    validate_list([1L, 2L])
+    validate_map({"a": 1L})
+
+    for validate, value in [(validate_list, [1L, 2L, 3L]),
+            (validate_map, {"a": 1L, "b": 2L})]:
+        with pytest.raises(ValidationError) as e:
+            validate(value)
+        assert e.value.constraint == "maxLength"
+
+def test_unbounded_containers_skip_length():
+    for schema in [ListType(LongType()), MapType(StringType(), LongType())]:
+        assert "maxLength" not in schema.compile().__code__.co_freevars
+
+def test_list_uses_overridden_validate():
+    elementType = MockType()
+    values = ["test1", "test2"]
+
+    ListType(elementType).compile()(values)
+    assert elementType.validate.call_count == len(values)
+
+def test_formation():
+    inner = FormationType("inner", "inner", [
+        make_field("count", LongType(minValue=0L))])
+    outer = FormationType("outer", "outer", [
+        make_field("name", StringType(maxLength=3)),
+        make_field("inner", inner),
+        make_field("items", ListType(inner), required=False)])
+    validate = outer.compile()
+
+    validate({"name": "abc", "inner": {"count": 1L}})
+    validate({"name": "abc", "inner": {"count": 1L},
+        "items": [{"count": 2L}]})
+
+    invalid = [{"name": "abc"},
+            {"name": "abcd", "inner": {"count": 1L}},
+            {"name": "abc", "inner": {"count": 1L}, "other": 1L},
+            {"name": "abc", "inner": {"count": 1L}, "items": [{}]}]
+    for value in invalid:
+        with pytest.raises(ValidationError):
+            validate(value)
+
+def test_formation_field_without_type():
+    field = MagicMock()
+    field.name = "test"
+    field.type = None
+    field.required = True
+
+    FormationType("test", "test", [field]).compile()({"test": "value"})
+    field.validate.assert_called_with("value")
+
+def test_error_path():
+    inner = FormationType("inner", "inner", [
+        make_field("count", LongType(minValue=0L))])
+    outer = FormationType("outer", "outer", [
+        make_field("items", MapType(StringType(), ListType(inner)))])
+    value = {"items": {"a": [{"count": 1L}, {"count": -1L}]}}
+
+    for validate in [outer.validate, outer.compile()]:
+        with pytest.raises(ValidationError) as e:
+            validate(value)
+
+        assert e.value.path == ["items", "a", 1, "count"]
+        assert e.value.constraint == "minValue"
+        assert str(e.value) == "items.a[1].count: -1L is less than minimum 0"
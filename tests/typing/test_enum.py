@@ -0,0 +1,76 @@
+import pytest, pickle
+
+from flexo.typing import EnumType, MapType, ListType, StringType, interned
+from flexo.errors import DefinitionError, ValidationError
+
+def test_ctor_empty():
+    with pytest.raises(DefinitionError):
+        EnumType([])
+
+def test_ctor_mixed_members():
+    for members in [[u"a", 1L], [1], [True], [1.0]]:
+        with pytest.raises(DefinitionError):
+            EnumType(members)
+
+def test_ctor():
+    members = frozenset([u"a", "b"])
+    e = EnumType(members)
+
+    assert e.members is members
+    assert e.kind == "string"
+    assert EnumType([1L, 2L]).members == frozenset([1L, 2L])
+    assert EnumType([1L, 2L]).kind == "long"
+
+@pytest.mark.parametrize("members", [[u"a", u"b"], [1L, 2L]])
+def test_pickle(members):
+    e = EnumType(members)
+    copy = pickle.loads(pickle.dumps(e, pickle.HIGHEST_PROTOCOL))
+
+    assert copy == e
+    assert copy.kind == e.kind
+    with pytest.raises(ValidationError):
+        copy.validate(u"c" if e.kind == "long" else 3L)
+
+def test_shared_members():
+    members = frozenset(u"sku%s" % i for i in range(10000))
+
+    assert EnumType(members) == EnumType(members)
+    assert interned(EnumType(members)) is interned(EnumType(members))
+    assert interned(EnumType(members)).members is members
+
+@pytest.mark.parametrize("schema, value, constraint", [
+    (EnumType([u"a", u"b"]), u"c", "enum"),
+    (EnumType([u"a", u"b"]), 1L, "type"),
+    (EnumType([1L, 2L]), 3L, "enum"),
+    (EnumType([1L, 2L]), 1, "type"),
+    (EnumType([1L, 2L]), True, "type"),
+    (EnumType([1L, 2L]), u"1", "type")
+])
+def test_validate_invalid(schema, value, constraint):
+    for validate in [schema.validate, schema.compile()]:
+        with pytest.raises(ValidationError) as e:
+            validate(value)
+        assert e.value.constraint == constraint
+
+def test_validate():
+    for validate in [EnumType([u"a", u"b"]).validate,
+            EnumType([u"a", u"b"]).compile()]:
+        validate(u"a")
+        validate("b")
+    EnumType([1L, 2L]).compile()(2L)
+
+def test_error_message():
+    with pytest.raises(ValidationError) as e:
+        EnumType([u"a", u"b"]).validate(u"c")
+    assert str(e.value) == "u'c' is not one of the 2 allowed values"
+
+def test_container_types():
+    schema = MapType(EnumType([u"a"]), ListType(EnumType([1L])))
+    schema.validate({u"a": [1L, 1L]})
+
+    with pytest.raises(ValidationError) as e:
+        schema.compile()({u"b": []})
+    assert e.value.path == [u"b"]
+
+    with pytest.raises(DefinitionError):
+        MapType(EnumType([1L]), StringType())
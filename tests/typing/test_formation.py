@@ -55,3 +55,68 @@ def test_validate(mock_validate_fields):
     formationType.validate(value)
 
     mock_validate_fields.assert_called_with(expected_fields, value, name)
+
+def test_validate_partial():
+    field_one = MagicMock()
+    field_one.name = "testOne"
+    field_one.required = True
+
+    field_two = MagicMock()
+    field_two.name = "testTwo"
+    field_two.required = False
+
+    formationType = FormationType("testName", "testDescription",
+            [field_one, field_two])
+    formationType.validate_partial({"testTwo": "testValue"},
+            removed=["testTwo"])
+
+    field_two.validate.assert_called_with("testValue")
+    assert not field_one.validate.called
+
+def test_validate_partial_invalid():
+    field_one = MagicMock()
+    field_one.name = "testOne"
+    field_one.required = True
+    field_one.validate.side_effect = ValidationError("invalid")
+
+    formationType = FormationType("testName", "testDescription", [field_one])
+
+    with pytest.raises(ValidationError) as e:
+        formationType.validate_partial({"testOne": "testValue"})
+    assert e.value.path == ["testOne"]
+
+    with pytest.raises(ValidationError) as e:
+        formationType.validate_partial({"bogus": "testValue"})
+    assert e.value.constraint == "field"
+
+    with pytest.raises(ValidationError) as e:
+        formationType.validate_partial({}, removed=["bogus"])
+    assert e.value.constraint == "field"
+
+    with pytest.raises(ValidationError) as e:
+        formationType.validate_partial({}, removed=["testOne"])
+    assert e.value.constraint == "required"
+
+@pytest.mark.parametrize("value", [None, [], "testValue", 1L])
+def test_validate_not_dict(value):
+    field = MagicMock()
+    field.name = "testOne"
+    formationType = FormationType("testName", "testDescription", [field])
+
+    for validate in [formationType.validate, formationType.compile(),
+            formationType.validate_partial]:
+        with pytest.raises(ValidationError) as e:
+            validate(value)
+        assert e.value.constraint == "type"
+
+def test_compile_cached_and_not_pickled():
+    field = MagicMock()
+    field.name = "a"
+    field.type = None
+    formation = FormationType("f", "f", [field])
+    compiled = formation.compile()
+
+    assert formation.compile() is compiled
+    assert formation.field_validators() is formation.field_validators()
+    assert formation.field_validators()["a"] is field.validate
+    assert "_compiled" not in formation.__getstate__()
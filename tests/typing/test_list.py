@@ -1,13 +1,10 @@
 import pytest, json
 
-from flexo.typing import ListType, BaseType
+from flexo.typing import ListType
 from flexo.errors import DefinitionError, ValidationError
 
-from mock import MagicMock, call
-
-class MockType(BaseType):
-    def __init__(self):
-        self.validate = MagicMock()
+from mock import call
+from helpers import MockType
 
 def test_ctor_not_basetype():
     with pytest.raises(DefinitionError):
@@ -30,3 +27,17 @@ def test_validate():
 
     ListType(elementType=elementType).validate(values)
     elementType.validate.assert_has_calls([call(x) for x in values])
+
+def test_ctor_max_length_not_int():
+    with pytest.raises(DefinitionError):
+        ListType(MockType(), maxLength="3")
+
+def test_validate_max_length():
+    elementType = MockType()
+
+    ListType(elementType, maxLength=2).validate(["a", "b"])
+    with pytest.raises(ValidationError) as e:
+        ListType(elementType, maxLength=2).validate(["a", "b", "c"])
+
+    assert e.value.constraint == "maxLength"
+    assert elementType.validate.call_count == 2
@@ -44,3 +44,13 @@ def test_validate():
     MapType(keyType=keyType, valueType=valueType).validate(values)
     keyType.validate.assert_has_calls([call(v) for v in values.keys()])
     valueType.validate.assert_has_calls([call(v) for v in values.values()])
+
+def test_validate_max_length():
+    keyType = MockKeyType()
+    valueType = MockValueType()
+
+    with pytest.raises(ValidationError) as e:
+        MapType(keyType, valueType, maxLength=1).validate({"a": 1, "b": 2})
+
+    assert e.value.constraint == "maxLength"
+    assert not valueType.validate.called
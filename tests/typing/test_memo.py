@@ -0,0 +1,49 @@
+from flexo.typing import StringType, ListType, MapType, FormationType
+from flexo.utils import validate_fields
+
+from mock import patch
+from helpers import make_field, MockType
+
+def make_formation(name_type):
+    author = FormationType("author", "author", [make_field("name", name_type)])
+    return FormationType("post", "post", [
+        make_field("author", author),
+        make_field("replies", ListType(author), required=False)])
+
+def test_shared_objects():
+    name_type = MockType()
+    author = {"name": "a"}
+    post = {"author": author, "replies": [author] * 500}
+
+    make_formation(name_type).validate(post, memo={})
+
+    assert name_type.validate.call_count == 1
+
+def test_without_memo():
+    name_type = MockType()
+    author = {"name": "a"}
+
+    make_formation(name_type).validate({"author": author,
+        "replies": [author] * 5})
+
+    assert name_type.validate.call_count == 6
+
+def test_memo_per_type():
+    element = MockType()
+    shared = ["a"]
+    schema = MapType(StringType(), ListType(element))
+
+    schema.validate({"x": shared, "y": shared, "z": ["a"]}, memo={})
+    assert element.validate.call_count == 2
+
+    ListType(ListType(element)).validate([shared], memo={})
+    assert element.validate.call_count == 3
+
+def test_validate_fields_memo():
+    field = make_field("a", ListType(StringType()))
+    shared = ["x"]
+
+    with patch.object(ListType, "validate", autospec=True) as validate:
+        validate_fields({"a": field}, {"a": shared}, memo={})
+
+    assert validate.call_args[0][1] is shared